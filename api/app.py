@@ -11,7 +11,10 @@ def create_app(test_config=None):
     """Create and configure the Flask app."""
     app = Flask(__name__)
     CORS(app, origins=["https://xpui.app.spotify.com", "https://open.spotify.com", "http://localhost:4000", "*"])
-    app.config['JSONIFY_PRETTYPRINT_REGULAR'] = True
+
+    # Compact (orjson) encoding and gzip/brotli compression for every response
+    from api.utils import responses
+    responses.init_app(app)
 
     # Get environment variables
     app.config['MASTER_TRACKS_DIRECTORY_SSD'] = os.getenv("MASTER_TRACKS_DIRECTORY_SSD")
@@ -22,13 +25,15 @@ def create_app(test_config=None):
         app.config.update(test_config)
 
     # Import and register blueprints
-    from api.routes import track_routes, playlist_routes, validation_routes, sync_routes, rekordbox_routes
+    from api.routes import track_routes, playlist_routes, validation_routes, sync_routes, rekordbox_routes, \
+        result_routes
 
     app.register_blueprint(track_routes.bp)
     app.register_blueprint(playlist_routes.bp)
     app.register_blueprint(validation_routes.bp)
     app.register_blueprint(sync_routes.bp)
     app.register_blueprint(rekordbox_routes.bp)
+    app.register_blueprint(result_routes.bp)
 
     @app.route('/status')
     def get_status():
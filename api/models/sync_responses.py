@@ -81,6 +81,8 @@ class SyncResponse:
     details: SyncDetails
     needs_confirmation: bool = False
     next_stage: Optional[str] = None
+    # Token confirming this analysis without posting it back (see api/utils/analysis_sessions.py)
+    session_token: Optional[str] = None
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization."""
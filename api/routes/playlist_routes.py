@@ -126,3 +126,39 @@ def regenerate_playlist(playlist_id):
             "message": str(e),
             "traceback": error_str
         }), 500
+
+
+@bp.route('/containing-files', methods=['POST'])
+def find_playlists_containing_files():
+    """Find which M3U playlists contain the given track files."""
+    data = request.get_json()
+    playlists_dir = data.get('playlistsDir')
+    file_paths = data.get('filePaths', [])
+
+    if not playlists_dir:
+        return jsonify({
+            "success": False,
+            "message": "Playlists directory not specified"
+        }), 400
+
+    if not file_paths:
+        return jsonify({
+            "success": False,
+            "message": "No file paths provided"
+        }), 400
+
+    try:
+        result = playlist_service.find_playlists_containing_files(playlists_dir, file_paths)
+        return jsonify({
+            "success": True,
+            **result
+        })
+    except Exception as e:
+        error_str = traceback.format_exc()
+        print(f"Error finding playlists containing files: {e}")
+        print(error_str)
+        return jsonify({
+            "success": False,
+            "message": str(e),
+            "traceback": error_str
+        }), 500
@@ -0,0 +1,21 @@
+from flask import Blueprint, request, jsonify
+
+from api.utils.pagination import MAX_PAGE_SIZE, get_result_page
+
+bp = Blueprint('results', __name__, url_prefix='/api/results')
+
+
+@bp.route('/<result_id>/<field>', methods=['GET'])
+def get_page(result_id, field):
+    """Get the next page of a paginated endpoint result."""
+    cursor = request.args.get('cursor', 0, type=int)
+    limit = min(max(1, request.args.get('limit', 500, type=int)), MAX_PAGE_SIZE)
+
+    page = get_result_page(result_id, field, max(0, cursor), limit)
+    if page is None:
+        return jsonify({
+            "success": False,
+            "message": "Result not found or expired - run the request again"
+        }), 404
+
+    return jsonify({"success": True, "result_id": result_id, "field": field, **page})
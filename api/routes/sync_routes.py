@@ -3,6 +3,7 @@ from typing import Any, Dict
 from flask import Blueprint, request, jsonify, current_app
 import traceback
 from api.services import sync_service
+from api.utils.analysis_sessions import AnalysisSessionExpired
 
 bp = Blueprint('sync', __name__, url_prefix='/api/sync')
 
@@ -63,6 +64,7 @@ def sync_database():
     is_confirmed = request.json.get('confirmed', False)
     master_playlist_id = request.json.get('master_playlist_id') or current_app.config['MASTER_PLAYLIST_ID']
     precomputed_changes = request.json.get('precomputed_changes_from_analysis')
+    session_token = request.json.get('session_token')
     stage = request.json.get('stage', 'start')
 
     exclusion_config = sync_service.get_exclusion_config(request.json)
@@ -75,9 +77,16 @@ def sync_database():
             is_confirmed,
             precomputed_changes,
             exclusion_config,
-            stage
+            stage,
+            session_token
         )
         return jsonify(result) # returns SyncResponse.to_dict()
+    except AnalysisSessionExpired as e:
+        return jsonify({
+            "success": False,
+            "message": str(e),
+            "session_expired": True
+        }), 409
     except Exception as e:
         error_str = traceback.format_exc()
         print(f"Error in sync_database: {e}")
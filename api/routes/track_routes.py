@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify, current_app
 import traceback
 from api.services import track_service
 from api.services.duplicate_track_service import get_duplicate_tracks_report, detect_and_cleanup_duplicate_tracks
+from api.utils.pagination import paginate_if_requested
 from sql.core.unit_of_work import UnitOfWork
 from utils.logger import setup_logger
 
@@ -119,7 +120,7 @@ def analyze_file_mappings_enhanced():
         return jsonify({
             "success": True,
             "stage": "enhanced_analysis",
-            **result
+            **paginate_if_requested(result, ["files_requiring_user_input", "auto_matched_files"])
         })
 
     except Exception as e:
@@ -440,7 +441,8 @@ def detect_duplicates():
         result = get_duplicate_tracks_report()
 
         if result["success"]:
-            tracks_logger.info(f"Duplicate detection completed: {result['total_groups']} groups found")
+            tracks_logger.info(f"Duplicate detection completed: {result.get('total_groups', 0)} groups found")
+            result = paginate_if_requested(result, ["duplicate_groups"])
         else:
             tracks_logger.error(f"Duplicate detection failed: {result['message']}")
 
@@ -1,8 +1,9 @@
 import json
 import os
 import traceback
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app
 from api.services import validation_service
+from api.utils.pagination import paginate_if_requested
 from sql.core.unit_of_work import UnitOfWork
 
 bp = Blueprint('validation', __name__, url_prefix='/api/validation')
@@ -43,8 +44,7 @@ def validate_playlists_m3u():
         result = validation_service.validate_playlists_m3u(playlists_dir, master_playlist_id)
         return jsonify({
             "success": True,
-            "summary": result["summary"],
-            "playlist_analysis": result["playlist_analysis"]
+            **paginate_if_requested(result, ["playlist_analysis"])
         })
     except Exception as e:
         error_str = traceback.format_exc()
@@ -66,7 +66,7 @@ def validate_file_mappings():
         result = validation_service.validate_file_mappings(master_tracks_dir)
         return jsonify({
             "success": True,
-            **result
+            **paginate_if_requested(result, ["potential_mismatches", "files_missing_trackid", "duplicate_track_ids"])
         })
     except Exception as e:
         error_str = traceback.format_exc()
@@ -79,7 +79,6 @@ def validate_file_mappings():
         }), 500
 
 
-# TODO: move logic to service
 @bp.route('/extract-file-mappings', methods=['POST'])
 def extract_file_mappings():
     """Extract URI mappings from a list of file paths."""
@@ -93,14 +92,7 @@ def extract_file_mappings():
         }), 400
 
     try:
-        mappings = []
-        with UnitOfWork() as uow:
-            for file_path in file_paths:
-                uri = uow.file_track_mapping_repository.get_uri_by_file_path(file_path)
-                mappings.append({
-                    'file_path': file_path,
-                    'uri': uri
-                })
+        mappings = validation_service.extract_file_mappings(file_paths)
 
         return jsonify({
             "success": True,
@@ -317,6 +309,38 @@ def search_extended_versions():
         }), 500
 
 
+@bp.route('/search-extended-versions/bulk', methods=['POST'])
+def search_extended_versions_bulk():
+    """
+    Search Discogs for extended versions of many short tracks, streaming results as NDJSON.
+
+    Takes the short tracks from /short-tracks (``shortTracks``); without them the scan is run
+    here over ``masterTracksDir``/``minLengthMinutes`` and every short track is searched.
+    Each line is a per-track result in completion order; the last line is a summary.
+    """
+    data = request.get_json() or {}
+    short_tracks = data.get('shortTracks')
+
+    try:
+        if short_tracks is None:
+            master_tracks_dir = data.get('masterTracksDir') or current_app.config['MASTER_TRACKS_DIRECTORY_SSD']
+            min_length_minutes = float(data.get('minLengthMinutes', 5))
+            short_tracks = validation_service.validate_short_tracks(
+                master_tracks_dir, min_length_minutes, limit=None)['short_tracks']
+
+        results = validation_service.search_extended_versions_bulk(short_tracks, data.get('maxWorkers'))
+        return Response((json.dumps(result) + '\n' for result in results), mimetype='application/x-ndjson')
+    except Exception as e:
+        error_str = traceback.format_exc()
+        print(f"Error searching extended versions in bulk: {e}")
+        print(error_str)
+        return jsonify({
+            "success": False,
+            "message": str(e),
+            "traceback": error_str
+        }), 500
+
+
 @bp.route('/extract-track-ids', methods=['POST'])
 def extract_track_ids():
     """Extract TrackIds from a list of file paths."""
@@ -330,23 +354,7 @@ def extract_track_ids():
         }), 400
 
     try:
-        from mutagen.id3 import ID3, ID3NoHeaderError
-
-        track_ids = []
-        for file_path in file_paths:
-            track_id = None
-            try:
-                if file_path.lower().endswith('.mp3'):
-                    tags = ID3(file_path)
-                    if 'TXXX:TRACKID' in tags:
-                        track_id = tags['TXXX:TRACKID'].text[0]
-            except (ID3NoHeaderError, Exception) as e:
-                print(f"Error reading TrackId from {file_path}: {e}")
-
-            track_ids.append({
-                'file_path': file_path,
-                'track_id': track_id
-            })
+        track_ids = validation_service.extract_track_ids(file_paths)
 
         return jsonify({
             "success": True,
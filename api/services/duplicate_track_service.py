@@ -5,6 +5,8 @@ from typing import List, Dict, Any, Set, Tuple, Optional
 
 import Levenshtein
 
+from helpers.near_duplicate_helper import NearDuplicateBlocker, connected_components
+from helpers.track_catalog_helper import get_track_catalog
 from sql.core.unit_of_work import UnitOfWork
 from sql.models.track import Track
 from utils.logger import setup_logger
@@ -32,20 +34,20 @@ class DuplicateGroup:
 
 
 class DuplicateTrackDetector:
-    """Optimized duplicate track detection using fingerprinting."""
+    """Duplicate track detection using blocking keys and MinHash LSH candidates."""
 
     def __init__(self):
         self.similarity_threshold = 0.95
 
     def find_all_duplicates(self) -> List[DuplicateGroup]:
-        """Find all duplicate tracks using optimized fingerprinting approach."""
+        """Find all duplicate tracks across the library."""
         duplicate_logger.info("Starting duplicate track detection")
 
         try:
-            with UnitOfWork() as uow:
-                all_tracks = uow.track_repository.get_all()
-                duplicate_logger.info(f"Retrieved {len(all_tracks)} tracks from database")
+            all_tracks = get_track_catalog().tracks
+            duplicate_logger.info(f"Retrieved {len(all_tracks)} tracks from the track catalog")
 
+            with UnitOfWork() as uow:
                 # Get playlist mappings in batch
                 track_playlist_map = self._get_track_playlist_mapping_batch(uow)
                 duplicate_logger.info(f"Retrieved playlist mappings for {len(track_playlist_map)} track URIs")
@@ -53,34 +55,36 @@ class DuplicateTrackDetector:
             duplicate_logger.error(f"Error retrieving data from database: {e}")
             raise
 
-        # Use fingerprinting for fast duplicate detection
-        duplicate_groups = self._find_duplicates_with_fingerprinting(all_tracks, track_playlist_map)
+        # Blocking and LSH keep this close to linear in the number of tracks
+        duplicate_groups = self._find_near_duplicates(all_tracks, track_playlist_map)
         duplicate_logger.info(f"Found {len(duplicate_groups)} confirmed duplicate groups")
 
         return duplicate_groups
 
-    def _find_duplicates_with_fingerprinting(self, tracks: List[Track], track_playlist_map: Dict[str, Set[str]]) -> \
+    def _find_near_duplicates(self, tracks: List[Track], track_playlist_map: Dict[str, Set[str]]) -> \
             List[DuplicateGroup]:
-        """Use fingerprinting to quickly identify potential duplicates."""
-        # Create fingerprints for fast grouping
-        fingerprint_groups = defaultdict(list)
-
-        for track in tracks:
-            if not track.title or not track.artists:
-                continue
+        """
+        Find duplicate groups without comparing every pair of tracks.
 
-            fingerprint = self._create_track_fingerprint(track)
-            fingerprint_groups[fingerprint].append(track)
+        Candidate pairs come from blocking keys and MinHash LSH (see near_duplicate_helper);
+        each candidate is confirmed with the same detailed comparison used inside groups.
+        Tracks linked by confirmed pairs are then grouped exactly as before.
+        """
+        candidates = [track for track in tracks if track.title and track.artists]
+        comparison_keys = [self._comparison_key(track) for track in candidates]
+
+        blocker = NearDuplicateBlocker()
+        pairs = blocker.candidate_pairs([(track.title, track.artists, track.duration_ms) for track in candidates])
+        confirmed_pairs = [(i, j) for i, j in pairs if self._keys_match(comparison_keys[i], comparison_keys[j])]
+        duplicate_logger.info(
+            f"Confirmed {len(confirmed_pairs)} of {len(pairs)} candidate pairs across {len(candidates)} tracks"
+        )
 
         duplicate_groups = []
-
-        # Process each fingerprint group
-        for fingerprint, group_tracks in fingerprint_groups.items():
-            if len(group_tracks) < 2:
-                continue
-
-            # Within each fingerprint group, do detailed similarity checking
-            verified_groups = self._verify_duplicates_in_group(group_tracks)
+        for component in connected_components(len(candidates), confirmed_pairs):
+            # Components can chain tracks that aren't duplicates of each other, so they are
+            # split with the same greedy check that was used for fingerprint groups
+            verified_groups = self._verify_duplicates_in_group([candidates[i] for i in component])
 
             for verified_group in verified_groups:
                 if len(verified_group) > 1:
@@ -90,53 +94,12 @@ class DuplicateTrackDetector:
 
         return duplicate_groups
 
-    def _create_track_fingerprint(self, track: Track) -> str:
-        """Create a fingerprint for fast grouping of similar tracks."""
-        # Normalize title and artist for fingerprinting
-        title_normalized = self._normalize_for_fingerprint(track.title)
-        artists_normalized = self._normalize_for_fingerprint(track.artists)
-
-        # Create a hash that groups similar tracks together
-        fingerprint_string = f"{artists_normalized}||{title_normalized}"
-
-        # Use first 8 characters of hash for grouping (balances speed vs accuracy)
-        return hashlib.md5(fingerprint_string.encode()).hexdigest()[:8]
-
-    def _normalize_for_fingerprint(self, text: str) -> str:
-        """Normalize text for fingerprinting (more aggressive than similarity check)."""
-        if not text:
-            return ""
-
-        import re
-
-        # Convert to lowercase
-        normalized = text.lower().strip()
-
-        # Remove common variations that shouldn't affect fingerprinting
-        patterns_to_remove = [
-            r'\s*\(explicit\)',
-            r'\s*\(clean\)',
-            r'\s*\(radio edit\)',
-            r'\s*\(album version\)',
-            r'\s*\(remaster\)',
-            r'\s*\(remastered\)',
-            r'\s*[‌\[\(].*?[‌\]\)]',  # Remove any parenthetical content
-            r'[^\w\s]',  # Remove non-alphanumeric except spaces
-        ]
-
-        for pattern in patterns_to_remove:
-            normalized = re.sub(pattern, '', normalized, flags=re.IGNORECASE)
-
-        # Normalize whitespace and remove extra spaces
-        normalized = re.sub(r'\s+', ' ', normalized).strip()
-
-        return normalized
-
     def _verify_duplicates_in_group(self, tracks: List[Track]) -> List[List[Track]]:
-        """Verify which tracks in a fingerprint group are actual duplicates."""
+        """Verify which tracks in a candidate group are actual duplicates."""
         if len(tracks) < 2:
             return []
 
+        comparison_keys = [self._comparison_key(track) for track in tracks]
         verified_groups = []
         processed = set()
 
@@ -151,7 +114,7 @@ class DuplicateTrackDetector:
                 if j in processed:
                     continue
 
-                if self._are_duplicates_detailed(track1, track2):
+                if self._keys_match(comparison_keys[i], comparison_keys[j]):
                     current_group.append(track2)
                     processed.add(j)
 
@@ -165,19 +128,21 @@ class DuplicateTrackDetector:
         if not all([track1.title, track1.artists, track2.title, track2.artists]):
             return False
 
-        # Normalize for comparison
-        title1 = self._normalize_title_for_comparison(track1.title)
-        title2 = self._normalize_title_for_comparison(track2.title)
-        artists1 = self._normalize_artists_for_comparison(track1.artists)
-        artists2 = self._normalize_artists_for_comparison(track2.artists)
+        return self._keys_match(self._comparison_key(track1), self._comparison_key(track2))
 
-        # Calculate similarities
-        title_similarity = Levenshtein.ratio(title1, title2)
-        artist_similarity = Levenshtein.ratio(artists1, artists2)
+    def _comparison_key(self, track: Track) -> Tuple[str, str]:
+        """Normalized (title, artists) used by the detailed comparison."""
+        return (self._normalize_title_for_comparison(track.title),
+                self._normalize_artists_for_comparison(track.artists))
 
-        # Both title and artist must be very similar
-        return (title_similarity >= self.similarity_threshold and
-                artist_similarity >= self.similarity_threshold)
+    def _keys_match(self, key1: Tuple[str, str], key2: Tuple[str, str]) -> bool:
+        """Both title and artists must be very similar."""
+        title_similarity = Levenshtein.ratio(key1[0], key2[0])
+        if title_similarity < self.similarity_threshold:
+            return False
+
+        artist_similarity = Levenshtein.ratio(key1[1], key2[1])
+        return artist_similarity >= self.similarity_threshold
 
     def _normalize_title_for_comparison(self, title: str) -> str:
         """Normalize title for precise comparison."""
@@ -188,7 +153,7 @@ class DuplicateTrackDetector:
 
         normalized = title.lower().strip()
 
-        # Remove specific patterns but be more conservative than fingerprinting
+        # Remove specific patterns but be more conservative than the blocking keys
         patterns_to_remove = [
             r'\s*\(explicit\)',
             r'\s*\(clean\)',
@@ -789,33 +754,34 @@ def analyze_existing_duplicate_mappings() -> Dict[str, Any]:
     duplicate_logger.info("Analyzing existing file mappings for duplicates")
 
     with UnitOfWork() as uow:
-        # Get duplicate mappings from repository
-        duplicate_mappings = uow.file_track_mapping_repository.find_duplicate_mappings()
+        # Duplicate groups and their track info come back from a single windowed query
+        duplicate_rows = uow.file_track_mapping_repository.get_duplicate_mapping_rows()
 
-        if not duplicate_mappings:
-            return {
-                'success': True,
-                'duplicate_count': 0,
-                'duplicate_groups': [],
-                'message': 'No duplicate file mappings found in database'
-            }
-
-        # Get track info for better display
-        tracks_by_uri = uow.track_repository.get_all_as_dict_by_uri()
+    if not duplicate_rows:
+        return {
+            'success': True,
+            'duplicate_count': 0,
+            'duplicate_groups': [],
+            'message': 'No duplicate file mappings found in database'
+        }
 
-        duplicate_groups = []
-        for uri, file_paths in duplicate_mappings.items():
+    groups_by_uri = {}
+    for row in duplicate_rows:
+        group = groups_by_uri.get(row['Uri'])
+        if group is None:
             track_info = "Unknown track"
-            if uri in tracks_by_uri:
-                track = tracks_by_uri[uri]
-                track_info = f"{track.artists} - {track.title}"
+            if row['TrackTitle'] is not None:
+                track_info = f"{row['Artists']} - {row['TrackTitle']}"
 
-            duplicate_groups.append({
-                'uri': uri,
+            group = groups_by_uri[row['Uri']] = {
+                'uri': row['Uri'],
                 'track_info': track_info,
-                'file_paths': file_paths,
-                'file_count': len(file_paths)
-            })
+                'file_paths': [],
+                'file_count': row['FileCount']
+            }
+        group['file_paths'].append(row['FilePath'])
+
+    duplicate_groups = list(groups_by_uri.values())
 
     duplicate_logger.info(f"Found {len(duplicate_groups)} existing duplicate mappings")
 
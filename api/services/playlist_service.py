@@ -4,7 +4,8 @@ from typing import List, Any, Dict
 
 from helpers.m3u_helper import (
     build_uri_to_file_mapping_from_database,
-    generate_multiple_playlists, sanitize_filename, get_all_tracks_metadata_by_uri, generate_m3u_playlist
+    generate_multiple_playlists, sanitize_filename, get_all_tracks_metadata_by_uri, generate_m3u_playlist,
+    search_tracks_in_m3u_files
 )
 from sql.core.unit_of_work import UnitOfWork
 
@@ -428,3 +429,24 @@ def regenerate_playlist(
             'file_size': os.path.getsize(target_m3u_path) if os.path.exists(target_m3u_path) else 0
         }
     }
+
+
+def find_playlists_containing_files(playlists_dir: str, file_paths: List[str]) -> Dict[str, Any]:
+    """
+    Find which M3U playlists contain each of the given track files.
+    Answered from the shared M3U index, which only re-reads M3U files that changed.
+
+    Args:
+        playlists_dir: Directory containing M3U playlists
+        file_paths: List of track file paths
+
+    Returns:
+        Dictionary with the playlists (relative M3U paths) for each file path
+    """
+    results = search_tracks_in_m3u_files(playlists_dir, file_paths)
+
+    return {
+        'results': results,
+        'total_files': len(file_paths),
+        'files_in_playlists': sum(1 for playlists in results.values() if playlists)
+    }
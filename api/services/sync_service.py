@@ -6,7 +6,9 @@ from dotenv import load_dotenv
 
 from api.models.sync_responses import SyncResponse, SyncStats, SyncDetails, create_execution_response, \
     format_playlist_item, PlaylistSyncDetails, create_analysis_response, format_track_item, TrackSyncDetails, \
-    format_association_item, AssociationSyncDetails, normalize_precomputed_changes
+    format_association_item, AssociationSyncDetails, normalize_precomputed_changes, \
+    create_flattened_precomputed_changes
+from api.utils.analysis_sessions import get_database_version, start_analysis_session, resume_analysis_session
 from drivers.spotify_client import (
     authenticate_spotify, sync_to_master_playlist, sync_unplaylisted_to_unsorted, fetch_playlists
 )
@@ -175,7 +177,8 @@ def orchestrate_db_sync(
         is_confirmed: bool,
         precomputed_changes: Optional[Dict[str, Any]] = None,
         exclusion_config: Optional[Dict[str, Any]] = None,
-        stage: str = 'start'
+        stage: str = 'start',
+        session_token: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Handle database sync operations with consistent response structure.
@@ -188,10 +191,17 @@ def orchestrate_db_sync(
         precomputed_changes: Optional dictionary with precomputed changes
         exclusion_config: Optional dictionary with exclusion configs
         stage: Stage in the sync process for 'all' operations
+        session_token: Token of the analysis being confirmed; replaces precomputed_changes
 
     Returns:
         Dictionary with standardized sync results (SyncResponse.to_dict())
+
+    Raises:
+        AnalysisSessionExpired: If the session token can no longer be used
     """
+    if is_confirmed and session_token:
+        precomputed_changes = resume_analysis_session(session_token, stage if action == 'all' else action)
+
     if action == 'clear':
         from sql.helpers.db_helper import clear_db
         clear_db()
@@ -222,9 +232,18 @@ def orchestrate_db_sync(
         raise ValueError(f"Invalid action: {action}")
 
 
+def with_analysis_session(response: SyncResponse, database_version) -> Dict[str, Any]:
+    """Keep an analysis's changes server-side and return the response carrying its session token."""
+    response.session_token = start_analysis_session(
+        response.details.operation_type, create_flattened_precomputed_changes(response), database_version
+    )
+    return response.to_dict()
+
+
 def handle_playlists_sync(force_refresh, is_confirmed, precomputed_changes, exclusion_config):
     """Handle playlist sync operations."""
     if not is_confirmed:
+        database_version = get_database_version()
         added_count, updated_count, unchanged_count, deleted_count, changes_details = analyze_playlists_changes(
             force_full_refresh=force_refresh, exclusion_config=exclusion_config
         )
@@ -249,7 +268,7 @@ def handle_playlists_sync(force_refresh, is_confirmed, precomputed_changes, excl
             total_items_to_delete=deleted_count
         )
 
-        return create_analysis_response("playlists", stats, details).to_dict()
+        return with_analysis_session(create_analysis_response("playlists", stats, details), database_version)
 
     else:
         normalized_changes = normalize_precomputed_changes(precomputed_changes)
@@ -274,6 +293,7 @@ def handle_playlists_sync(force_refresh, is_confirmed, precomputed_changes, excl
 def handle_tracks_sync(master_playlist_id, force_refresh, is_confirmed, precomputed_changes):
     """Handle track sync operations."""
     if not is_confirmed:
+        database_version = get_database_version()
         tracks_to_add, tracks_to_update, unchanged_tracks, tracks_to_delete = analyze_tracks_changes(
             master_playlist_id
         )
@@ -298,7 +318,7 @@ def handle_tracks_sync(master_playlist_id, force_refresh, is_confirmed, precompu
             total_items_to_delete=len(tracks_to_delete)
         )
 
-        return create_analysis_response("tracks", stats, details).to_dict()
+        return with_analysis_session(create_analysis_response("tracks", stats, details), database_version)
 
     else:
         normalized_changes = normalize_precomputed_changes(precomputed_changes)
@@ -323,11 +343,16 @@ def handle_tracks_sync(master_playlist_id, force_refresh, is_confirmed, precompu
 def handle_associations_sync(master_playlist_id, force_refresh, is_confirmed, precomputed_changes, exclusion_config):
     """Handle association sync operations."""
     if not is_confirmed:
+        database_version = get_database_version()
         associations_changes = analyze_track_playlist_associations(
             master_playlist_id,
             force_full_refresh=force_refresh,
             exclusion_config=exclusion_config
         )
+        if not associations_changes['tracks_with_changes']:
+            # With nothing to change, the analysis itself marks the changed playlists as
+            # processed; that write must not invalidate its own session
+            database_version = get_database_version()
 
         formatted_changes = [format_association_item(item) for item in associations_changes['tracks_with_changes']]
 
@@ -354,7 +379,8 @@ def handle_associations_sync(master_playlist_id, force_refresh, is_confirmed, pr
 
         message = f"Analysis complete: {associations_changes['associations_to_add']} associations to add, {associations_changes['associations_to_remove']} to remove, affecting {len(associations_changes['tracks_with_changes'])} tracks"
 
-        return create_analysis_response("associations", stats, details, message).to_dict()
+        return with_analysis_session(create_analysis_response("associations", stats, details, message),
+                                     database_version)
 
     else:
         normalized_changes = normalize_precomputed_changes(precomputed_changes)
@@ -1,5 +1,7 @@
 import os
+import shutil
 import subprocess
+import tempfile
 import time
 from datetime import datetime
 from typing import List, Dict, Any, Optional
@@ -7,8 +9,12 @@ from typing import List, Dict, Any, Optional
 from api.constants.file_extensions import SUPPORTED_AUDIO_EXTENSIONS
 from api.services.duplicate_track_service import detect_duplicate_file_mappings, resolve_duplicate_mappings, \
     analyze_existing_duplicate_mappings
+from helpers.file_existence_helper import batch_check_file_existence
 from helpers.fuzzy_match_helper import search_tracks, find_fuzzy_matches, FuzzyMatcher, \
     print_levenshtein_stats, reset_levenshtein_stats
+from helpers.library_index_helper import LibraryIndex
+from helpers.spotdl_helper import SPOTDL_BATCH_SIZE, download_batch, download_file_stem
+from helpers.track_catalog_helper import get_track_catalog
 from sql.core.unit_of_work import UnitOfWork
 from utils.logger import setup_logger
 
@@ -26,16 +32,15 @@ def search_tracks_file_system(master_tracks_dir, query):
     query = query.lower()
 
     # Get all file mappings and tracks from database for quick lookup
-    with UnitOfWork() as uow:
-        all_mappings = uow.file_track_mapping_repository.get_all()
-        all_tracks = uow.track_repository.get_all()
-        tracks_by_uri = uow.track_repository.get_all_as_dict_by_uri()
+    catalog = get_track_catalog()
+    all_tracks = catalog.tracks
+    tracks_by_uri = catalog.tracks_by_uri
 
     # Create lookup dictionary: file_path -> mapping
     mapping_by_path = {}
     existing_mappings = {}
-    for mapping in all_mappings:
-        if mapping.is_active:
+    with UnitOfWork() as uow:
+        for mapping in uow.file_track_mapping_repository.iter_all("IsActive = 1"):
             normalized_path = os.path.normpath(mapping.file_path)
             mapping_by_path[normalized_path] = mapping
             existing_mappings[normalized_path] = mapping.uri
@@ -123,12 +128,11 @@ def search_tracks_file_system(master_tracks_dir, query):
 def search_tracks_db_for_matching(query: str, limit: int = 20) -> List[Dict]:
     """Advanced search specifically for file-track matching with fuzzy matching and ranking."""
     with UnitOfWork() as uow:
-        all_tracks = uow.track_repository.get_all()
         # Get existing mappings for search awareness
-        all_mappings = uow.file_track_mapping_repository.get_all()
-        existing_mappings = {mapping.file_path: mapping.uri for mapping in all_mappings if mapping.is_active}
+        active_mappings = uow.file_track_mapping_repository.get_projection(("FilePath", "Uri"), "IsActive = 1")
+        existing_mappings = {mapping.FilePath: mapping.Uri for mapping in active_mappings}
 
-    return search_tracks(query, all_tracks, limit, existing_mappings)
+    return search_tracks(query, get_track_catalog().tracks, limit, existing_mappings)
 
 
 def fuzzy_match_track(file_name, current_track_id=None):
@@ -138,10 +142,9 @@ def fuzzy_match_track(file_name, current_track_id=None):
     # Load tracks from database for matching
     with UnitOfWork() as uow:
         try:
-            tracks_db = uow.track_repository.get_all()
             # Get existing mappings to avoid conflicts
-            all_mappings = uow.file_track_mapping_repository.get_all()
-            existing_mappings = {mapping.file_path: mapping.uri for mapping in all_mappings if mapping.is_active}
+            active_mappings = uow.file_track_mapping_repository.get_projection(("FilePath", "Uri"), "IsActive = 1")
+            existing_mappings = {mapping.FilePath: mapping.Uri for mapping in active_mappings}
         except Exception as e:
             print(f"Database error: {e}")
             raise ValueError(f"Database error: {str(e)}")
@@ -149,7 +152,7 @@ def fuzzy_match_track(file_name, current_track_id=None):
     # Use fuzzy matching
     matches = find_fuzzy_matches(
         file_name=file_name,
-        tracks=tracks_db,
+        tracks=get_track_catalog().tracks,
         threshold=0.45,  # Lower threshold for showing more options
         max_matches=8,
         exclude_track_id=current_track_id,
@@ -206,18 +209,17 @@ def analyze_file_mappings_with_duplicate_detection(master_tracks_dir: str,
         })
 
     with UnitOfWork() as uow:
-        all_mappings = uow.file_track_mapping_repository.get_all()
+        active_mappings = uow.file_track_mapping_repository.get_projection(("FilePath", "Uri"), "IsActive = 1")
         existing_mappings = []
-        for mapping in all_mappings:
-            if mapping.is_active:
-                existing_mappings.append({
-                    'file_path': mapping.file_path,
-                    'uri': mapping.uri,
-                    'confidence': 1.0,  # Existing mappings are 100% confident
-                    'file_name': os.path.basename(mapping.file_path),
-                    'source': 'existing_database',
-                    'track_info': f"Existing mapping: {mapping.uri}"
-                })
+        for mapping in active_mappings:
+            existing_mappings.append({
+                'file_path': mapping.FilePath,
+                'uri': mapping.Uri,
+                'confidence': 1.0,  # Existing mappings are 100% confident
+                'file_name': os.path.basename(mapping.FilePath),
+                'source': 'existing_database',
+                'track_info': f"Existing mapping: {mapping.Uri}"
+            })
 
     # Detect duplicates
     all_mappings_to_check = proposed_mappings + existing_mappings
@@ -314,13 +316,16 @@ def create_file_mappings_with_duplicate_resolution(master_tracks_dir: str,
                 'source': 'auto_match'
             })
 
-    # Add user selections
+    # Add user selections; the library is indexed once, on the first selection without a path
+    library_index = None
     for selection in user_selections:
         file_path = selection.get('file_path')
         if not file_path:
             file_name = selection.get('file_name', selection.get('file_name', ''))
             if file_name:
-                file_path = _find_file_path_in_directory(file_name, master_tracks_dir)
+                if library_index is None:
+                    library_index = LibraryIndex(master_tracks_dir)
+                file_path = _find_file_path_in_directory(file_name, master_tracks_dir, library_index)
 
         if file_path and selection.get('uri'):
             proposed_mappings.append({
@@ -394,12 +399,12 @@ def analyze_file_mappings(master_tracks_dir: str, confidence_threshold: float =
 
     # Get all tracks and existing mappings from database
     db_start = time.time()
+    all_tracks = get_track_catalog().tracks
     with UnitOfWork() as uow:
-        all_tracks = uow.track_repository.get_all()
-        all_mappings = uow.file_track_mapping_repository.get_all()
+        active_mappings = uow.file_track_mapping_repository.get_projection(("FilePath", "Uri"), "IsActive = 1")
         existing_mappings = {
-            os.path.normpath(os.path.abspath(mapping.file_path)): mapping.uri
-            for mapping in all_mappings if mapping.is_active
+            os.path.normpath(os.path.abspath(mapping.FilePath)): mapping.Uri
+            for mapping in active_mappings
         }
     db_time = time.time() - db_start
 
@@ -681,14 +686,17 @@ def create_file_mappings_batch(master_tracks_dir: str, user_selections: List[Dic
             'source': 'auto_match'
         })
 
-    # Add user selections
+    # Add user selections; the library is indexed once, on the first selection without a path
+    library_index = None
     for selection in user_selections:
         file_path = selection.get('file_path')
         if not file_path:
             # Try to construct file path from filename if not provided
             file_name = selection.get('file_name', selection.get('file_name', ''))
             if file_name:
-                file_path = _find_file_path_in_directory(file_name, master_tracks_dir)
+                if library_index is None:
+                    library_index = LibraryIndex(master_tracks_dir)
+                file_path = _find_file_path_in_directory(file_name, master_tracks_dir, library_index)
 
         if file_path and selection.get('uri'):
             all_mappings.append({
@@ -711,10 +719,11 @@ def create_file_mappings_batch(master_tracks_dir: str, user_selections: List[Dic
 
     # OPTIMIZATION 1: Batch file existence checks
     file_check_start = time.time()
+    existing_paths = batch_check_file_existence(mapping['file_path'] for mapping in all_mappings)
     valid_mappings = []
     for mapping in all_mappings:
         file_path = mapping['file_path']
-        if os.path.exists(file_path):
+        if file_path in existing_paths:
             # Normalize path for consistency
             mapping['file_path'] = os.path.normpath(file_path)
             valid_mappings.append(mapping)
@@ -871,8 +880,17 @@ def _is_supported_audio_file(file_name: str) -> bool:
     return os.path.splitext(file_name)[1].lower() in SUPPORTED_AUDIO_EXTENSIONS
 
 
-def _find_file_path_in_directory(file_name: str, directory: str) -> str | None:
-    """Find the full path of a file in the directory tree."""
+def _find_file_path_in_directory(file_name: str, directory: str,
+                                 library_index: LibraryIndex | None = None) -> str | None:
+    """
+    Find the full path of a file in the directory tree.
+
+    Pass a LibraryIndex of the directory when looking up several files; audio files are
+    then found without walking the tree again.
+    """
+    if library_index is not None and _is_supported_audio_file(file_name):
+        return library_index.find_by_name(file_name)
+
     for root, _, files in os.walk(directory):
         if file_name in files:
             return os.path.join(root, file_name)
@@ -894,11 +912,9 @@ def direct_tracks_compare(master_tracks_dir):
     """Directly compare Spotify tracks with local tracks from the database using FileTrackMapping."""
     # 1. Get all tracks from the master playlist in the database
     with UnitOfWork() as uow:
-        master_tracks = uow.track_repository.get_all()
-
-        # Convert to a list of dicts for JSON serialization
+        # Convert to a list of dicts for JSON serialization, streaming the tracks
         master_tracks_list = []
-        for track in master_tracks:
+        for track in uow.track_repository.iter_all():
             master_tracks_list.append({
                 'uri': track.uri,
                 'id': track.track_id,
@@ -908,19 +924,17 @@ def direct_tracks_compare(master_tracks_dir):
                 'added_at': track.added_to_master if track.added_to_master else None
             })
 
-        # 2. Get all file mappings from the database
-        all_mappings = uow.file_track_mapping_repository.get_all()
+        # 2. Get the active file mappings from the database
+        active_mappings = list(uow.file_track_mapping_repository.iter_all("IsActive = 1"))
 
         # Create sets for quick lookup
         mapped_uris = set()
         local_tracks_info = []
+        existing_paths = batch_check_file_existence(m.file_path for m in active_mappings)
 
-        for mapping in all_mappings:
-            if not mapping.is_active:
-                continue
-
+        for mapping in active_mappings:
             # Verify the file still exists
-            if not os.path.exists(mapping.file_path):
+            if mapping.file_path not in existing_paths:
                 continue
 
             mapped_uris.add(mapping.uri)
@@ -975,181 +989,143 @@ def download_and_map_track(uri: str, download_dir: str):
         if not track:
             raise ValueError(f"Track URI '{uri}' not found in database")
 
-    # Extract track ID for Spotify URL construction
-    if uri.startswith('spotify:track:'):
-        track_id = uri.split(':')[2]
-    elif uri.startswith('spotify:local:'):
+    if uri.startswith('spotify:local:'):
         raise ValueError(f"Cannot download local file URI: {uri}")
-    else:
+    elif not uri.startswith('spotify:track:'):
         raise ValueError(f"Invalid Spotify URI format: {uri}")
 
-    # Construct Spotify URL
-    spotify_url = f"https://open.spotify.com/track/{track_id}"
-
-    # Get list of existing files BEFORE download
-    existing_files = set()
-    try:
-        for file in os.listdir(download_dir):
-            if file.endswith('.mp3'):
-                existing_files.add(file)
-    except Exception as e:
-        print(f"Warning: Could not list existing files: {e}")
-        existing_files = set()
-
-    try:
-        # Run spotDL command
-        cmd = ["spotdl", spotify_url, "--output", download_dir]
-        print(f"Attempting to download: {track.artists} - {track.title}")
-
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=300,  # 5 minute timeout
-            encoding='utf-8',
-            errors='replace'
-        )
-
-        print(f"spotDL exit code: {result.returncode}")
-        print(f"spotDL stdout: {result.stdout}")
-        if result.stderr:
-            print(f"spotDL stderr: {result.stderr}")
-
-        if result.returncode == 0:
-            # Find NEW files that were created after the download
-            new_files = []
-            try:
-                current_files = set()
-                for file in os.listdir(download_dir):
-                    if file.endswith('.mp3'):
-                        current_files.add(file)
-
-                newly_created_files = current_files - existing_files
-
-                if newly_created_files:
-                    print(f"Found {len(newly_created_files)} new files: {newly_created_files}")
-
-                    # Get the newest of the new files
-                    newest_time = 0
-                    newest_file = None
-
-                    for file in newly_created_files:
-                        file_path = os.path.join(download_dir, file)
-                        try:
-                            creation_time = os.path.getctime(file_path)
-                            if creation_time > newest_time:
-                                newest_time = creation_time
-                                newest_file = file_path
-                        except Exception as e:
-                            print(f"Error checking file time for {file}: {e}")
-
-                    if newest_file:
-                        new_files.append(newest_file)
-
-            except Exception as e:
-                print(f"Error finding new files: {e}")
-
-            # If we found new files, create the file mapping
-            if new_files:
-                downloaded_file = new_files[0]
-                print(f"Using newly downloaded file: {downloaded_file}")
-
-                # Create FileTrackMapping entry instead of embedding metadata
-                with UnitOfWork() as uow:
-                    try:
-                        uow.file_track_mapping_repository.add_mapping_by_uri(downloaded_file, uri)
-                        mapping_success = True
-                        print(f"Created file mapping: {downloaded_file} -> {uri}")
-                    except Exception as e:
-                        mapping_success = False
-                        print(f"Failed to create file mapping: {e}")
-
-                return {
-                    "downloaded_file": downloaded_file,
-                    "track_info": f"{track.artists} - {track.title}",
-                    "mapping_created": mapping_success,
-                    "uri": uri,
-                    "spotdl_output": result.stdout[:500] if result.stdout else ""
-                }
-            else:
-                # No new files found - download likely failed
-                raise RuntimeError(
-                    f"No download occurred for: {track.artists} - {track.title}. Track may not be available on YouTube.")
-        else:
-            # spotDL command failed
-            error_output = result.stderr or result.stdout or "Unknown error"
-            raise RuntimeError(f"spotDL failed for '{track.artists} - {track.title}': {error_output[:500]}")
-
-    except subprocess.TimeoutExpired:
-        raise RuntimeError(f"Download timed out after 5 minutes for: {track.artists} - {track.title}")
-    except UnicodeDecodeError as e:
-        raise RuntimeError(f"Encoding error during download of '{track.artists} - {track.title}': {str(e)}")
-    except Exception as e:
-        raise RuntimeError(f"Download failed for '{track.artists} - {track.title}': {str(e)}")
+    result = download_all_missing_tracks([uri], download_dir)
+    if result['failed_downloads']:
+        raise RuntimeError(result['failed_downloads'][0]['error'])
+    return result['successful_downloads'][0]['result']
 
 
 def download_all_missing_tracks(uris: List[str], download_dir: str, progress_callback=None):
-    """Download multiple tracks by URI with progress tracking."""
+    """
+    Download multiple tracks by URI with spotDL and create their FileTrackMapping entries.
+
+    Tracks are downloaded in batches of SPOTDL_BATCH_SIZE URLs per spotDL run. Each run
+    writes to a staging directory under download_dir with files named after the track id;
+    the files are then moved to "<artists> - <title>.mp3" in download_dir, and the
+    mappings of every downloaded track are inserted together.
+    """
     total_tracks = len(uris)
     successful_downloads = []
     failed_downloads = []
+    processed = 0
 
-    for i, uri in enumerate(uris):
-        try:
-            # Get track info for better progress display
-            with UnitOfWork() as uow:
-                track = uow.track_repository.get_by_uri(uri)
-                track_name = f"{track.artists} - {track.title}" if track else f"URI {uri}"
-
-            # Call progress callback if provided
-            if progress_callback:
-                progress_callback({
-                    'current': i,
-                    'total': total_tracks,
-                    'uri': uri,
-                    'track_name': track_name,
-                    'status': 'downloading'
-                })
-
-            print(f"Downloading {i + 1}/{total_tracks}: {track_name}")
-            result = download_and_map_track(uri, download_dir)
-
-            successful_downloads.append({
+    def report(uri, track_name, status, error=None):
+        if progress_callback:
+            update = {
+                'current': processed,
+                'total': total_tracks,
                 'uri': uri,
                 'track_name': track_name,
-                'result': result
-            })
+                'status': status
+            }
+            if error:
+                update['error'] = error
+            progress_callback(update)
 
-            if progress_callback:
-                progress_callback({
-                    'current': i + 1,
-                    'total': total_tracks,
-                    'uri': uri,
-                    'track_name': track_name,
-                    'status': 'completed'
-                })
+    def fail(uri, track_name, error_msg):
+        nonlocal processed
+        processed += 1
+        failed_downloads.append({'uri': uri, 'track_name': track_name, 'error': error_msg})
+        report(uri, track_name, 'failed', error_msg)
+        print(f"✗ Failed to download {track_name}: {error_msg}")
 
-            print(f"✓ Successfully downloaded: {track_name}")
+    with UnitOfWork() as uow:
+        tracks_by_uri = {track.uri: track for track in uow.track_repository.batch_get_tracks_by_uris(list(set(uris)))}
 
-        except Exception as e:
-            error_msg = str(e)
-            failed_downloads.append({
-                'uri': uri,
-                'track_name': track_name if 'track_name' in locals() else f"URI {uri}",
-                'error': error_msg
-            })
+    # Work out where every track will end up before downloading anything
+    queued = []
+    claimed_paths = set()
+    for uri in uris:
+        track = tracks_by_uri.get(uri)
+        if not track:
+            fail(uri, f"URI {uri}", f"Track URI '{uri}' not found in database")
+            continue
+        track_name = f"{track.artists} - {track.title}"
+        if uri.startswith('spotify:local:'):
+            fail(uri, track_name, f"Cannot download local file URI: {uri}")
+            continue
+        if not uri.startswith('spotify:track:'):
+            fail(uri, track_name, f"Invalid Spotify URI format: {uri}")
+            continue
+
+        target_path = os.path.join(download_dir, f"{download_file_stem(track.artists, track.title)}.mp3")
+        if os.path.normcase(target_path) in claimed_paths or os.path.exists(target_path):
+            fail(uri, track_name, f"File already exists for: {track_name} ({target_path})")
+            continue
+        claimed_paths.add(os.path.normcase(target_path))
+        queued.append((uri, uri.split(':')[2], track_name, target_path))
+
+    mappings = []
+    for batch_start in range(0, len(queued), SPOTDL_BATCH_SIZE):
+        batch = queued[batch_start:batch_start + SPOTDL_BATCH_SIZE]
+        for uri, _, track_name, _ in batch:
+            report(uri, track_name, 'downloading')
+        print(f"Downloading tracks {processed + 1}-{processed + len(batch)} of {total_tracks} with spotDL")
+
+        staging_dir = tempfile.mkdtemp(prefix='.spotdl-', dir=download_dir)
+        try:
+            try:
+                spotdl_result = download_batch([track_id for _, track_id, _, _ in batch], staging_dir)
+            except subprocess.TimeoutExpired:
+                for uri, _, track_name, _ in batch:
+                    fail(uri, track_name, f"Download timed out for: {track_name}")
+                continue
+            except Exception as e:
+                for uri, _, track_name, _ in batch:
+                    fail(uri, track_name, f"Download failed for '{track_name}': {str(e)}")
+                continue
+
+            for uri, track_id, track_name, target_path in batch:
+                staged_file = spotdl_result.files.get(track_id)
+                if not staged_file:
+                    if spotdl_result.returncode != 0:
+                        error_output = spotdl_result.stderr or spotdl_result.stdout or "Unknown error"
+                        fail(uri, track_name, f"spotDL failed for '{track_name}': {error_output[:500]}")
+                    else:
+                        fail(uri, track_name, f"No download occurred for: {track_name}. "
+                                              f"Track may not be available on YouTube.")
+                    continue
 
-            if progress_callback:
-                progress_callback({
-                    'current': i + 1,
-                    'total': total_tracks,
+                downloaded_file = os.path.splitext(target_path)[0] + os.path.splitext(staged_file)[1]
+                try:
+                    os.replace(staged_file, downloaded_file)
+                except OSError as e:
+                    fail(uri, track_name, f"Could not move download of '{track_name}': {str(e)}")
+                    continue
+
+                mappings.append({'file_path': downloaded_file, 'uri': uri})
+                successful_downloads.append({
                     'uri': uri,
-                    'track_name': track_name if 'track_name' in locals() else f"URI {uri}",
-                    'status': 'failed',
-                    'error': error_msg
+                    'track_name': track_name,
+                    'result': {
+                        "downloaded_file": downloaded_file,
+                        "track_info": track_name,
+                        "mapping_created": False,
+                        "uri": uri,
+                        "spotdl_output": spotdl_result.stdout[:500]
+                    }
                 })
-
-            print(f"✗ Failed to download {track_name if 'track_name' in locals() else uri}: {error_msg}")
+                processed += 1
+                report(uri, track_name, 'completed')
+                print(f"✓ Successfully downloaded: {track_name}")
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    # Create all FileTrackMapping entries in one insert
+    if mappings:
+        try:
+            with UnitOfWork() as uow:
+                created = uow.file_track_mapping_repository.batch_add_mappings_by_uri(mappings)
+            mapping_logger.info(f"Created {created} file mappings for downloaded tracks")
+            for download in successful_downloads:
+                download['result']['mapping_created'] = created == len(mappings)
+        except Exception as e:
+            mapping_logger.error(f"Failed to create file mappings for downloaded tracks: {e}")
 
     return {
         'total_tracks': total_tracks,
@@ -3,18 +3,21 @@ import os
 import re
 import shutil
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List
 
 import Levenshtein
 from mutagen.mp3 import MP3
 
 from api.constants.file_extensions import SUPPORTED_AUDIO_EXTENSIONS
+from helpers.file_existence_helper import batch_check_file_existence
 from helpers.m3u_helper import (
     sanitize_filename,
     generate_m3u_playlist, build_uri_to_file_mapping_from_database, get_m3u_track_uris_from_file,
     get_playlists_track_uris_batch, get_all_tracks_metadata_by_uri
 )
-from helpers.validation_helper import validate_master_tracks
+from helpers.m3u_index_helper import get_m3u_index
+from helpers.track_catalog_helper import get_track_catalog
+from helpers.validation_helper import read_track_id_tags, validate_master_tracks
 from sql.core.unit_of_work import UnitOfWork
 
 
@@ -30,18 +33,17 @@ def validate_file_mappings(master_tracks_dir):
     files_missing_mapping = []
 
     # Get all tracks and mappings from database
+    db_tracks_by_uri = get_track_catalog().tracks_by_uri
     with UnitOfWork() as uow:
-        db_tracks = uow.track_repository.get_all()
-        all_mappings = uow.file_track_mapping_repository.get_all()
-
-        # Create lookup dictionaries
-        db_tracks_by_uri = {track.uri: track for track in db_tracks}
-        mapping_by_path = {mapping.file_path: mapping for mapping in all_mappings if mapping.is_active}
+        # Create lookup dictionaries, streaming active mappings instead of loading the table
+        mapping_by_path = {}
         mappings_by_uri = {}
 
-        # Group mappings by URI to detect duplicates
-        for mapping in all_mappings:
-            if mapping.is_active and mapping.uri:
+        for mapping in uow.file_track_mapping_repository.iter_all("IsActive = 1"):
+            mapping_by_path[mapping.file_path] = mapping
+
+            # Group mappings by URI to detect duplicates
+            if mapping.uri:
                 if mapping.uri not in mappings_by_uri:
                     mappings_by_uri[mapping.uri] = []
                 mappings_by_uri[mapping.uri].append(mapping)
@@ -123,11 +125,14 @@ def validate_file_mappings(master_tracks_dir):
                 })
 
     # Find duplicate mappings (multiple files mapped to same URI)
+    existing_paths = batch_check_file_existence(
+        m.file_path for mappings_list in mappings_by_uri.values() if len(mappings_list) > 1 for m in mappings_list
+    )
     real_duplicates = {}
     for uri, mappings_list in mappings_by_uri.items():
         if len(mappings_list) > 1:
             # Filter out inactive mappings and non-existent files
-            active_mappings = [m for m in mappings_list if m.is_active and os.path.exists(m.file_path)]
+            active_mappings = [m for m in mappings_list if m.is_active and m.file_path in existing_paths]
 
             if len(active_mappings) > 1:
                 # Get track title from database
@@ -159,7 +164,7 @@ def validate_file_mappings(master_tracks_dir):
                         'duration': duration,
                         'duration_formatted': duration_formatted,
                         'file_size': mapping.file_size or (
-                            os.path.getsize(mapping.file_path) if os.path.exists(mapping.file_path) else 0),
+                            os.path.getsize(mapping.file_path) if mapping.file_path in existing_paths else 0),
                         'last_modified': mapping.last_modified if mapping.last_modified else "Unknown"
                     })
 
@@ -197,6 +202,8 @@ def validate_playlists_m3u(playlists_dir: str, master_playlist_id: str = None):
         Dictionary with summary and detailed playlist analysis
     """
     uri_to_file_map = build_uri_to_file_mapping_from_database()
+    file_to_uri_map = {os.path.normpath(file_path): uri for uri, file_path in uri_to_file_map.items()}
+    existing_files = batch_check_file_existence(uri_to_file_map.values())
 
     # Get all playlists from database
     with UnitOfWork() as uow:
@@ -207,14 +214,11 @@ def validate_playlists_m3u(playlists_dir: str, master_playlist_id: str = None):
         # Get all tracks metadata once for efficient lookup (NEW - for frontend display)
         all_tracks_by_uri = uow.track_repository.get_all_tracks_as_uri_dict()
 
-    # Find all M3U files in all subdirectories (SAME AS ORIGINAL)
-    m3u_files = {}  # Dict of {sanitized_name: m3u_path}
-
-    for root, dirs, files in os.walk(playlists_dir):
-        for file in files:
-            if file.lower().endswith('.m3u'):
-                sanitized_name = os.path.splitext(file)[0]
-                m3u_files[sanitized_name] = os.path.join(root, file)
+    # Find all M3U files in all subdirectories
+    m3u_files = {  # Dict of {sanitized_name: m3u_path}
+        name: playlist_file.m3u_path
+        for name, playlist_file in get_m3u_index(playlists_dir).get_playlists_by_name().items()
+    }
 
     # Analyze each playlist's integrity
     playlist_analysis = []
@@ -243,9 +247,9 @@ def validate_playlists_m3u(playlists_dir: str, master_playlist_id: str = None):
 
         for uri in all_track_uris_in_playlist_db:
             if uri in uri_to_file_map:
-                # Check if the file actually exists
+                # Check if the file actually exists (listings are cached per directory)
                 file_path = uri_to_file_map[uri]
-                if os.path.exists(file_path):
+                if file_path in existing_files:
                     local_track_files.add(uri)
                 else:
                     # File mapping exists but file is missing (ENHANCED - add metadata)
@@ -273,7 +277,7 @@ def validate_playlists_m3u(playlists_dir: str, master_playlist_id: str = None):
         # Process M3U file if it exists (SAME AS ORIGINAL)
         m3u_track_uris = set()
         if playlist_has_m3u_file:
-            m3u_track_uris = get_m3u_track_uris_from_file(m3u_path, uri_to_file_map)
+            m3u_track_uris = get_m3u_track_uris_from_file(m3u_path, uri_to_file_map, file_to_uri_map)
             print(f"M3U file '{safe_name}.m3u': {len(m3u_track_uris)} tracks found")
 
         # Debug print to see the comparison
@@ -378,10 +382,51 @@ def validate_tracks(master_tracks_dir):
     return result
 
 
-def validate_short_tracks(master_tracks_dir, min_length_minutes=5):
+def extract_file_mappings(file_paths: List[str]) -> List[Dict[str, Any]]:
+    """
+    Look up the mapped Spotify URI of many files at once.
+
+    Args:
+        file_paths: File paths, possibly with repeats
+
+    Returns:
+        One {'file_path', 'uri'} dict per requested path, in request order (uri is None
+        for unmapped files)
+    """
+    with UnitOfWork() as uow:
+        uris_by_path = uow.file_track_mapping_repository.get_uri_mappings_batch(file_paths)
+
+    return [{'file_path': file_path, 'uri': uris_by_path.get(os.path.normpath(file_path))}
+            for file_path in file_paths]
+
+
+def extract_track_ids(file_paths: List[str]) -> List[Dict[str, Any]]:
+    """
+    Read the embedded TrackId of many files at once.
+
+    Distinct MP3 files are read concurrently through the TrackId cache, so files already
+    read (and unchanged since) cost no tag parsing; other formats have no TrackId.
+
+    Args:
+        file_paths: File paths, possibly with repeats
+
+    Returns:
+        One {'file_path', 'track_id'} dict per requested path, in request order
+    """
+    track_ids = read_track_id_tags([file_path for file_path in file_paths if file_path.lower().endswith('.mp3')])
+
+    return [{'file_path': file_path, 'track_id': track_ids.get(file_path)} for file_path in file_paths]
+
+
+def validate_short_tracks(master_tracks_dir, min_length_minutes=5, limit=100):
     """
     Validate tracks that are shorter than the minimum length.
     Note: This only scans local files - no external API calls are made.
+
+    Args:
+        master_tracks_dir: Directory to scan
+        min_length_minutes: Tracks shorter than this are reported
+        limit: Maximum number of short tracks returned (None for all)
     """
     import time
     start_time = time.time()
@@ -480,7 +525,7 @@ def validate_short_tracks(master_tracks_dir, min_length_minutes=5):
             "min_length_minutes": min_length_minutes,
             "processing_time_seconds": elapsed_time
         },
-        "short_tracks": short_tracks[:100]  # Limit initial response to first 100 for performance
+        "short_tracks": short_tracks[:limit]  # At most `limit` tracks; None returns them all
     }
 
 
@@ -489,62 +534,138 @@ def search_extended_versions_for_track(artist, title, current_duration):
     Search for extended versions of a specific track using Discogs.
     """
     try:
-        import os
-        api_token = os.getenv('DISCOGS_API_TOKEN')
-
         from helpers.discogs_helper import DiscogsClient
 
-        client = DiscogsClient(api_token=api_token)
+        client = DiscogsClient(api_token=os.getenv('DISCOGS_API_TOKEN'))
         all_versions = client.search_releases(artist, title)
 
-        # Determine search status
-        track_found_on_discogs = len(all_versions) > 0
+        return _summarize_extended_versions(all_versions, current_duration)
+    except Exception as e:
+        return _extended_versions_error(e)
 
-        # Filter for versions longer than current
-        extended_versions = []
-        for version in all_versions:
-            if version['duration_seconds'] > current_duration + 30:  # At least 30 seconds longer
-                extended_versions.append(version)
 
-        # Sort by duration (longest first)
-        extended_versions.sort(key=lambda x: x['duration_seconds'], reverse=True)
+def search_extended_versions_bulk(short_tracks: List[Dict[str, Any]],
+                                  max_workers: int = None) -> Iterator[Dict[str, Any]]:
+    """
+    Search Discogs for extended versions of many short tracks at once.
 
-        has_longer_versions = len(extended_versions) > 0
+    Searches run concurrently under the shared Discogs rate limit, and releases found
+    for several tracks are fetched only once.
 
-        # Determine status message
-        if not track_found_on_discogs:
-            status_message = "Track not found on Discogs"
-            status_type = "not_found"
-        elif has_longer_versions:
-            status_message = f"Found {len(extended_versions)} extended version(s)"
-            status_type = "extended_found"
-        else:
-            status_message = f"Track found on Discogs but no extended versions available (found {len(all_versions)} version(s))"
-            status_type = "no_extended"
+    Args:
+        short_tracks: Tracks as returned by validate_short_tracks
+        max_workers: Number of concurrent searches (defaults to DISCOGS_BULK_SEARCH_WORKERS)
 
+    Yields:
+        One {'type': 'track', ...} result per track as its search completes (with the
+        fields of search_extended_versions_for_track plus the track's index, file,
+        track_id, artist and title), then a {'type': 'summary', ...} record
+    """
+    import time
+    from helpers.discogs_helper import DEFAULT_BULK_SEARCH_WORKERS, DiscogsClient
+
+    start_time = time.time()
+    counts = {}
+
+    def track_result(position, status):
+        track = short_tracks[position]
+        counts[status['status_type']] = counts.get(status['status_type'], 0) + 1
         return {
-            "success": True,
-            "extended_versions": extended_versions,
-            "has_longer_versions": has_longer_versions,
-            "track_found_on_discogs": track_found_on_discogs,
-            "total_versions_found": len(all_versions),
-            "search_completed": True,
-            "status_message": status_message,
-            "status_type": status_type
-        }
-    except Exception as e:
-        return {
-            "success": False,
-            "extended_versions": [],
-            "has_longer_versions": False,
-            "track_found_on_discogs": False,
-            "total_versions_found": 0,
-            "search_completed": True,
-            "status_message": f"Search failed: {str(e)}",
-            "status_type": "error",
-            "error": str(e)
+            "type": "track",
+            "index": position,
+            "file": track.get('file'),
+            "track_id": track.get('track_id'),
+            "artist": track.get('artist'),
+            "title": track.get('title'),
+            **status
         }
 
+    searchable = []
+    for position, track in enumerate(short_tracks):
+        if track.get('artist') and track.get('title') and track.get('duration_seconds'):
+            searchable.append(position)
+        else:
+            yield track_result(position, _extended_versions_error("Artist, title, and duration_seconds are required"))
+
+    pending = set(searchable)
+    if searchable:
+        try:
+            client = DiscogsClient(api_token=os.getenv('DISCOGS_API_TOKEN'))
+            queries = [(short_tracks[position]['artist'], short_tracks[position]['title']) for position in searchable]
+            for query_position, all_versions in client.search_releases_many(
+                    queries, max_workers or DEFAULT_BULK_SEARCH_WORKERS):
+                position = searchable[query_position]
+                pending.discard(position)
+                yield track_result(position, _summarize_extended_versions(
+                    all_versions, short_tracks[position]['duration_seconds']))
+        except Exception as e:
+            for position in sorted(pending):
+                yield track_result(position, _extended_versions_error(e))
+
+    yield {
+        "type": "summary",
+        "total_tracks": len(short_tracks),
+        "extended_found": counts.get('extended_found', 0),
+        "no_extended": counts.get('no_extended', 0),
+        "not_found": counts.get('not_found', 0),
+        "errors": counts.get('error', 0),
+        "processing_time_seconds": time.time() - start_time
+    }
+
+
+def _summarize_extended_versions(all_versions, current_duration):
+    """Build the search result for one track from every version found on Discogs."""
+    # Determine search status
+    track_found_on_discogs = len(all_versions) > 0
+
+    # Filter for versions longer than current
+    extended_versions = []
+    for version in all_versions:
+        if version['duration_seconds'] > current_duration + 30:  # At least 30 seconds longer
+            extended_versions.append(version)
+
+    # Sort by duration (longest first)
+    extended_versions.sort(key=lambda x: x['duration_seconds'], reverse=True)
+
+    has_longer_versions = len(extended_versions) > 0
+
+    # Determine status message
+    if not track_found_on_discogs:
+        status_message = "Track not found on Discogs"
+        status_type = "not_found"
+    elif has_longer_versions:
+        status_message = f"Found {len(extended_versions)} extended version(s)"
+        status_type = "extended_found"
+    else:
+        status_message = f"Track found on Discogs but no extended versions available (found {len(all_versions)} version(s))"
+        status_type = "no_extended"
+
+    return {
+        "success": True,
+        "extended_versions": extended_versions,
+        "has_longer_versions": has_longer_versions,
+        "track_found_on_discogs": track_found_on_discogs,
+        "total_versions_found": len(all_versions),
+        "search_completed": True,
+        "status_message": status_message,
+        "status_type": status_type
+    }
+
+
+def _extended_versions_error(e):
+    """Build the search result for a track whose search failed."""
+    return {
+        "success": False,
+        "extended_versions": [],
+        "has_longer_versions": False,
+        "track_found_on_discogs": False,
+        "total_versions_found": 0,
+        "search_completed": True,
+        "status_message": f"Search failed: {str(e)}",
+        "status_type": "error",
+        "error": str(e)
+    }
+
 
 def create_playlist_from_track_ids(track_ids, playlist_name, playlist_description):
     """
@@ -762,13 +883,7 @@ def _get_current_organization_structure(playlists_dir=None, force_reload=False):
         }
 
     # First, get all current playlist names from the directory
-    current_playlist_names = set()
-    if os.path.exists(playlists_dir):
-        for root, dirs, files in os.walk(playlists_dir):
-            for file in files:
-                if file.lower().endswith('.m3u'):
-                    playlist_name = os.path.splitext(file)[0]
-                    current_playlist_names.add(playlist_name)
+    current_playlist_names = set(get_m3u_index(playlists_dir).get_playlist_names())
 
     # Try to load from saved structure file
     structure_file = os.path.join(playlists_dir, '.playlist_structure.json')
@@ -813,30 +928,20 @@ def _scan_directory_structure(playlists_dir):
             "structure_version": "1.0"
         }
 
-    folders = {}
-    root_playlists = []
-
-    # Walk through the directory structure
-    for root, dirs, files in os.walk(playlists_dir):
-        # Get relative path from playlists_dir
-        rel_path = os.path.relpath(root, playlists_dir)
-        if rel_path == '.':
-            rel_path = ''
+    m3u_index = get_m3u_index(playlists_dir)
 
-        # Find M3U files in this directory
-        m3u_files = [f for f in files if f.lower().endswith('.m3u')]
-        playlist_names = [os.path.splitext(f)[0] for f in m3u_files]
+    # Every subdirectory is a folder, even if it has no M3U files yet
+    folders = {rel_path.replace('\\', '/'): {"playlists": []} for rel_path in m3u_index.folders}
+    root_playlists = []
 
-        if rel_path == '':
+    for playlist_file in m3u_index.get_playlist_files():
+        if playlist_file.folder_path == '':
             # Root directory playlists
-            root_playlists.extend(playlist_names)
+            root_playlists.append(playlist_file.playlist_name)
         else:
             # Folder playlists
-            # Normalize path separators
-            folder_path = rel_path.replace('\\', '/')
-            if folder_path not in folders:
-                folders[folder_path] = {"playlists": []}
-            folders[folder_path]["playlists"].extend(playlist_names)
+            folder_path = playlist_file.folder_path.replace('\\', '/')
+            folders[folder_path]["playlists"].append(playlist_file.playlist_name)
 
     return {
         "folders": folders,
@@ -0,0 +1,99 @@
+"""
+Server-side sessions for sync analyses awaiting confirmation.
+
+An analysis keeps its flattened changes here under a session token instead of relying
+on the client to post the whole analysis back. Confirming a sync then only sends the
+token. A session is used once and is refused when it has expired or when the database
+changed after the analysis, in which case the client has to analyze again.
+"""
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from api.utils.pagination import ResultStore
+from sql.core.unit_of_work import UnitOfWork
+
+# Analyses kept at once, oldest dropped first
+ANALYSIS_SESSION_MAX = int(os.getenv('ANALYSIS_SESSION_MAX', '10'))
+
+# How long an analysis can wait for confirmation
+ANALYSIS_SESSION_TTL_SECONDS = float(os.getenv('ANALYSIS_SESSION_TTL_SECONDS', '1800'))
+
+
+class AnalysisSessionExpired(Exception):
+    """The analysis session is unknown, expired, or out of date with the database."""
+
+
+_session_store: Optional[ResultStore] = None
+_session_store_lock = threading.Lock()
+
+
+def get_analysis_session_store() -> ResultStore:
+    """Get the store holding analysis sessions for this process."""
+    global _session_store
+
+    with _session_store_lock:
+        if _session_store is None:
+            _session_store = ResultStore(max_results=ANALYSIS_SESSION_MAX, ttl_seconds=ANALYSIS_SESSION_TTL_SECONDS)
+        return _session_store
+
+
+def get_database_version() -> Tuple[str, Tuple[Tuple[str, int], ...]]:
+    """
+    Get the (database path, table generations) pair identifying the current data.
+
+    Every committed write to Tracks, Playlists or TrackPlaylists changes it.
+    """
+    with UnitOfWork() as uow:
+        generations = uow.sync_state_repository.get_generations()
+        return uow.connection_provider.db_path, tuple(sorted(generations.items()))
+
+
+def start_analysis_session(action: str, changes: Dict[str, Any], database_version) -> str:
+    """
+    Keep the changes found by an analysis until the sync is confirmed.
+
+    Args:
+        action: Sync the changes belong to ('playlists', 'tracks' or 'associations')
+        changes: Flattened changes, as built by create_flattened_precomputed_changes
+        database_version: get_database_version() from before the analysis ran
+
+    Returns:
+        Session token for the client to confirm with
+    """
+    return get_analysis_session_store().put({
+        'action': action,
+        'changes': changes,
+        'database_version': database_version
+    })
+
+
+def resume_analysis_session(token: str, action: str) -> Dict[str, Any]:
+    """
+    Take the changes stored for a session. A session can only be resumed once; a refused
+    request leaves a valid session in place.
+
+    Args:
+        token: Token returned with the analysis
+        action: Sync being confirmed
+
+    Returns:
+        The flattened changes of the analysis
+
+    Raises:
+        AnalysisSessionExpired: If the session doesn't exist (anymore), belongs to another
+            sync, or the database changed since the analysis
+    """
+    store = get_analysis_session_store()
+    session = store.get(token)
+    if session is None:
+        raise AnalysisSessionExpired(f"Analysis session for {action} has expired, run the analysis again")
+    if session['action'] != action:
+        raise AnalysisSessionExpired(f"Analysis session is for {session['action']}, not {action}")
+    if session['database_version'] != get_database_version():
+        store.pop(token)
+        raise AnalysisSessionExpired(f"The database changed since the {action} analysis, run the analysis again")
+    # Only one of two concurrent confirmations gets the session
+    if store.pop(token) is None:
+        raise AnalysisSessionExpired(f"Analysis session for {action} has expired, run the analysis again")
+    return session['changes']
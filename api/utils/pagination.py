@@ -0,0 +1,185 @@
+"""
+Cursor pagination over stored endpoint results.
+
+Heavy endpoints compute their whole result in one go. When a client asks for pages
+(``pageSize``), the complete result is kept in a ResultStore and only the first page of
+each large collection is returned, together with a result id and cursors; further
+pages are read from /api/results/<result_id>/<field> without recomputing anything.
+"""
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from flask import request
+
+# Largest page a client may ask for
+MAX_PAGE_SIZE = 5000
+
+
+class ResultStore:
+    """
+    Endpoint results kept in memory for paging, least recently used first out.
+
+    Results expire ``ttl_seconds`` after they were last read.
+    """
+
+    def __init__(self, max_results: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        """
+        Initialize a new ResultStore.
+
+        Args:
+            max_results: Results kept at once (defaults to API_RESULT_STORE_MAX or 20)
+            ttl_seconds: Idle time before a result is dropped (defaults to
+                API_RESULT_TTL_SECONDS or 30 minutes)
+        """
+        self.max_results = max_results or int(os.getenv('API_RESULT_STORE_MAX', '20'))
+        self.ttl_seconds = ttl_seconds or float(os.getenv('API_RESULT_TTL_SECONDS', '1800'))
+        self._results: 'OrderedDict[str, Tuple[float, Dict[str, Any]]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, result: Dict[str, Any]) -> str:
+        """
+        Store a result.
+
+        Returns:
+            ID to read the result back with
+        """
+        result_id = uuid.uuid4().hex
+        with self._lock:
+            self._expire()
+            self._results[result_id] = (time.monotonic(), result)
+            while len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+        return result_id
+
+    def get(self, result_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a stored result, refreshing its expiry.
+
+        Returns:
+            The result, or None if it expired or never existed
+        """
+        with self._lock:
+            self._expire()
+            entry = self._results.get(result_id)
+            if entry is None:
+                return None
+            self._results[result_id] = (time.monotonic(), entry[1])
+            self._results.move_to_end(result_id)
+            return entry[1]
+
+    def pop(self, result_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Remove a stored result and return it.
+
+        Returns:
+            The result, or None if it expired or never existed
+        """
+        with self._lock:
+            self._expire()
+            entry = self._results.pop(result_id, None)
+            return entry[1] if entry is not None else None
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._results:
+            result_id, (stored_at, _) = next(iter(self._results.items()))
+            if stored_at >= cutoff:
+                break
+            del self._results[result_id]
+
+
+_result_store: Optional[ResultStore] = None
+_result_store_lock = threading.Lock()
+
+
+def get_result_store() -> ResultStore:
+    """Get the result store shared by all requests in this process."""
+    global _result_store
+
+    with _result_store_lock:
+        if _result_store is None:
+            _result_store = ResultStore()
+        return _result_store
+
+
+def slice_items(items, cursor: int, limit: int) -> Tuple[Any, Optional[str]]:
+    """
+    Take one page of a list, or of a dict's items (in insertion order).
+
+    Returns:
+        Tuple of (page, cursor of the next page or None on the last page)
+    """
+    end = cursor + limit
+    if isinstance(items, dict):
+        page = dict(list(items.items())[cursor:end])
+    else:
+        page = items[cursor:end]
+    return page, str(end) if end < len(items) else None
+
+
+def paginate_result(result: Dict[str, Any], fields: Iterable[str], page_size: int) -> Dict[str, Any]:
+    """
+    Store a result and cut its large collections down to their first page.
+
+    Args:
+        result: Complete endpoint result
+        fields: Top-level keys holding lists or dicts to page through
+        page_size: Items per page
+
+    Returns:
+        Copy of the result with the first page of every field and a 'pagination' entry:
+        {'result_id', 'page_size', 'fields': {field: {'total', 'next_cursor'}}}
+    """
+    result_id = get_result_store().put(result)
+    page = dict(result)
+    pagination = {'result_id': result_id, 'page_size': page_size, 'fields': {}}
+
+    for field in fields:
+        items = result.get(field)
+        if not isinstance(items, (list, dict)):
+            continue
+        page[field], next_cursor = slice_items(items, 0, page_size)
+        pagination['fields'][field] = {'total': len(items), 'next_cursor': next_cursor}
+
+    page['pagination'] = pagination
+    return page
+
+
+def get_result_page(result_id: str, field: str, cursor: int, limit: int) -> Optional[Dict[str, Any]]:
+    """
+    Read a page of a stored result.
+
+    Returns:
+        {'items', 'total', 'next_cursor'}, or None if the result (or field) isn't available
+    """
+    result = get_result_store().get(result_id)
+    if result is None or not isinstance(result.get(field), (list, dict)):
+        return None
+    items, next_cursor = slice_items(result[field], cursor, limit)
+    return {'items': items, 'total': len(result[field]), 'next_cursor': next_cursor}
+
+
+def requested_page_size() -> Optional[int]:
+    """Page size asked for with ``pageSize`` in the query string or JSON body, if any."""
+    page_size = request.args.get('pageSize', type=int)
+    if page_size is None and request.is_json:
+        page_size = (request.get_json(silent=True) or {}).get('pageSize')
+    try:
+        page_size = int(page_size) if page_size is not None else None
+    except (TypeError, ValueError):
+        return None
+    if not page_size or page_size < 1:
+        return None
+    return min(page_size, MAX_PAGE_SIZE)
+
+
+def paginate_if_requested(result: Dict[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+    """Paginate ``result`` when the client asked for pages, otherwise return it whole."""
+    page_size = requested_page_size()
+    if page_size is None:
+        return result
+    return paginate_result(result, fields, page_size)
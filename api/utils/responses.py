@@ -0,0 +1,99 @@
+"""
+Response encoding for the API: compact JSON and negotiated compression.
+
+Validation and mapping endpoints return documents of several megabytes. They are
+encoded without indentation (with orjson when it is installed) and compressed with
+brotli or gzip, whichever the client prefers, once they are large enough to benefit.
+"""
+import gzip
+import os
+
+from flask import Flask, Response, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Responses smaller than this are sent uncompressed
+COMPRESSION_MIN_BYTES = int(os.getenv('API_COMPRESSION_MIN_BYTES', '1024'))
+
+COMPRESSIBLE_MIMETYPES = frozenset({'application/json', 'text/plain', 'text/html', 'text/csv'})
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Encodes jsonify responses with orjson.
+
+    Values orjson doesn't handle itself, and datetimes (so they keep Flask's format),
+    go through DefaultJSONProvider.default.
+    """
+
+    def response(self, *args, **kwargs) -> Response:
+        if not self.compact:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        try:
+            body = orjson.dumps(obj, default=self.default,
+                                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits, which the standard encoder handles
+            return super().response(*args, **kwargs)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def choose_encoding(accept_encodings) -> str:
+    """
+    Pick the content coding for a response.
+
+    Args:
+        accept_encodings: The request's parsed Accept-Encoding header
+
+    Returns:
+        'br', 'gzip', or None to send the response uncompressed
+    """
+    gzip_quality = accept_encodings.quality('gzip')
+    if brotli is not None:
+        brotli_quality = accept_encodings.quality('br')
+        if brotli_quality and brotli_quality >= gzip_quality:
+            return 'br'
+    return 'gzip' if gzip_quality else None
+
+
+def compress_response(response: Response) -> Response:
+    """after_request hook compressing large JSON (and text) responses."""
+    if (response.status_code < 200 or response.status_code >= 300 or response.direct_passthrough
+            or response.is_streamed or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < COMPRESSION_MIN_BYTES:
+        return response
+
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding == 'br':
+        response.set_data(brotli.compress(data, quality=5))
+    elif encoding == 'gzip':
+        response.set_data(gzip.compress(data, compresslevel=6))
+    else:
+        return response
+
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def init_app(app: Flask) -> None:
+    """Set up compact JSON encoding and response compression for the app."""
+    if orjson is not None:
+        app.json = FastJSONProvider(app)
+    app.json.compact = True
+    app.json.sort_keys = False
+    app.after_request(compress_response)
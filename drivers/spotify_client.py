@@ -1,11 +1,12 @@
 import hashlib
 import os
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Tuple, Any
+from typing import List, Optional, Tuple, Any
 from dotenv import load_dotenv
 
+from helpers.playlist_cache_helper import get_playlist_tracks
 from helpers.playlist_helper import is_forbidden_playlist, load_exclusion_config
 from sql.dto.playlist_info import PlaylistInfo
 
@@ -22,6 +23,9 @@ spotify_logger = setup_logger('spotify_client', 'drivers', 'spotify.log')
 # Default since date - September 12, 2021. Will not fetch Liked Songs before this date.
 DEFAULT_SINCE_DATE = datetime(2021, 9, 12)
 
+# SyncState entry holding when Liked Songs were last fully reconciled
+LIKED_SONGS_FULL_SYNC_STATE = 'LikedSongsLastFullSync'
+
 # Get the path to the current file
 current_file = Path(__file__).resolve()
 project_root = current_file.parent.parent
@@ -211,14 +215,31 @@ def fetch_master_tracks(spotify_client, master_playlist_id):
     return unique_tracks_list
 
 
-def get_track_uris_for_playlist(spotify_client, playlist_id: str, force_refresh=False) -> List[str]:
+def _local_track_id(track: dict) -> str:
+    """Generate the consistent ID used for a local file, from its name and primary artist."""
+    track_name = track.get('name', '')
+    artist_name = track.get('artists', [{}])[0].get('name', '') if track.get('artists') else ''
+
+    normalized_name = ''.join(c.lower() for c in track_name if c.isalnum() or c in ' &-_')
+    normalized_artist = ''.join(c.lower() for c in artist_name if c.isalnum() or c in ' &-_')
+
+    # Create a consistent string to hash
+    metadata_string = f"{normalized_artist}_{normalized_name}".strip().lower()
+    return f"local_{hashlib.md5(metadata_string.encode()).hexdigest()[:16]}"
+
+
+def get_track_uris_for_playlist(spotify_client, playlist_id: str, force_refresh=False, snapshot_id: str = None) -> \
+        List[str]:
     """
     Get all track URIs from a playlist (updated version of get_track_ids_for_playlist).
+    Uses database if available, then the snapshot-keyed playlist cache, then the API.
 
     Args:
         spotify_client: Authenticated Spotify client
         playlist_id: The playlist ID to fetch tracks for
-        force_refresh: Whether to force a refresh from the API
+        force_refresh: Whether to skip the database associations; the playlist cache is
+            still used because an entry for the current snapshot can't be stale
+        snapshot_id: Current snapshot_id of the playlist, if the caller knows it
 
     Returns:
         List of Spotify URIs (both regular tracks and local files)
@@ -231,87 +252,37 @@ def get_track_uris_for_playlist(spotify_client, playlist_id: str, force_refresh=
                 spotify_logger.info(f"Retrieved {len(track_uris)} track URIs for playlist {playlist_id} from database")
                 return track_uris
 
-    # If we get here, fetch from Spotify API
-    spotify_logger.info(f"Fetching tracks for playlist {playlist_id} from Spotify API")
-
-    track_uris = []
-    offset = 0
-    limit = 100
-
     try:
-        # Get initial response to get total tracks
-        initial_response = spotify_client.playlist_items(
-            playlist_id,
-            offset=0,
-            limit=1,
-            fields='total'
-        )
-        total_tracks = initial_response['total']
-        spotify_logger.info(f"Total tracks to fetch: {total_tracks}")
-
-        # Loop through all tracks in the playlist
-        while True:
-            try:
-                response = spotify_client.playlist_items(
-                    playlist_id,
-                    offset=offset,
-                    limit=limit,
-                    fields='items(track(id,uri,name,artists(name),album(name),is_local,duration_ms)),total'
-                )
-
-                if not response['items']:
-                    break
-
-                for item in response['items']:
-                    track = item['track']
-
-                    # Skip if track is None
-                    if not track:
-                        continue
-
-                    # Get the Spotify URI directly
-                    spotify_uri = track.get('uri')
-                    if spotify_uri:
-                        track_uris.append(spotify_uri)
-
-                        # Log local files for debugging
-                        if track.get('is_local', False):
-                            track_name = track.get('name', '')
-                            artist_name = track.get('artists', [{}])[0].get('name', '') if track.get('artists') else ''
-                            duration_ms = track.get('duration_ms', 'Unknown')
-                            spotify_logger.debug(
-                                f"Found local file: '{track_name}' by '{artist_name}' (URI: {spotify_uri}) Duration: {duration_ms}ms")
-
-                # Check if we've processed all tracks
-                if len(response['items']) < limit:
-                    break
-
-                offset += limit
-                if offset >= response['total']:
-                    break
-
-            except Exception as e:
-                spotify_logger.error(f"Error fetching tracks at offset {offset}: {str(e)}")
-                time.sleep(1)
-                continue
-
-        spotify_logger.info(f"Successfully fetched {len(track_uris)} track URIs from playlist {playlist_id}")
-        return track_uris
-
+        playlist = get_playlist_tracks(spotify_client, playlist_id, snapshot_id)
     except Exception as e:
         spotify_logger.error(f"Failed to fetch tracks for playlist {playlist_id}: {str(e)}")
         return []
 
+    # Log local files for debugging
+    for track in playlist.items:
+        if track.get('is_local', False):
+            track_name = track.get('name', '')
+            artist_name = track.get('artists', [{}])[0].get('name', '') if track.get('artists') else ''
+            duration_ms = track.get('duration_ms', 'Unknown')
+            spotify_logger.debug(
+                f"Found local file: '{track_name}' by '{artist_name}' (URI: {track.get('uri')}) Duration: {duration_ms}ms")
+
+    spotify_logger.info(f"Got {len(playlist.uris)} track URIs for playlist {playlist_id}")
+    return list(playlist.uris)
 
-def get_track_ids_for_playlist(spotify_client: spotipy.Spotify, playlist_id: str, force_refresh=False) -> List[str]:
+
+def get_track_ids_for_playlist(spotify_client: spotipy.Spotify, playlist_id: str, force_refresh=False,
+                               snapshot_id: str = None) -> List[str]:
     """
     Get all track IDs from a playlist.
-    Uses database if available, then cache, then API as a fallback.
+    Uses database if available, then the snapshot-keyed playlist cache, then the API.
 
     Args:
         spotify_client: Authenticated Spotify client
         playlist_id: The playlist ID to fetch tracks for
-        force_refresh: Whether to force a refresh from the API or use DB for track IDs for each playlist
+        force_refresh: Whether to skip the database associations; the playlist cache is
+            still used because an entry for the current snapshot can't be stale
+        snapshot_id: Current snapshot_id of the playlist, if the caller knows it
 
     Returns:
         List of track IDs
@@ -324,144 +295,117 @@ def get_track_ids_for_playlist(spotify_client: spotipy.Spotify, playlist_id: str
                 spotify_logger.info(f"Retrieved {len(track_ids)} track IDs for playlist {playlist_id} from database")
                 return track_ids
 
-    # If we get here, fetch from Spotify API
-    spotify_logger.info(f"Fetching tracks for playlist {playlist_id} from Spotify API")
-
-    track_ids = []  # Initialize track_ids list correctly
-    offset = 0
-    limit = 100  # Spotify API limit
-
     try:
-        # Get initial response to get total tracks
-        initial_response = spotify_client.playlist_items(
-            playlist_id,
-            offset=0,
-            limit=1,
-            fields='total'
-        )
-        total_tracks = initial_response['total']
-        spotify_logger.info(f"Total tracks to fetch: {total_tracks}")
-
-        # Loop through all tracks in the playlist
-        while True:
-            try:
-                response = spotify_client.playlist_items(
-                    playlist_id,
-                    offset=offset,
-                    limit=limit,
-                    fields='items(track(id,uri,name,artists(name),album(name),is_local)),total'
-                )
-
-                if not response['items']:
-                    break
-
-                for item in response['items']:
-                    track = item['track']
-
-                    # Skip if track is None
-                    if not track:
-                        continue
-
-                    # Handle regular Spotify tracks
-                    if not track.get('is_local', False) and track.get('id'):
-                        track_ids.append(track['id'])
-
-                    # Special handling for local files
-                    elif track.get('is_local', False):
-                        # Get metadata
-                        track_name = track.get('name', '')
-                        artist_name = track.get('artists', [{}])[0].get('name', '') if track.get('artists') else ''
-                        album_name = track.get('album', {}).get('name', '') if track.get('album') else ''
-
-                        # Log the local file
-                        spotify_logger.debug(f"Found local file in playlist: '{track_name}' by '{artist_name}'")
-                        spotify_logger.info(
-                            f"Found local file: '{track_name}' by '{artist_name}'")
-
-                        # Generate a consistent ID for the local file
-                        normalized_name = ''.join(c.lower() for c in track_name if c.isalnum() or c in ' &-_')
-                        normalized_artist = ''.join(c.lower() for c in artist_name if c.isalnum() or c in ' &-_')
-
-                        # Create a consistent string to hash
-                        metadata_string = f"{normalized_artist}_{normalized_name}".strip().lower()
-
-                        # Generate hash for ID
-                        local_id = f"local_{hashlib.md5(metadata_string.encode()).hexdigest()[:16]}"
-                        track_ids.append(local_id)
-
-                        # Print debug info
-                        spotify_logger.debug(
-                            f"Generated local file ID: {local_id} for '{track_name}' by '{artist_name}'")
-
-                # Check if we've processed all tracks
-                if len(response['items']) < limit:
-                    break
-
-                offset += limit
-                if offset >= response['total']:
-                    break
-
-            except Exception as e:
-                spotify_logger.error(f"Error fetching tracks at offset {offset}: {str(e)}")
-                # Wait a bit before retrying
-                time.sleep(1)
-                continue
-
-        spotify_logger.info(f"Successfully fetched {len(track_ids)} tracks from playlist {playlist_id}")
-
-        return track_ids
-
+        playlist = get_playlist_tracks(spotify_client, playlist_id, snapshot_id)
     except Exception as e:
         spotify_logger.error(f"Failed to fetch tracks for playlist {playlist_id}: {str(e)}")
         return []
 
+    track_ids = []
+    for track in playlist.items:
+        # Handle regular Spotify tracks
+        if not track.get('is_local', False) and track.get('id'):
+            track_ids.append(track['id'])
+
+        # Local files get an ID generated from their metadata
+        elif track.get('is_local', False):
+            local_id = _local_track_id(track)
+            track_ids.append(local_id)
+            spotify_logger.debug(f"Generated local file ID: {local_id} for '{track.get('name', '')}'")
+
+    spotify_logger.info(f"Got {len(track_ids)} tracks for playlist {playlist_id}")
+    return track_ids
+
 
-def get_liked_songs_with_dates(spotify_client, since_date=DEFAULT_SINCE_DATE):
+def _iter_liked_songs(spotify_client, stop_before: datetime):
     """
-    Fetch user's Liked Songs with their added dates.
+    Page through Liked Songs, most recently added first, until a song older than stop_before.
 
     Args:
         spotify_client: Authenticated Spotify client
-        since_date: Only fetch songs added after this date
+        stop_before: Paging stops at the first song added before this date
 
-    Returns:
-        List of dicts with track info and added_at date
+    Yields:
+        Dicts with track info and added_at date
     """
-    spotify_logger.info(f"Fetching Liked Songs with dates since {since_date.strftime('%Y-%m-%d')}")
-    liked_songs = []
     offset = 0
     limit = 50  # Spotify's maximum limit per request
 
     while True:
         results = spotify_client.current_user_saved_tracks(limit=limit, offset=offset)
         if not results['items']:
-            break
+            return
 
-        should_break = False
         for item in results['items']:
             added_at = datetime.strptime(item['added_at'], '%Y-%m-%dT%H:%M:%SZ')
 
-            # If we've hit songs older than our target date, we can stop
-            if added_at < since_date:
-                should_break = True
-                break
+            # Liked Songs are ordered newest first, so everything after this is older too
+            if added_at < stop_before:
+                return
 
             track = item['track']
-            liked_songs.append({
+            yield {
                 'id': track['id'],
                 'name': track['name'],
                 'artists': ', '.join(artist['name'] for artist in track['artists']),
                 'added_at': added_at
-            })
-
-        if should_break:
-            break
+            }
 
         offset += limit
         if offset >= results['total']:
-            break
+            return
+
+
+def _liked_songs_full_sync_due(last_full_sync: Optional[str]) -> bool:
+    """Check whether the stored Liked Songs are due for a full reconciliation."""
+    if not last_full_sync:
+        return True
+    max_age = timedelta(days=float(os.getenv('LIKED_SONGS_FULL_SYNC_DAYS', '7')))
+    return datetime.now() - datetime.fromisoformat(last_full_sync) >= max_age
+
+
+def get_liked_songs_with_dates(spotify_client, since_date=DEFAULT_SINCE_DATE, full_refresh=False):
+    """
+    Fetch user's Liked Songs with their added dates.
+
+    Liked Songs are persisted in the database. A regular run only pages through songs liked
+    since the stored high-water mark (the latest added_at) and stops at the first song it
+    already knows, which is usually a single request. Songs that were unliked can only be
+    noticed by listing everything, so a full reconciliation replaces the stored songs when
+    none have been stored yet, when forced, or every LIKED_SONGS_FULL_SYNC_DAYS (default 7).
+
+    Args:
+        spotify_client: Authenticated Spotify client
+        since_date: Only fetch songs added after this date
+        full_refresh: Reconcile against the complete listing even if not yet due
 
-    return sorted(liked_songs, key=lambda x: x['added_at'], reverse=True)  # Most recent first
+    Returns:
+        List of dicts with track info and added_at date
+    """
+    try:
+        with UnitOfWork() as uow:
+            high_water_mark = uow.liked_song_repository.get_high_water_mark()
+            last_full_sync = uow.sync_state_repository.get_value(LIKED_SONGS_FULL_SYNC_STATE)
+    except Exception as e:
+        spotify_logger.error(f"Could not read stored Liked Songs, fetching all of them: {e}")
+        return sorted(_iter_liked_songs(spotify_client, since_date), key=lambda x: x['added_at'], reverse=True)
+
+    if full_refresh or high_water_mark is None or _liked_songs_full_sync_due(last_full_sync):
+        spotify_logger.info(f"Fetching all Liked Songs since {since_date.strftime('%Y-%m-%d')} for a full sync")
+        liked_songs = list(_iter_liked_songs(spotify_client, since_date))
+        with UnitOfWork() as uow:
+            uow.liked_song_repository.replace_all(liked_songs)
+            uow.sync_state_repository.set_value(LIKED_SONGS_FULL_SYNC_STATE, datetime.now().isoformat())
+    else:
+        # Songs liked at the high-water mark itself are fetched again; upserting them is harmless
+        spotify_logger.info(f"Fetching Liked Songs added since {high_water_mark}")
+        new_songs = list(_iter_liked_songs(spotify_client, max(high_water_mark, since_date)))
+        with UnitOfWork() as uow:
+            uow.liked_song_repository.upsert_many(new_songs)
+        spotify_logger.info(f"Fetched {len(new_songs)} new Liked Songs")
+
+    with UnitOfWork() as uow:
+        return uow.liked_song_repository.get_songs(since_date)  # Most recent first
 
 
 def sync_to_master_playlist(spotify_client, master_playlist_id, changed_playlists_only):
@@ -484,7 +428,8 @@ def sync_to_master_playlist(spotify_client, master_playlist_id, changed_playlist
 
     for playlist_info in changed_playlists_only:
         print(f"Processing changed playlist: {playlist_info.name}")
-        playlist_track_uris = get_track_uris_for_playlist(spotify_client, playlist_info.playlist_id, force_refresh=True)
+        playlist_track_uris = get_track_uris_for_playlist(spotify_client, playlist_info.playlist_id, force_refresh=True,
+                                                          snapshot_id=playlist_info.snapshot_id)
 
         # Add tracks that aren't already in master
         new_tracks = set(playlist_track_uris) - master_track_uris_set
@@ -523,7 +468,10 @@ def sync_to_master_playlist(spotify_client, master_playlist_id, changed_playlist
 def sync_unplaylisted_to_unsorted(spotify_client, unsorted_playlist_id: str):
     """
     Add Liked Songs that aren't in any other playlist to 'UNSORTED' playlist.
-    Makes necessary API calls to ensure accuracy, but optimizes where possible.
+
+    The analysis runs as set operations in the database (see
+    LikedSongRepository.get_unsorted_changes); only new Liked Songs, playlists changed since
+    the last database sync and the final add/remove batches hit the API.
 
     Args:
         spotify_client: Authenticated Spotify client
@@ -544,42 +492,40 @@ def sync_unplaylisted_to_unsorted(spotify_client, unsorted_playlist_id: str):
     unplaylisted_logs_dir = logs_dir / 'unplaylisted'
     unplaylisted_logs_dir.mkdir(exist_ok=True)
 
-    # Get all Liked Songs with dates - this requires API call
+    # Liked Songs are persisted; usually only the newest page is requested
     liked_songs_with_dates = get_liked_songs_with_dates(spotify_client)
-    liked_song_ids = {song['id'] for song in liked_songs_with_dates}
-    spotify_logger.info(f"Found {len(liked_song_ids)} Liked Songs")
+    spotify_logger.info(f"Found {len(liked_songs_with_dates)} Liked Songs")
 
     # Get all user's playlists
     all_playlists = fetch_playlists(spotify_client)
     spotify_logger.info(f"Found {len(all_playlists)} playlists")
 
-    # Get all tracks from all playlists (excluding forbidden playlists)
-    tracks_in_playlists = set()
-    for _, _, playlist_id in all_playlists:
-        if playlist_id != unsorted_playlist_id:  # Skip UNSORTED playlist
-            playlist_tracks = get_track_ids_for_playlist(spotify_client, playlist_id)
-            tracks_in_playlists.update(playlist_tracks)
-            spotify_logger.info(f"Added {len(playlist_tracks)} tracks from a playlist")
-
-    # Get tracks from UNSORTED playlist separately
-    unsorted_tracks = get_track_ids_for_playlist(spotify_client, unsorted_playlist_id)
-    spotify_logger.info(f"Found {len(unsorted_tracks)} tracks in UNSORTED playlist")
-
-    # Find tracks that should be removed from UNSORTED (they're now in other playlists)
-    tracks_to_remove = [
-        track_id for track_id in unsorted_tracks
-        if track_id in tracks_in_playlists
-    ]
-
-    # Find liked songs that aren't in any playlist
-    tracks_in_playlists.update(unsorted_tracks)
-    unplaylisted = liked_song_ids - tracks_in_playlists
-
-    # Filter and sort the unplaylisted songs with their dates
-    unplaylisted_songs = [
-        song for song in liked_songs_with_dates
-        if song['id'] in unplaylisted
-    ]
+    # Playlists whose stored associations match their current snapshot are read from
+    # TrackPlaylists; only the ones that changed since the last database sync are fetched
+    # (from the playlist cache where possible)
+    with UnitOfWork() as uow:
+        stored_snapshots = dict(uow.playlist_repository.get_projection(("PlaylistId", "AssociationsSnapshotId")))
+
+    live_snapshots = {playlist_info.playlist_id: playlist_info.snapshot_id for playlist_info in all_playlists}
+    live_snapshots.setdefault(unsorted_playlist_id, None)
+    synced_playlist_ids = [playlist_id for playlist_id, snapshot_id in live_snapshots.items()
+                           if snapshot_id and stored_snapshots.get(playlist_id) == snapshot_id]
+    changed_playlist_ids = [playlist_id for playlist_id, snapshot_id in live_snapshots.items()
+                            if not snapshot_id or stored_snapshots.get(playlist_id) != snapshot_id]
+    spotify_logger.info(f"{len(synced_playlist_ids)} playlists read from the database, "
+                        f"{len(changed_playlist_ids)} changed since the last sync")
+
+    fetched_playlist_uris = {
+        playlist_id: get_track_uris_for_playlist(spotify_client, playlist_id, force_refresh=True,
+                                                 snapshot_id=live_snapshots[playlist_id])
+        for playlist_id in changed_playlist_ids
+    }
+
+    # Liked Songs in no playlist (anti-join) and UNSORTED tracks that are now in another
+    # playlist (semi-join), with display metadata from the local Tracks table
+    with UnitOfWork() as uow:
+        unplaylisted_songs, tracks_to_remove = uow.liked_song_repository.get_unsorted_changes(
+            unsorted_playlist_id, synced_playlist_ids, fetched_playlist_uris, DEFAULT_SINCE_DATE)
 
     # Display summary of changes
     print("\nUNPLAYLISTED TRACKS SYNC ANALYSIS COMPLETE")
@@ -587,32 +533,15 @@ def sync_unplaylisted_to_unsorted(spotify_client, unsorted_playlist_id: str):
 
     if tracks_to_remove:
         print(f"\nTracks to remove from UNSORTED: {len(tracks_to_remove)}")
-        # Get track details for display
-        removed_tracks_info = []
-        for i in range(0, len(tracks_to_remove), 50):
-            batch = tracks_to_remove[i:i + 50]
-            try:
-                tracks_info = spotify_client.tracks(batch)
-                for track in tracks_info['tracks']:
-                    if track:
-                        artists = ", ".join([artist['name'] for artist in track['artists']])
-                        removed_tracks_info.append({
-                            'name': track['name'],
-                            'artists': artists,
-                            'id': track['id']
-                        })
-            except Exception as e:
-                spotify_logger.error(f"Error fetching track details: {e}")
-
         # Display sample of tracks to remove
         print("\nSAMPLE TRACKS TO REMOVE FROM UNSORTED:")
         print("=====================================")
         # Sort tracks by artist name, then track name for better readability
-        sorted_tracks = sorted(removed_tracks_info[:10], key=lambda x: (x['artists'], x['name']))
+        sorted_tracks = sorted(tracks_to_remove[:10], key=lambda x: (x['artists'], x['name']))
         for track in sorted_tracks:
             print(f"• {track['artists']} - {track['name']}")
-        if len(removed_tracks_info) > 10:
-            print(f"...and {len(removed_tracks_info) - 10} more")
+        if len(tracks_to_remove) > 10:
+            print(f"...and {len(tracks_to_remove) - 10} more")
     else:
         print("\nNo tracks to remove from UNSORTED playlist")
 
@@ -645,7 +574,6 @@ def sync_unplaylisted_to_unsorted(spotify_client, unsorted_playlist_id: str):
 
     removed_tracks_info = []
     # Remove tracks that are now in other playlists
-    spotify_logger.info("Fetching details for removed tracks for logging purposes...")
     if tracks_to_remove:
         spotify_logger.info(f"Found {len(tracks_to_remove)} tracks to remove from UNSORTED (now in other playlists)")
         print(f"\nRemoving {len(tracks_to_remove)} tracks from UNSORTED playlist...")
@@ -654,7 +582,9 @@ def sync_unplaylisted_to_unsorted(spotify_client, unsorted_playlist_id: str):
         for i in range(0, len(tracks_to_remove), 100):
             batch = tracks_to_remove[i:i + 100]
             try:
-                spotify_client.playlist_remove_all_occurrences_of_items(unsorted_playlist_id, batch)
+                spotify_client.playlist_remove_all_occurrences_of_items(unsorted_playlist_id,
+                                                                       [track['id'] for track in batch])
+                removed_tracks_info.extend(batch)
                 spotify_logger.info(f"Removed batch of {len(batch)} tracks from UNSORTED playlist")
                 print(f"Removed batch of {len(batch)} tracks from UNSORTED playlist")
             except Exception as e:
@@ -662,22 +592,6 @@ def sync_unplaylisted_to_unsorted(spotify_client, unsorted_playlist_id: str):
                 print(f"Error removing tracks: {e}")
                 continue
 
-        # Get track details after successful removal
-        for i in range(0, len(tracks_to_remove), 50):
-            batch = tracks_to_remove[i:i + 50]
-            try:
-                tracks_info = spotify_client.tracks(batch)
-                for track in tracks_info['tracks']:
-                    if track:
-                        artists = ", ".join([artist['name'] for artist in track['artists']])
-                        removed_tracks_info.append({
-                            'name': track['name'],
-                            'artists': artists,
-                            'id': track['id']
-                        })
-            except Exception as e:
-                spotify_logger.error(f"Error fetching track details: {e}")
-
     # Generate log file
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     log_path = unplaylisted_logs_dir / f'playlist_sync_{timestamp}.log'
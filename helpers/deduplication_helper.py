@@ -4,11 +4,15 @@ Helper functions for deduplicating tracks in Unchartify playlists.
 
 import re
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from typing import List, Dict, Tuple, Set, Optional
 import unicodedata
 import Levenshtein
 from spotipy import Spotify
 
+from helpers.playlist_cache_helper import PlaylistContentCache, get_playlist_content_cache, get_playlist_tracks
+from helpers.rate_limit_helper import RateLimiter, get_spotify_rate_limiter
 from utils.logger import setup_logger
 
 # Set up logging
@@ -26,6 +30,9 @@ PRIORITIZE_KEYWORDS = [
     'club mix', 'original version', 'full length', 'original club mix'
 ]
 
+# Minimum Levenshtein ratio between normalized names for two tracks to be duplicates
+DEFAULT_SIMILARITY_THRESHOLD = 0.85
+
 
 def is_unchartify_playlist(playlist_name: str) -> bool:
     """
@@ -76,7 +83,31 @@ def normalize_track_name(track_name: str) -> str:
     return base_track
 
 
-def are_similar_tracks(track1: dict, track2: dict, similarity_threshold: float = 0.85) -> bool:
+def _similarity_key(track: dict) -> Tuple[str, str]:
+    """
+    Get the (primary artist, normalized name) pair that track similarity is based on.
+
+    Args:
+        track: Track metadata
+
+    Returns:
+        Lowercased primary artist name and normalized track name
+    """
+    artist = track.get('artists', [{}])[0].get('name', '') if track.get('artists') else ''
+    return artist.lower(), normalize_track_name(track.get('name', ''))
+
+
+def _similar_names(name1: str, name2: str, similarity_threshold: float) -> bool:
+    # Levenshtein.ratio is 1 - distance / (len1 + len2) and the distance is at least the
+    # length difference, so very different lengths can be rejected without computing it
+    total_length = len(name1) + len(name2)
+    if abs(len(name1) - len(name2)) > (1 - similarity_threshold) * total_length + 1e-9:
+        return False
+    return Levenshtein.ratio(name1, name2) >= similarity_threshold
+
+
+def are_similar_tracks(track1: dict, track2: dict,
+                       similarity_threshold: float = DEFAULT_SIMILARITY_THRESHOLD) -> bool:
     """
     Determine if two tracks are similar enough to be considered duplicates.
 
@@ -88,33 +119,26 @@ def are_similar_tracks(track1: dict, track2: dict, similarity_threshold: float =
     Returns:
         True if tracks are similar enough to be duplicates
     """
-    # Extract track names and artist names
-    name1 = track1.get('name', '')
-    name2 = track2.get('name', '')
-
-    # Normalize track names
-    norm_name1 = normalize_track_name(name1)
-    norm_name2 = normalize_track_name(name2)
-
-    # Get artists (use primary artist)
-    artist1 = track1.get('artists', [{}])[0].get('name', '') if track1.get('artists') else ''
-    artist2 = track2.get('artists', [{}])[0].get('name', '') if track2.get('artists') else ''
+    artist1, norm_name1 = _similarity_key(track1)
+    artist2, norm_name2 = _similarity_key(track2)
 
     # If we have different artists, they're different tracks
-    if artist1.lower() != artist2.lower():
+    if artist1 != artist2:
         return False
 
-    # Calculate similarity using Levenshtein distance
-    name_similarity = Levenshtein.ratio(norm_name1, norm_name2)
-
-    # Check if names are similar enough
-    return name_similarity >= similarity_threshold
+    # Check if names are similar enough using Levenshtein distance
+    return _similar_names(norm_name1, norm_name2, similarity_threshold)
 
 
 def group_similar_tracks(tracks: List[dict]) -> List[List[dict]]:
     """
     Group similar tracks together into clusters.
 
+    A track joins the first group (in creation order) whose first track is similar to it,
+    otherwise it starts a new group. Similar tracks always share their primary artist, so
+    groups are bucketed by artist and each track is only compared with the groups in its
+    own bucket; every track is normalized once.
+
     Args:
         tracks: List of track metadata dictionaries
 
@@ -126,23 +150,22 @@ def group_similar_tracks(tracks: List[dict]) -> List[List[dict]]:
 
     dedup_logger.info(f"Grouping {len(tracks)} tracks into similar clusters")
 
-    # Initialize groups with the first track
-    groups = [[tracks[0]]]
+    groups: List[List[dict]] = []
+    # Primary artist -> (normalized name of the group's first track, group), in creation order
+    groups_by_artist: Dict[str, List[Tuple[str, List[dict]]]] = {}
 
-    # For each remaining track, check if it belongs to an existing group
-    for track in tracks[1:]:
-        found_group = False
+    for track in tracks:
+        artist, name = _similarity_key(track)
+        bucket = groups_by_artist.setdefault(artist, [])
 
-        for group in groups:
-            # Compare with the first track in the group
-            if are_similar_tracks(track, group[0]):
+        for group_name, group in bucket:
+            if _similar_names(name, group_name, DEFAULT_SIMILARITY_THRESHOLD):
                 group.append(track)
-                found_group = True
                 break
-
-        # If not found in any group, create a new group
-        if not found_group:
-            groups.append([track])
+        else:
+            group = [track]
+            groups.append(group)
+            bucket.append((name, group))
 
     dedup_logger.info(f"Found {len(groups)} unique tracks/groups")
     return groups
@@ -200,6 +223,27 @@ def rank_track_versions(track_group: List[dict]) -> List[dict]:
     return ranked_tracks
 
 
+def find_playlist_duplicates(tracks: List[dict]) -> List[Tuple[dict, List[dict]]]:
+    """
+    Group the tracks of a playlist and pick the best version of each group.
+
+    Args:
+        tracks: Playlist tracks in playlist order
+
+    Returns:
+        (track to keep, tracks to remove) for every track, in playlist order of the groups;
+        the removal list is empty for tracks without duplicates
+    """
+    resolved = []
+    for group in group_similar_tracks(tracks):
+        if len(group) == 1:
+            resolved.append((group[0], []))
+        else:
+            ranked_tracks = rank_track_versions(group)
+            resolved.append((ranked_tracks[0], ranked_tracks[1:]))
+    return resolved
+
+
 def deduplicate_playlist(spotify_client: Spotify, playlist_id: str) -> Tuple[List[dict], List[dict]]:
     """
     Identify duplicates in a playlist and return tracks to keep and remove.
@@ -213,52 +257,21 @@ def deduplicate_playlist(spotify_client: Spotify, playlist_id: str) -> Tuple[Lis
     """
     dedup_logger.info(f"Deduplicating playlist {playlist_id}")
 
-    # Get all tracks in the playlist
-    tracks = []
-    offset = 0
-    limit = 100  # Spotify API limit
-
-    while True:
-        results = spotify_client.playlist_items(
-            playlist_id,
-            offset=offset,
-            limit=limit,
-            fields='items(track(id,name,artists(name),duration_ms)),total'
-        )
-
-        if not results['items']:
-            break
-
-        tracks.extend([item['track'] for item in results['items'] if item['track']])
-        offset += limit
-
-        if offset >= results['total']:
-            break
-
+    tracks = get_playlist_tracks(spotify_client, playlist_id).items
     dedup_logger.info(f"Found {len(tracks)} tracks in playlist")
 
-    # Group similar tracks
-    track_groups = group_similar_tracks(tracks)
-
-    # For each group, select the best version
     tracks_to_keep = []
     tracks_to_remove = []
-
-    for group in track_groups:
-        if len(group) == 1:
-            # No duplicates for this track
-            tracks_to_keep.append(group[0])
-        else:
-            # Rank the versions and keep the best one
-            ranked_tracks = rank_track_versions(group)
-            tracks_to_keep.append(ranked_tracks[0])
-            tracks_to_remove.extend(ranked_tracks[1:])
+    for keep, remove in find_playlist_duplicates(tracks):
+        tracks_to_keep.append(keep)
+        tracks_to_remove.extend(remove)
 
     dedup_logger.info(f"Keeping {len(tracks_to_keep)} tracks, removing {len(tracks_to_remove)} duplicates")
     return tracks_to_keep, tracks_to_remove
 
 
-def remove_tracks_from_playlist(spotify_client: Spotify, playlist_id: str, tracks_to_remove: List[dict]) -> bool:
+def remove_tracks_from_playlist(spotify_client: Spotify, playlist_id: str, tracks_to_remove: List[dict],
+                                rate_limiter: Optional[RateLimiter] = None) -> bool:
     """
     Remove tracks from a Spotify playlist.
 
@@ -266,6 +279,7 @@ def remove_tracks_from_playlist(spotify_client: Spotify, playlist_id: str, track
         spotify_client: Authenticated Spotify client
         playlist_id: ID of the playlist
         tracks_to_remove: List of track objects to remove
+        rate_limiter: Optional limiter every removal batch waits on
 
     Returns:
         True if successful
@@ -283,6 +297,8 @@ def remove_tracks_from_playlist(spotify_client: Spotify, playlist_id: str, track
     for i in range(0, len(track_ids), 100):
         batch = track_ids[i:i + 100]
         try:
+            if rate_limiter:
+                rate_limiter.acquire()
             spotify_client.playlist_remove_all_occurrences_of_items(playlist_id, batch)
             dedup_logger.info(f"Removed batch of {len(batch)} tracks from playlist")
         except Exception as e:
@@ -292,6 +308,113 @@ def remove_tracks_from_playlist(spotify_client: Spotify, playlist_id: str, track
     return True
 
 
+@dataclass
+class PlaylistDeduplicationPlan:
+    """Duplicates found in one playlist and what to do about them."""
+    playlist_id: str
+    name: str
+    tracks: List[dict]
+    # (track to keep, tracks to remove) for every group that has duplicates
+    duplicate_groups: List[Tuple[dict, List[dict]]] = field(default_factory=list)
+    tracks_to_keep: List[dict] = field(default_factory=list)
+
+    @property
+    def tracks_to_remove(self) -> List[dict]:
+        return [track for _, duplicates in self.duplicate_groups for track in duplicates]
+
+
+class DeduplicationSession:
+    """
+    Deduplicates several playlists with one fetch per playlist.
+
+    Playlists are fetched concurrently and at most once: a playlist whose snapshot_id is
+    already in the playlist content cache isn't fetched at all. Every Spotify request,
+    including removal batches, goes through one shared rate limiter instead of fixed
+    sleeps between playlists.
+    """
+
+    def __init__(self, spotify_client: Spotify, cache: Optional[PlaylistContentCache] = None,
+                 rate_limiter: Optional[RateLimiter] = None, max_workers: int = 8):
+        """
+        Initialize a new DeduplicationSession.
+
+        Args:
+            spotify_client: Authenticated Spotify client
+            cache: Playlist content cache (defaults to the shared one)
+            rate_limiter: Limiter for Spotify requests (defaults to the shared one)
+            max_workers: Number of playlists fetched at the same time
+        """
+        self.spotify_client = spotify_client
+        self.cache = cache or get_playlist_content_cache()
+        self.rate_limiter = rate_limiter or get_spotify_rate_limiter()
+        self.max_workers = max_workers
+
+        self.playlists: Dict[str, dict] = {}
+        self.tracks_by_playlist: Dict[str, List[dict]] = {}
+        self.errors: Dict[str, str] = {}
+
+    def load_playlists(self, playlists: List[dict]) -> Dict[str, List[dict]]:
+        """
+        Load the tracks of every playlist, from the cache or concurrently from Spotify.
+
+        Args:
+            playlists: Playlist dicts with 'id', 'name' and 'snapshot_id'
+
+        Returns:
+            Tracks by playlist ID for every playlist that could be loaded; failures are
+            recorded in ``errors``
+        """
+        for playlist in playlists:
+            self.playlists[playlist['id']] = playlist
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(get_playlist_tracks, self.spotify_client, playlist['id'], playlist.get('snapshot_id'),
+                                self.rate_limiter, self.cache): playlist
+                for playlist in playlists
+            }
+            for future in as_completed(futures):
+                playlist = futures[future]
+                try:
+                    self.tracks_by_playlist[playlist['id']] = future.result().items
+                except Exception as e:
+                    dedup_logger.error(f"Error fetching playlist {playlist['name']}: {e}")
+                    self.errors[playlist['id']] = str(e)
+
+        dedup_logger.info(f"Loaded {len(self.tracks_by_playlist)} of {len(playlists)} playlists")
+        return self.tracks_by_playlist
+
+    def plan_removals(self) -> Dict[str, PlaylistDeduplicationPlan]:
+        """
+        Work out the duplicates of every loaded playlist in one pass.
+
+        Returns:
+            Plan by playlist ID
+        """
+        plans = {}
+        for playlist_id, tracks in self.tracks_by_playlist.items():
+            plan = PlaylistDeduplicationPlan(playlist_id, self.playlists[playlist_id]['name'], tracks)
+            for keep, remove in find_playlist_duplicates(tracks):
+                plan.tracks_to_keep.append(keep)
+                if remove:
+                    plan.duplicate_groups.append((keep, remove))
+            plans[playlist_id] = plan
+
+        total = sum(len(plan.tracks_to_remove) for plan in plans.values())
+        dedup_logger.info(f"Planned removal of {total} duplicates across {len(plans)} playlists")
+        return plans
+
+    def remove_tracks(self, playlist_id: str, tracks_to_remove: List[dict]) -> bool:
+        """
+        Remove tracks from a playlist, queueing the batches through the rate limiter.
+
+        The playlist gets a new snapshot_id, so its cached contents are dropped.
+        """
+        success = remove_tracks_from_playlist(self.spotify_client, playlist_id, tracks_to_remove, self.rate_limiter)
+        self.cache.invalidate(playlist_id)
+        return success
+
+
 def format_duration(ms: int) -> str:
     """
     Format milliseconds as MM:SS.
@@ -1,8 +1,14 @@
+import json
 import os
+import sqlite3
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from pathlib import Path
 
 import requests
 import time
-from typing import List, Dict, Optional, Tuple
+from requests.adapters import HTTPAdapter
+from typing import Callable, List, Dict, Iterable, Iterator, Optional, Tuple
 from utils.logger import setup_logger
 
 from dotenv import load_dotenv
@@ -10,14 +16,258 @@ from dotenv import load_dotenv
 load_dotenv()
 discogs_logger = setup_logger('discogs_helper', 'sql', 'discogs_helper.log')
 
-DISCOGS_API_TOKEN = os.environ['DISCOGS_API_TOKEN']
+DISCOGS_API_TOKEN = os.getenv('DISCOGS_API_TOKEN')
+DISCOGS_BASE_URL = os.getenv('DISCOGS_BASE_URL', 'https://api.discogs.com')
+
+# Discogs allows 60 requests per minute with a token and 25 without, over a moving 60 second window
+AUTHENTICATED_REQUESTS_PER_MINUTE = 60
+UNAUTHENTICATED_REQUESTS_PER_MINUTE = 25
+RATE_LIMIT_WINDOW_SECONDS = 60.0
+
+# Requests left in the window below which calls are spread out instead of made immediately
+DEFAULT_RATE_LIMIT_RESERVE = 5
+
+# Attempts made after a 429 before giving up on a request
+MAX_RATE_LIMIT_RETRIES = 2
+
+# Searches run at once by search_releases_many; the rate limiter still paces the requests
+DEFAULT_BULK_SEARCH_WORKERS = int(os.getenv('DISCOGS_BULK_SEARCH_WORKERS', '8'))
+
+project_root = Path(__file__).resolve().parent.parent
+
+
+class DiscogsRateLimiter:
+    """
+    Thread-safe limiter driven by the rate limit headers Discogs returns with every response.
+
+    While ``X-Discogs-Ratelimit-Remaining`` is comfortably above ``reserve``, requests go
+    out immediately; once it drops to the reserve, requests are spaced one window slot
+    apart so the moving window refills as fast as it is used. Every call also decrements
+    the local count, so concurrent callers don't all spend the same remaining request.
+    """
+
+    def __init__(self, requests_per_minute: int = AUTHENTICATED_REQUESTS_PER_MINUTE,
+                 reserve: int = DEFAULT_RATE_LIMIT_RESERVE, window: float = RATE_LIMIT_WINDOW_SECONDS):
+        """
+        Initialize a new DiscogsRateLimiter.
+
+        Args:
+            requests_per_minute: Requests allowed per window until the headers say otherwise
+            reserve: Remaining requests below which calls are spaced out
+            window: Length of the rate limit window in seconds
+        """
+        self.limit = max(1, requests_per_minute)
+        self.remaining = self.limit
+        self.reserve = reserve
+        self.window = window
+        self._last_request = 0.0
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def interval(self) -> float:
+        """Seconds between requests when the window is (nearly) used up."""
+        return self.window / self.limit
+
+    def acquire(self) -> float:
+        """
+        Reserve a slot for one request, waiting for it if necessary.
+
+        Returns:
+            Seconds spent waiting
+        """
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._blocked_until)
+            if self.remaining <= self.reserve:
+                start = max(start, self._last_request + self.interval)
+            self._last_request = start
+            self.remaining = max(0, self.remaining - 1)
+
+        delay = start - now
+        if delay > 0:
+            time.sleep(delay)
+        return max(0.0, delay)
+
+    def update(self, headers) -> None:
+        """
+        Take the current limits from the headers of a Discogs response.
+
+        Args:
+            headers: Response headers
+        """
+        limit = _parse_int_header(headers, 'X-Discogs-Ratelimit')
+        remaining = _parse_int_header(headers, 'X-Discogs-Ratelimit-Remaining')
+        with self._lock:
+            if limit:
+                self.limit = limit
+            if remaining is not None:
+                self.remaining = remaining
+
+    def back_off(self, seconds: float) -> None:
+        """
+        Hold every request for ``seconds`` after Discogs answered 429.
+
+        Args:
+            seconds: How long to wait before the next request
+        """
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self.remaining = 0
+        discogs_logger.warning(f"Rate limited by Discogs - pausing requests for {seconds:.1f}s")
+
+
+def _parse_int_header(headers, name: str) -> Optional[int]:
+    try:
+        return int(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+class DiscogsResponseCache:
+    """
+    Discogs API responses persisted in SQLite, keyed by search query or release id.
+
+    Release data rarely changes and the short-tracks workflow searches the same artists
+    again and again, so responses are served from here until they are ``ttl_seconds`` old.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, ttl_seconds: Optional[float] = None):
+        """
+        Initialize a new DiscogsResponseCache.
+
+        Args:
+            db_path: SQLite file holding the responses (defaults to DISCOGS_CACHE_PATH
+                or data/discogs_cache.db)
+            ttl_seconds: Age after which a response is fetched again (defaults to
+                DISCOGS_CACHE_TTL_HOURS or one week)
+        """
+        self.db_path = db_path or os.getenv('DISCOGS_CACHE_PATH') or str(project_root / "data" / "discogs_cache.db")
+        if ttl_seconds is None:
+            ttl_seconds = float(os.getenv('DISCOGS_CACHE_TTL_HOURS', '168')) * 3600
+        self.ttl_seconds = ttl_seconds
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self._lock:
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS DiscogsResponses (
+                    CacheKey TEXT PRIMARY KEY,
+                    Body TEXT NOT NULL,
+                    FetchedAt REAL NOT NULL
+                )
+            """)
+            self._connection.execute("DELETE FROM DiscogsResponses WHERE FetchedAt < ?",
+                                     (time.time() - self.ttl_seconds,))
+            self._connection.commit()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Get a cached response.
+
+        Args:
+            key: Cache key, e.g. "search:<query>" or "release:<id>"
+
+        Returns:
+            The decoded response, or None if it isn't cached or has expired
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT Body FROM DiscogsResponses WHERE CacheKey = ? AND FetchedAt >= ?",
+                (key, time.time() - self.ttl_seconds)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Dict) -> None:
+        """
+        Store a response.
+
+        Args:
+            key: Cache key
+            value: Decoded JSON response
+        """
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO DiscogsResponses (CacheKey, Body, FetchedAt) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time())
+            )
+            self._connection.commit()
+
+    def clear(self) -> None:
+        """Drop every cached response."""
+        with self._lock:
+            self._connection.execute("DELETE FROM DiscogsResponses")
+            self._connection.commit()
+
+
+_discogs_session: Optional[requests.Session] = None
+_discogs_rate_limiter: Optional[DiscogsRateLimiter] = None
+_discogs_cache: Optional[DiscogsResponseCache] = None
+_discogs_lock = threading.Lock()
+
+
+def get_discogs_session() -> requests.Session:
+    """
+    Get the HTTP session shared by all Discogs clients in this process.
+
+    Its connection pool keeps connections to Discogs open between searches, so only the
+    first request pays for the TCP/TLS handshake. The pool size can be tuned with
+    DISCOGS_POOL_SIZE (default 8).
+    """
+    global _discogs_session
+
+    with _discogs_lock:
+        if _discogs_session is None:
+            pool_size = int(os.getenv('DISCOGS_POOL_SIZE', '8'))
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _discogs_session = session
+        return _discogs_session
+
+
+def get_discogs_rate_limiter(authenticated: bool = True) -> DiscogsRateLimiter:
+    """
+    Get the limiter shared by all Discogs requests in this process.
+
+    The initial allowance is DISCOGS_REQUESTS_PER_MINUTE, or Discogs' documented limit
+    for (un)authenticated requests; the response headers correct it from then on.
+
+    Args:
+        authenticated: Whether requests carry an API token
+    """
+    global _discogs_rate_limiter
+
+    with _discogs_lock:
+        if _discogs_rate_limiter is None:
+            default_rate = AUTHENTICATED_REQUESTS_PER_MINUTE if authenticated else UNAUTHENTICATED_REQUESTS_PER_MINUTE
+            rate = int(os.getenv('DISCOGS_REQUESTS_PER_MINUTE', str(default_rate)))
+            _discogs_rate_limiter = DiscogsRateLimiter(rate)
+            discogs_logger.info(f"Discogs rate limiter: {rate} requests per minute")
+        return _discogs_rate_limiter
+
+
+def get_discogs_cache() -> DiscogsResponseCache:
+    """Get the response cache shared by all Discogs clients in this process."""
+    global _discogs_cache
+
+    with _discogs_lock:
+        if _discogs_cache is None:
+            _discogs_cache = DiscogsResponseCache()
+        return _discogs_cache
 
 
 class DiscogsClient:
     def __init__(self,
                  user_agent="SpotifyPlaylistAutomation/1.0 +https://github.com/alexk218/SpotifyPlaylistAutomation",
-                 api_token=None):
-        self.base_url = "https://api.discogs.com"
+                 api_token=None,
+                 base_url: Optional[str] = None,
+                 session: Optional[requests.Session] = None,
+                 rate_limiter: Optional[DiscogsRateLimiter] = None,
+                 cache: Optional[DiscogsResponseCache] = None):
+        self.base_url = (base_url or DISCOGS_BASE_URL).rstrip('/')
         self.headers = {
             'User-Agent': user_agent,
             'Accept': 'application/vnd.discogs.v2.plain+json'
@@ -28,7 +278,55 @@ class DiscogsClient:
         else:
             discogs_logger.warning("No API token provided - using unauthenticated requests")
 
-        self.rate_limit_delay = 1.0 if api_token else 1.5  # Faster with token
+        self.session = session or get_discogs_session()
+        self.rate_limiter = rate_limiter or get_discogs_rate_limiter(authenticated=bool(api_token))
+        self.cache = cache or get_discogs_cache()
+
+    def _get_json(self, path: str, cache_key: str, params: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        GET a Discogs API resource, from the response cache when possible.
+
+        Args:
+            path: Path under the API base URL
+            cache_key: Key of the response in the cache
+            params: Query parameters
+
+        Returns:
+            The decoded response, or None if Discogs refused the request
+
+        Raises:
+            requests.HTTPError: For error responses other than 401 and 429
+        """
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            discogs_logger.info(f"Discogs cache hit for {cache_key}")
+            return cached
+
+        url = f"{self.base_url}{path}"
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            self.rate_limiter.acquire()
+            response = self.session.get(url, headers=self.headers, params=params, timeout=30)
+            self.rate_limiter.update(response.headers)
+            discogs_logger.info(f"GET {path} -> {response.status_code} "
+                                f"({response.headers.get('X-Discogs-Ratelimit-Remaining', '?')} requests left)")
+
+            if response.status_code == 401:
+                discogs_logger.error("401 Unauthorized - Check User-Agent or consider using API token")
+                discogs_logger.error(f"Response text: {response.text}")
+                return None
+
+            if response.status_code == 429:
+                retry_after = _parse_int_header(response.headers, 'Retry-After')
+                self.rate_limiter.back_off(retry_after if retry_after is not None else self.rate_limiter.interval * 2)
+                continue
+
+            response.raise_for_status()
+            data = response.json()
+            self.cache.set(cache_key, data)
+            return data
+
+        discogs_logger.warning(f"Giving up on {path} after {MAX_RATE_LIMIT_RETRIES + 1} rate limited attempts")
+        return None
 
     def search_releases(self, artist: str, title: str) -> List[Dict]:
         """
@@ -41,6 +339,55 @@ class DiscogsClient:
         Returns:
             List of release data with track information
         """
+        return self._search_releases(artist, title, self._get_release_details)
+
+    def search_releases_many(self, queries: Iterable[Tuple[str, str]],
+                             max_workers: int = DEFAULT_BULK_SEARCH_WORKERS) -> Iterator[Tuple[int, List[Dict]]]:
+        """
+        Run search_releases for many (artist, title) pairs concurrently.
+
+        Searches share one release lookup per release id: a release that turns up for
+        several tracks is fetched once, and tracks that need it while it is in flight
+        wait for that fetch. All requests go through the client's rate limiter.
+
+        Args:
+            queries: (artist, title) pairs
+            max_workers: Number of searches run at once
+
+        Yields:
+            (position in queries, search_releases result) as each search completes
+        """
+        queries = list(queries)
+        if not queries:
+            return
+
+        releases: Dict[int, Future] = {}
+        releases_lock = threading.Lock()
+
+        def get_release(release_id: int) -> Optional[Dict]:
+            with releases_lock:
+                release = releases.get(release_id)
+                owner = release is None
+                if owner:
+                    release = releases[release_id] = Future()
+            if owner:
+                release.set_result(self._get_release_details(release_id))
+            return release.result()
+
+        executor = ThreadPoolExecutor(max_workers=min(max_workers, len(queries)))
+        try:
+            futures = {executor.submit(self._search_releases, artist, title, get_release): position
+                       for position, (artist, title) in enumerate(queries)}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            # Stop queued searches if the caller stops consuming results
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        discogs_logger.info(f"Searched {len(queries)} tracks, fetching {len(releases)} distinct releases")
+
+    def _search_releases(self, artist: str, title: str,
+                         get_release: Callable[[int], Optional[Dict]]) -> List[Dict]:
         # Clean search terms
         clean_artist = self._clean_search_term(artist)
         clean_title = self._clean_search_term(title)
@@ -50,44 +397,21 @@ class DiscogsClient:
         try:
             discogs_logger.info(f"Searching Discogs for: {search_query}")
 
-            url = f"{self.base_url}/database/search"
             params = {
                 'q': search_query,
                 'type': 'release',
                 'per_page': 25  # Reduce to 25 to be more conservative
             }
-
-            discogs_logger.info(f"Making request to: {url} with params: {params}")
-            discogs_logger.info(f"Headers: {self.headers}")
-
-            response = requests.get(url, headers=self.headers, params=params, timeout=30)
-
-            # Log the response details for debugging
-            discogs_logger.info(f"Response status: {response.status_code}")
-            discogs_logger.info(f"Response headers: {dict(response.headers)}")
-
-            if response.status_code == 401:
-                discogs_logger.error("401 Unauthorized - Check User-Agent or consider using API token")
-                discogs_logger.error(f"Response text: {response.text}")
-                return []
-
-            if response.status_code == 429:
-                discogs_logger.warning("Rate limited - waiting longer before retry")
-                time.sleep(5)  # Wait 5 seconds for rate limit
+            search_results = self._get_json('/database/search', f"search:{search_query.casefold()}", params)
+            if search_results is None:
                 return []
 
-            response.raise_for_status()
-
-            # Rate limiting
-            time.sleep(self.rate_limit_delay)
-
-            search_results = response.json()
             releases_with_tracks = []
 
             # Get detailed track info for each release
             for result in search_results.get('results', []):
                 if self._is_relevant_result(result, clean_artist, clean_title):
-                    release_details = self._get_release_details(result['id'])
+                    release_details = get_release(result['id'])
                     if release_details:
                         track_matches = self._find_matching_tracks(
                             release_details, clean_artist, clean_title
@@ -136,13 +460,7 @@ class DiscogsClient:
     def _get_release_details(self, release_id: int) -> Optional[Dict]:
         """Get detailed information about a specific release."""
         try:
-            url = f"{self.base_url}/releases/{release_id}"
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-
-            time.sleep(self.rate_limit_delay)
-
-            return response.json()
+            return self._get_json(f"/releases/{release_id}", f"release:{release_id}")
 
         except Exception as e:
             discogs_logger.error(f"Error getting release details for ID {release_id}: {e}")
@@ -237,7 +555,7 @@ def find_extended_versions(artist: str, title: str, current_duration: int, api_t
     Find extended versions of a track using Discogs API.
     """
 
-    client = DiscogsClient(api_token=DISCOGS_API_TOKEN)
+    client = DiscogsClient(api_token=api_token or DISCOGS_API_TOKEN)
     all_versions = client.search_releases(artist, title)
 
     # Filter for versions longer than current
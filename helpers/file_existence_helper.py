@@ -0,0 +1,171 @@
+"""
+Batched file-existence checks backed by a cached directory listing.
+
+Checking thousands of mapped files one ``os.path.exists`` call at a time is slow on
+external drives and SMB shares, where every stat is a round trip. The helpers here
+group paths by directory, list each directory once with ``os.scandir`` and keep the
+listing around for a short time. A cached listing is reused without touching the disk
+while it is younger than the TTL; after that the directory is stat'ed once and the
+listing is only re-read when the directory mtime has changed. Paths missing from a
+reused listing are confirmed with one directory stat, so files written since the
+listing was taken are still found.
+"""
+import os
+import threading
+import time
+from typing import Dict, FrozenSet, Iterable, Optional, Set
+
+from utils.logger import setup_logger
+
+existence_logger = setup_logger('file_existence_helper', 'sql', 'file_existence.log')
+
+# Seconds a listing is trusted before the directory mtime is checked again
+DEFAULT_LISTING_TTL = float(os.getenv('FILE_LISTING_CACHE_TTL', '30'))
+
+
+class _DirectoryListing:
+    """Names found in one directory, with the mtime they were read at."""
+
+    __slots__ = ('names', 'mtime', 'checked_at')
+
+    def __init__(self, names: FrozenSet[str], mtime: float, checked_at: float):
+        self.names = names
+        self.mtime = mtime
+        self.checked_at = checked_at
+
+
+class DirectoryListingCache:
+    """
+    Cache of directory listings used to answer file-existence questions in bulk.
+
+    Names are stored through ``os.path.normcase`` so lookups follow the same case rules
+    as ``os.path.exists`` on the current platform.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_LISTING_TTL):
+        self.ttl = ttl
+        self._listings: Dict[str, _DirectoryListing] = {}
+        self._lock = threading.Lock()
+        self.stats = {'listings_read': 0, 'listings_reused': 0, 'fallback_checks': 0}
+
+    def clear(self):
+        """Drop every cached listing."""
+        with self._lock:
+            self._listings.clear()
+
+    def invalidate(self, dir_path: str):
+        """Drop the cached listing for a single directory."""
+        with self._lock:
+            self._listings.pop(os.path.normcase(os.path.normpath(dir_path)), None)
+
+    def get_names(self, dir_path: str, max_age: Optional[float] = None) -> Optional[FrozenSet[str]]:
+        """
+        Get the (normcased) entry names of a directory.
+
+        Args:
+            dir_path: Directory to list
+            max_age: Seconds a listing may be reused without re-checking the directory
+                mtime (defaults to the cache TTL, 0 always re-checks)
+
+        Returns:
+            Frozen set of names, or None if the directory does not exist or can't be listed
+        """
+        key = os.path.normcase(os.path.normpath(dir_path))
+        now = time.monotonic()
+        max_age = self.ttl if max_age is None else max_age
+
+        with self._lock:
+            listing = self._listings.get(key)
+
+        if listing is not None and now - listing.checked_at < max_age:
+            self.stats['listings_reused'] += 1
+            return listing.names
+
+        try:
+            mtime = os.stat(dir_path).st_mtime
+        except OSError:
+            self.invalidate(dir_path)
+            return None
+
+        if listing is not None and listing.mtime == mtime:
+            listing.checked_at = now
+            self.stats['listings_reused'] += 1
+            return listing.names
+
+        try:
+            with os.scandir(dir_path) as entries:
+                names = frozenset(os.path.normcase(entry.name) for entry in entries)
+        except OSError as e:
+            existence_logger.warning(f"Could not list directory {dir_path}: {e}")
+            self.invalidate(dir_path)
+            return None
+
+        self.stats['listings_read'] += 1
+        with self._lock:
+            self._listings[key] = _DirectoryListing(names, mtime, now)
+        return names
+
+    def existing_paths(self, file_paths: Iterable[str], max_age: Optional[float] = None) -> Set[str]:
+        """
+        Check existence of many files, listing each parent directory at most once.
+
+        Args:
+            file_paths: File paths to check
+            max_age: Passed to ``get_names``; use 0 when deletions must be seen immediately
+
+        Returns:
+            Set of the given paths (as passed in) that exist
+        """
+        files_by_dir: Dict[str, list] = {}
+        for file_path in file_paths:
+            if not file_path:
+                continue
+            files_by_dir.setdefault(os.path.dirname(file_path), []).append(file_path)
+
+        existing = set()
+        for dir_path, files_in_dir in files_by_dir.items():
+            names = self.get_names(dir_path or os.curdir, max_age)
+            if names is None:
+                # Directory missing or unreadable; a listing failure (e.g. permissions on a
+                # share) shouldn't mark files as gone, so fall back to individual checks
+                if dir_path and not os.path.isdir(dir_path):
+                    continue
+                self.stats['fallback_checks'] += len(files_in_dir)
+                existing.update(p for p in files_in_dir if os.path.exists(p))
+                continue
+
+            missing = [p for p in files_in_dir if os.path.normcase(os.path.basename(p)) not in names]
+            if missing and max_age != 0:
+                # A listing reused within the TTL may predate a file that was just written;
+                # one stat of the directory tells us whether it needs to be read again
+                names = self.get_names(dir_path or os.curdir, max_age=0) or frozenset()
+                missing = [p for p in missing if os.path.normcase(os.path.basename(p)) not in names]
+
+            existing.update(files_in_dir)
+            existing.difference_update(missing)
+
+        return existing
+
+
+_default_cache = DirectoryListingCache()
+
+
+def get_directory_listing_cache() -> DirectoryListingCache:
+    """Get the process-wide directory listing cache."""
+    return _default_cache
+
+
+def batch_check_file_existence(file_paths: Iterable[str], max_age: Optional[float] = None) -> Set[str]:
+    """
+    Check existence of multiple files efficiently.
+
+    Args:
+        file_paths: File paths to check
+        max_age: Seconds a cached directory listing may be reused without a directory stat
+            (defaults to the cache TTL)
+
+    Returns:
+        Set of file paths that exist
+    """
+    return _default_cache.existing_paths(file_paths, max_age)
+
@@ -0,0 +1,206 @@
+"""
+In-memory index of the audio files in a music library directory.
+
+Looking a file up by name with ``os.walk`` costs a full directory scan per lookup, which
+turns loops over thousands of tracks into hours of disk access. A LibraryIndex walks the
+library once and answers name lookups from dictionaries; build one per operation and
+pass it to every lookup made during that operation.
+
+Files are indexed by exact (case-folded) name, by normalized name (punctuation dropped,
+whitespace collapsed, so "Artist - Title" and "artist title" share a key) and by the
+words of their name for fuzzy searches.
+"""
+import os
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from api.constants.file_extensions import SUPPORTED_AUDIO_EXTENSIONS
+from utils.logger import setup_logger
+
+library_index_logger = setup_logger('library_index_helper', 'sql', 'library_index.log')
+
+# Candidates returned by a word search when no limit is given
+DEFAULT_SEARCH_LIMIT = 200
+
+_NON_WORD = re.compile(r'[^\w\s]')
+_WORD = re.compile(r'\w+')
+
+
+def normalize_key(text: str) -> str:
+    """Lowercase text, drop punctuation and collapse whitespace ("Artist - Title" -> "artist title")."""
+    return ' '.join(_NON_WORD.sub('', text.lower()).split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase words."""
+    return _WORD.findall(text.lower())
+
+
+class LibraryIndex:
+    """
+    Audio files under a root directory, indexed by name.
+
+    When several files share a name, lookups return the first one in ``os.walk`` order,
+    which is the file a per-lookup walk would have found.
+    """
+
+    def __init__(self, root: str, extensions: Iterable[str] = SUPPORTED_AUDIO_EXTENSIONS):
+        """
+        Initialize a new LibraryIndex and scan the directory.
+
+        Args:
+            root: Root directory of the music library
+            extensions: File extensions (lowercase, with the dot) to include
+        """
+        self.root = root
+        self.extensions = frozenset(extensions)
+        # Paths of every indexed file, in os.walk order
+        self.files: List[str] = []
+        # Lowercase file names without extension, parallel to files
+        self.stems: List[str] = []
+        # Case-folded file name -> first path with that name
+        self.by_name: Dict[str, str] = {}
+        # Case-folded name without extension -> positions in files
+        self.by_stem: Dict[str, List[int]] = {}
+        # normalize_key(name without extension) -> positions in files
+        self.by_normalized: Dict[str, List[int]] = {}
+        # Word -> positions in files of the names containing it
+        self.by_token: Dict[str, List[int]] = {}
+        self.build()
+
+    def build(self) -> 'LibraryIndex':
+        """
+        (Re)scan the root directory.
+
+        Returns:
+            self, for chaining
+        """
+        files = []
+        stems = []
+        by_name = {}
+        by_stem = {}
+        by_normalized = {}
+        by_token = {}
+
+        for root, _, names in os.walk(self.root):
+            for name in names:
+                stem, ext = os.path.splitext(name)
+                if ext.lower() not in self.extensions:
+                    continue
+                position = len(files)
+                path = os.path.join(root, name)
+                files.append(path)
+                stems.append(stem.lower())
+                by_name.setdefault(name.casefold(), path)
+                by_stem.setdefault(stem.casefold(), []).append(position)
+                by_normalized.setdefault(normalize_key(stem), []).append(position)
+                for token in set(tokenize(stem)):
+                    by_token.setdefault(token, []).append(position)
+
+        self.files = files
+        self.stems = stems
+        self.by_name = by_name
+        self.by_stem = by_stem
+        self.by_normalized = by_normalized
+        self.by_token = by_token
+        library_index_logger.info(f"Indexed {len(files)} audio files under {self.root}")
+        return self
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def find_by_name(self, file_name: str) -> Optional[str]:
+        """
+        Find a file by its exact name, ignoring case.
+
+        Args:
+            file_name: File name including extension
+
+        Returns:
+            Full path of the file, or None if no file has that name
+        """
+        return self.by_name.get(file_name.casefold())
+
+    def find_by_stem(self, stem: str, extensions: Iterable[str]) -> Optional[str]:
+        """
+        Find a file by its name without extension, trying extensions in order.
+
+        Args:
+            stem: File name without extension
+            extensions: Extensions to try, in order of preference
+
+        Returns:
+            Full path of the first match, or None
+        """
+        folded_stem = stem.casefold()
+        for ext in extensions:
+            path = self.by_name.get(folded_stem + ext)
+            if path:
+                return path
+        return None
+
+    def _first_with_extension(self, positions: Optional[List[int]], extensions: Optional[Iterable[str]]) -> Optional[str]:
+        if not positions:
+            return None
+        if extensions is None:
+            return self.files[positions[0]]
+        extensions = tuple(extensions)
+        for position in positions:
+            if self.files[position].lower().endswith(extensions):
+                return self.files[position]
+        return None
+
+    def find_stem(self, stem: str, extensions: Optional[Iterable[str]] = None) -> Optional[str]:
+        """
+        Find the first file whose name without extension equals ``stem``, ignoring case.
+
+        Args:
+            stem: File name without extension
+            extensions: Only consider files with these extensions (default: any indexed)
+
+        Returns:
+            Full path of the file, or None
+        """
+        return self._first_with_extension(self.by_stem.get(stem.casefold()), extensions)
+
+    def find_normalized(self, text: str, extensions: Optional[Iterable[str]] = None) -> Optional[str]:
+        """
+        Find the first file whose normalized name equals ``normalize_key(text)``.
+
+        Args:
+            text: Name to look up, e.g. "Artist - Title"
+            extensions: Only consider files with these extensions (default: any indexed)
+
+        Returns:
+            Full path of the file, or None
+        """
+        return self._first_with_extension(self.by_normalized.get(normalize_key(text)), extensions)
+
+    def search_words(self, text: str, extensions: Optional[Iterable[str]] = None,
+                     limit: int = DEFAULT_SEARCH_LIMIT) -> List[int]:
+        """
+        Find the files sharing the most words with ``text``.
+
+        Only the posting lists of the query's words are read, so the cost depends on how
+        many files share a word with the query rather than on the size of the library.
+
+        Args:
+            text: Query text
+            extensions: Only consider files with these extensions (default: any indexed)
+            limit: Maximum number of candidates
+
+        Returns:
+            Positions in ``files`` of the best candidates, in os.walk order
+        """
+        shared_words = Counter()
+        for token in set(tokenize(text)):
+            shared_words.update(self.by_token.get(token, ()))
+
+        if extensions is not None:
+            extensions = tuple(extensions)
+            shared_words = Counter({position: count for position, count in shared_words.items()
+                                    if self.files[position].lower().endswith(extensions)})
+
+        best = sorted(shared_words, key=lambda position: (-shared_words[position], position))[:limit]
+        return sorted(best)
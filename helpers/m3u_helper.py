@@ -9,6 +9,9 @@ from mutagen.mp3 import MP3
 from mutagen.wave import WAVE
 
 from api.constants.file_extensions import SUPPORTED_AUDIO_EXTENSIONS
+from helpers.file_existence_helper import batch_check_file_existence
+from helpers.library_index_helper import LibraryIndex, normalize_key
+from helpers.m3u_index_helper import get_m3u_index, parse_m3u_file
 from sql.core.unit_of_work import UnitOfWork
 from utils.logger import setup_logger
 
@@ -34,50 +37,11 @@ def build_uri_to_file_mapping_from_database() -> Dict[str, str]:
         # Get all mappings in one query
         uri_to_file_map = uow.file_track_mapping_repository.get_all_active_uri_to_file_mappings()
 
-        # Batch check file existence
-        existing_files = batch_check_file_existence(list(uri_to_file_map.values()))
+    # Batch check file existence outside the transaction, using cached directory listings
+    existing_files = batch_check_file_existence(uri_to_file_map.values())
 
-        # Filter to only existing files
-        return {uri: path for uri, path in uri_to_file_map.items() if path in existing_files}
-
-
-def batch_check_file_existence(file_paths: List[str]) -> Set[str]:
-    """
-    Check existence of multiple files efficiently.
-
-    Args:
-        file_paths: List of file paths to check
-
-    Returns:
-        Set of file paths that exist
-    """
-    existing_files = set()
-
-    # Group files by directory for more efficient checking
-    files_by_dir = {}
-    for file_path in file_paths:
-        dir_path = os.path.dirname(file_path)
-        if dir_path not in files_by_dir:
-            files_by_dir[dir_path] = []
-        files_by_dir[dir_path].append(file_path)
-
-    # Check files directory by directory
-    for dir_path, files_in_dir in files_by_dir.items():
-        if os.path.isdir(dir_path):
-            try:
-                # Get all files in directory at once
-                actual_files = set(os.listdir(dir_path))
-                for file_path in files_in_dir:
-                    filename = os.path.basename(file_path)
-                    if filename in actual_files:
-                        existing_files.add(file_path)
-            except (OSError, PermissionError):
-                # Fall back to individual checks for this directory
-                for file_path in files_in_dir:
-                    if os.path.exists(file_path):
-                        existing_files.add(file_path)
-
-    return existing_files
+    # Filter to only existing files
+    return {uri: path for uri, path in uri_to_file_map.items() if path in existing_files}
 
 
 def get_all_tracks_metadata_by_uri(uris: List[str]) -> Dict[str, Dict[str, Any]]:
@@ -136,7 +100,8 @@ def get_audio_duration(file_path: str) -> int:
         return 0
 
 
-def get_m3u_track_uris_from_file(m3u_path: str, uri_to_file_map: dict) -> set:
+def get_m3u_track_uris_from_file(m3u_path: str, uri_to_file_map: dict,
+                                 file_to_uri_map: Optional[Dict[str, str]] = None) -> set:
     """
     Extract Spotify URIs from an M3U file by examining the referenced files and
     looking them up in the FileTrackMappings table.
@@ -144,34 +109,24 @@ def get_m3u_track_uris_from_file(m3u_path: str, uri_to_file_map: dict) -> set:
     Args:
         m3u_path: Path to the M3U file
         uri_to_file_map: Mapping of URI -> file_path from FileTrackMappings
+        file_to_uri_map: Optional pre-built reverse mapping of normalized file_path -> URI
 
     Returns:
         Set of Spotify URIs found in the referenced files
     """
     track_uris = set()
 
-    if not os.path.exists(m3u_path):
+    playlist_file = parse_m3u_file(m3u_path)
+    if playlist_file is None:
         return track_uris
 
     # Create reverse mapping for efficient lookup
-    file_to_uri_map = {os.path.normpath(file_path): uri for uri, file_path in uri_to_file_map.items()}
+    if file_to_uri_map is None:
+        file_to_uri_map = {os.path.normpath(file_path): uri for uri, file_path in uri_to_file_map.items()}
 
-    try:
-        with open(m3u_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                # Skip comment lines and empty lines
-                if line.startswith('#') or not line.strip():
-                    continue
-
-                # Get the file path and normalize it
-                file_path = os.path.normpath(line.strip())
-
-                # Look up the URI for this file path
-                if file_path in file_to_uri_map:
-                    track_uris.add(file_to_uri_map[file_path])
-
-    except Exception as e:
-        print(f"Error reading M3U file {m3u_path}: {e}")
+    for entry in playlist_file.entries:
+        if entry.file_path and entry.normalized_path in file_to_uri_map:
+            track_uris.add(file_to_uri_map[entry.normalized_path])
 
     return track_uris
 
@@ -227,8 +182,7 @@ def get_m3u_track_ids(m3u_path: str, track_id_map: Optional[Dict[str, str]] = No
                     elif file_ext in ['.wav', '.aiff']:
                         # For WAV/AIFF files, try to find a matching database track
                         with UnitOfWork() as uow:
-                            local_tracks = [t for t in uow.track_repository.get_all() if
-                                            t.track_id.startswith('local_')]
+                            local_tracks = uow.track_repository.iter_all("substr(TrackId, 1, 6) = 'local_'")
 
                             # Try to find a match
                             filename = os.path.basename(file_path)
@@ -274,22 +228,27 @@ def compare_playlist_with_m3u(playlist_id: str, m3u_path: str, master_tracks_dir
 
         # Track which database IDs actually exist locally
         local_db_track_ids = set()
-        for track_id in db_track_ids:
-            # For Spotify tracks, check if they're in the track_id_map
-            if not track_id.startswith('local_'):
-                if track_id in track_id_map:
-                    local_db_track_ids.add(track_id)
-            else:
-                # For local tracks, we need a different approach
-                # Get track details from the database
-                with UnitOfWork() as uow:
+        local_tracks = []
+        with UnitOfWork() as uow:
+            for track_id in db_track_ids:
+                # For Spotify tracks, check if they're in the track_id_map
+                if not track_id.startswith('local_'):
+                    if track_id in track_id_map:
+                        local_db_track_ids.add(track_id)
+                else:
+                    # For local tracks, we need a different approach
+                    # Get track details from the database
                     track = uow.track_repository.get_by_id(track_id)
                     if track:
-                        # Search for the file in the master tracks directory
-                        local_path = find_local_file_path(track.title, track.artists, master_tracks_dir)
-                        if local_path:
-                            # The track exists locally, so add it to our set
-                            local_db_track_ids.add(track_id)
+                        local_tracks.append((track_id, track.title, track.artists))
+
+        # Search for the local tracks' files in the master tracks directory with one scan
+        local_paths = find_local_file_paths([(title, artists) for _, title, artists in local_tracks],
+                                            master_tracks_dir)
+        for (track_id, _, _), local_path in zip(local_tracks, local_paths):
+            if local_path:
+                # The track exists locally, so add it to our set
+                local_db_track_ids.add(track_id)
 
         # Now we have:
         # db_track_ids: All tracks in the playlist according to the database
@@ -633,21 +592,29 @@ def generate_multiple_playlists(
     return results
 
 
-def find_local_file_path(title: str, artists: str, music_dir: str) -> Optional[str]:
+def find_local_file_path(title: str, artists: str, music_dir: str,
+                         library_index: Optional[LibraryIndex] = None) -> Optional[str]:
     """
     Try to find a local file in the music directory that matches the given title and artist.
     Uses multiple matching strategies to find the most likely file.
 
+    Exact and normalized file names are looked up directly in the library index; the
+    substring and fuzzy strategies only look at files sharing words with the track.
+
     Args:
         title: The track title to search for
         artists: The artist name(s) to search for
         music_dir: The directory to search in
+        library_index: Index of music_dir to reuse across calls (built when not given)
 
     Returns:
         Path to the matching file, or None if not found
     """
     import Levenshtein
-    import re
+
+    if library_index is None:
+        library_index = LibraryIndex(music_dir)
+    mp3_only = ('.mp3',)
 
     # Clean up title and artists for comparison
     title_clean = title.lower().strip()
@@ -656,15 +623,6 @@ def find_local_file_path(title: str, artists: str, music_dir: str) -> Optional[s
     # Try to extract primary artist
     primary_artist = artists_clean.split(',')[0].strip()
 
-    # Find all MP3 files in the directory tree first
-    all_mp3_files = []
-    for root, _, files in os.walk(music_dir):
-        for file in files:
-            if file.lower().endswith('.mp3'):
-                file_path = os.path.join(root, file)
-                file_name = os.path.splitext(file)[0].lower()
-                all_mp3_files.append((file_path, file_name))
-
     # Common patterns to try for exact matches
     patterns = [
         f"{primary_artist} - {title_clean}",
@@ -673,28 +631,45 @@ def find_local_file_path(title: str, artists: str, music_dir: str) -> Optional[s
         title_clean,
     ]
 
-    # Step 1: Try exact matches with common patterns
-    for file_path, file_name in all_mp3_files:
+    # Step 1: Files named exactly after one of the patterns
+    for pattern in patterns:
+        file_path = library_index.find_stem(pattern, mp3_only)
+        if file_path:
+            return file_path
+
+    # Step 2: Same, ignoring special characters and spacing
+    for pattern in (f"{primary_artist} {title_clean}", f"{title_clean} {primary_artist}"):
+        file_path = library_index.find_normalized(pattern, mp3_only)
+        if file_path:
+            return file_path
+
+    # The remaining strategies only consider files sharing words with the track
+    candidates = [(library_index.files[position], library_index.stems[position])
+                  for position in library_index.search_words(f"{primary_artist} {title_clean}", mp3_only)]
+
+    # Step 3: File names containing one of the patterns
+    for file_path, file_name in candidates:
         for pattern in patterns:
             if pattern in file_name:
                 return file_path
 
-    # Step 2: Try more flexible matching - remove special characters and spaces
-    clean_title = re.sub(r'[^\w\s]', '', title_clean).strip()
-    clean_artist = re.sub(r'[^\w\s]', '', primary_artist).strip()
+    # Step 4: Try more flexible matching - remove special characters and spaces
+    clean_title = normalize_key(title_clean)
+    clean_artist = normalize_key(primary_artist)
 
-    for file_path, file_name in all_mp3_files:
-        clean_filename = re.sub(r'[^\w\s]', '', file_name).strip()
+    for file_path, file_name in candidates:
+        clean_filename = normalize_key(file_name)
         if f"{clean_artist} {clean_title}" in clean_filename:
             return file_path
         if f"{clean_title} {clean_artist}" in clean_filename:
             return file_path
 
-    # Step 3: If still no match, try fuzzy matching
+    # Step 5: If still no match, try fuzzy matching
     best_match = None
     best_score = 0.7  # Minimum similarity threshold
+    title_pattern = re.compile(r'\b' + re.escape(title_clean) + r'\b')
 
-    for file_path, file_name in all_mp3_files:
+    for file_path, file_name in candidates:
         # Try to match "{artist} - {title}" pattern
         expected = f"{primary_artist} - {title_clean}"
         similarity = Levenshtein.ratio(expected, file_name)
@@ -715,7 +690,7 @@ def find_local_file_path(title: str, artists: str, music_dir: str) -> Optional[s
         if len(title_clean) > 4:
             if title_clean in file_name:
                 # Bonus if the title is found as a distinct word or phrase
-                if re.search(r'\b' + re.escape(title_clean) + r'\b', file_name):
+                if title_pattern.search(file_name):
                     similarity = 0.85  # Higher confidence for exact title match
                     if similarity > best_score:
                         best_score = similarity
@@ -724,6 +699,27 @@ def find_local_file_path(title: str, artists: str, music_dir: str) -> Optional[s
     return best_match
 
 
+def find_local_file_paths(tracks: List[Tuple[str, str]], music_dir: str,
+                          library_index: Optional[LibraryIndex] = None) -> List[Optional[str]]:
+    """
+    Resolve many (title, artists) pairs to local files with a single library scan.
+
+    Args:
+        tracks: (title, artists) pairs
+        music_dir: The directory to search in
+        library_index: Index of music_dir to reuse (built when not given)
+
+    Returns:
+        Path of the matching file (or None) for each pair, in order
+    """
+    if not tracks:
+        return []
+
+    if library_index is None:
+        library_index = LibraryIndex(music_dir)
+    return [find_local_file_path(title, artists, music_dir, library_index) for title, artists in tracks]
+
+
 # Use existing functions from file_helper instead of duplicating code
 def sanitize_filename(name: str, preserve_spaces: bool = True) -> str:
     """
@@ -778,48 +774,7 @@ def search_tracks_in_m3u_files(m3u_directory: str, track_paths: List[str]) -> Di
     Returns:
         Dictionary mapping track paths to lists of M3U files that contain them
     """
-    import os
-
-    # Normalize track paths for comparison
-    normalized_tracks = {}
-    for track_path in track_paths:
-        normalized_path = os.path.normpath(track_path).lower()
-        normalized_tracks[normalized_path] = track_path
-
-    # Results dictionary: track_path -> [list of m3u files containing it]
-    results = {track: [] for track in track_paths}
-
-    # Search all M3U files
-    for root, dirs, files in os.walk(m3u_directory):
-        for filename in files:
-            if not filename.lower().endswith('.m3u'):
-                continue
-
-            m3u_path = os.path.join(root, filename)
-            relative_m3u_path = os.path.relpath(m3u_path, m3u_directory)
-
-            try:
-                with open(m3u_path, 'r', encoding='utf-8') as f:
-                    for line_num, line in enumerate(f, 1):
-                        # Skip comment lines and empty lines
-                        if line.startswith('#') or not line.strip():
-                            continue
-
-                        # Get the file path and normalize it
-                        file_path = line.strip()
-                        normalized_file_path = os.path.normpath(file_path).lower()
-
-                        # Check if this matches any of our target tracks
-                        if normalized_file_path in normalized_tracks:
-                            original_track = normalized_tracks[normalized_file_path]
-                            if relative_m3u_path not in results[original_track]:
-                                results[original_track].append(relative_m3u_path)
-
-            except Exception as e:
-                m3u_logger.error(f"Error reading M3U file {m3u_path}: {e}")
-                continue
-
-    return results
+    return get_m3u_index(m3u_directory).find_playlists_containing_files(track_paths)
 
 
 def search_tracks_by_title_in_m3u_files(m3u_directory: str, track_titles: List[str]) -> Dict[str, List[Dict[str, str]]]:
@@ -833,60 +788,4 @@ def search_tracks_by_title_in_m3u_files(m3u_directory: str, track_titles: List[s
     Returns:
         Dictionary mapping track titles to lists of matches with M3U file info
     """
-    import os
-
-    # Normalize track titles for comparison
-    normalized_titles = {}
-    for title in track_titles:
-        normalized_title = title.lower().strip()
-        normalized_titles[normalized_title] = title
-
-    # Results dictionary: track_title -> [list of matches]
-    results = {title: [] for title in track_titles}
-
-    # Search all M3U files
-    for root, dirs, files in os.walk(m3u_directory):
-        for filename in files:
-            if not filename.lower().endswith('.m3u'):
-                continue
-
-            m3u_path = os.path.join(root, filename)
-            relative_m3u_path = os.path.relpath(m3u_path, m3u_directory)
-
-            try:
-                with open(m3u_path, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-
-                    for i, line in enumerate(lines):
-                        # Look for EXTINF lines which contain track info
-                        if line.startswith('#EXTINF:'):
-                            # Parse EXTINF line: #EXTINF:duration,Artist - Title
-                            try:
-                                info_part = line[8:].split(',', 1)
-                                if len(info_part) > 1:
-                                    track_info = info_part[1].strip()
-
-                                    # Get the file path from the next line
-                                    file_path = ""
-                                    if i + 1 < len(lines) and not lines[i + 1].startswith('#'):
-                                        file_path = lines[i + 1].strip()
-
-                                    # Check if any of our target titles are in this track info
-                                    track_info_lower = track_info.lower()
-                                    for normalized_title, original_title in normalized_titles.items():
-                                        if normalized_title in track_info_lower:
-                                            results[original_title].append({
-                                                'playlist': relative_m3u_path,
-                                                'track_info': track_info,
-                                                'file_path': file_path,
-                                                'playlist_full_path': m3u_path
-                                            })
-                            except Exception as e:
-                                m3u_logger.error(f"Error parsing EXTINF line in {m3u_path}: {e}")
-                                continue
-
-            except Exception as e:
-                m3u_logger.error(f"Error reading M3U file {m3u_path}: {e}")
-                continue
-
-    return results
+    return get_m3u_index(m3u_directory).find_by_title(track_titles)
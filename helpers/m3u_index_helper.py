@@ -0,0 +1,542 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from utils.logger import setup_logger
+
+m3u_index_logger = setup_logger('m3u_index_helper', 'm3u_validation', 'm3u_index.log')
+
+# Bump when the persisted index format changes
+INDEX_CACHE_VERSION = 1
+
+project_root = Path(__file__).resolve().parent.parent
+
+# Parsed M3U files shared by every index instance: {m3u_path: M3UPlaylistFile}
+_parsed_file_cache: Dict[str, 'M3UPlaylistFile'] = {}
+_parsed_file_cache_lock = threading.RLock()
+
+# One index per M3U root directory: {normalized_root: M3UIndex}
+_index_registry: Dict[str, 'M3UIndex'] = {}
+_index_registry_lock = threading.RLock()
+
+
+@dataclass
+class M3UEntry:
+    """A single track reference inside an M3U file."""
+    file_path: str
+    normalized_path: str
+    duration: int = 0
+    track_info: str = ""
+    has_extinf: bool = False
+    line_number: int = 0
+
+
+@dataclass
+class M3UPlaylistFile:
+    """Parsed contents of one M3U file."""
+    m3u_path: str
+    folder_path: str
+    playlist_name: str
+    mtime: float
+    entries: List[M3UEntry] = field(default_factory=list)
+
+    @property
+    def relative_path(self) -> str:
+        """Path of the M3U file relative to its index root."""
+        file_name = os.path.basename(self.m3u_path)
+        return os.path.join(self.folder_path, file_name) if self.folder_path else file_name
+
+    def get_file_paths(self) -> List[str]:
+        """Get the referenced file paths in playlist order, skipping EXTINF lines without a path."""
+        return [entry.file_path for entry in self.entries if entry.file_path]
+
+
+def _read_m3u_lines(m3u_path: str) -> List[str]:
+    """Read an M3U file, falling back to latin-1 when it is not valid UTF-8."""
+    try:
+        with open(m3u_path, 'r', encoding='utf-8') as f:
+            return f.read().splitlines()
+    except UnicodeDecodeError:
+        with open(m3u_path, 'r', encoding='latin-1') as f:
+            return f.read().splitlines()
+
+
+def _parse_extinf(line: str) -> Tuple[int, str]:
+    """
+    Parse an EXTINF line of the form '#EXTINF:duration,Artist - Title'.
+
+    Returns:
+        Tuple of (duration_seconds, track_info)
+    """
+    info_parts = line[8:].split(',', 1)
+    try:
+        duration = int(float(info_parts[0]))
+    except ValueError:
+        duration = 0
+    track_info = info_parts[1].strip() if len(info_parts) > 1 else ""
+    return duration, track_info
+
+
+def parse_m3u_lines(lines: List[str]) -> List[M3UEntry]:
+    """
+    Parse M3U lines into entries.
+
+    An EXTINF line is attached to the next non-empty line if that line is a path.
+    If it is followed by another comment instead, the EXTINF is kept with an empty path.
+
+    Args:
+        lines: Raw lines of the M3U file
+
+    Returns:
+        List of M3UEntry objects in file order
+    """
+    entries = []
+    pending_extinf = None
+
+    for line_number, raw_line in enumerate(lines, 1):
+        line = raw_line.strip()
+        if not line:
+            continue
+
+        if line.startswith('#'):
+            if pending_extinf is not None:
+                entries.append(pending_extinf)
+                pending_extinf = None
+
+            if line.startswith('#EXTINF:'):
+                duration, track_info = _parse_extinf(line)
+                pending_extinf = M3UEntry(
+                    file_path="",
+                    normalized_path="",
+                    duration=duration,
+                    track_info=track_info,
+                    has_extinf=True,
+                    line_number=line_number
+                )
+            continue
+
+        if pending_extinf is not None:
+            entry = pending_extinf
+            pending_extinf = None
+        else:
+            entry = M3UEntry(file_path="", normalized_path="", line_number=line_number)
+
+        entry.file_path = line
+        entry.normalized_path = os.path.normpath(line)
+        entries.append(entry)
+
+    if pending_extinf is not None:
+        entries.append(pending_extinf)
+
+    return entries
+
+
+def parse_m3u_file(m3u_path: str, folder_path: Optional[str] = None) -> Optional[M3UPlaylistFile]:
+    """
+    Parse an M3U file, reusing the cached result while the file's mtime is unchanged.
+
+    Args:
+        m3u_path: Path to the M3U file
+        folder_path: Folder of the M3U file relative to its index root ('' for the root), or
+            None when the caller doesn't know it; the cached folder is then kept as is
+
+    Returns:
+        M3UPlaylistFile, or None if the file can't be read
+    """
+    try:
+        mtime = os.path.getmtime(m3u_path)
+    except OSError:
+        with _parsed_file_cache_lock:
+            _parsed_file_cache.pop(m3u_path, None)
+        return None
+
+    with _parsed_file_cache_lock:
+        cached = _parsed_file_cache.get(m3u_path)
+    if cached is not None and cached.mtime == mtime:
+        if folder_path is None or cached.folder_path == folder_path:
+            return cached
+        # Same contents seen from the index root: keep the entries, record the folder once
+        relocated = replace(cached, folder_path=folder_path)
+        with _parsed_file_cache_lock:
+            _parsed_file_cache[m3u_path] = relocated
+        return relocated
+
+    try:
+        entries = parse_m3u_lines(_read_m3u_lines(m3u_path))
+    except Exception as e:
+        m3u_index_logger.error(f"Error reading M3U file {m3u_path}: {e}")
+        return None
+
+    parsed = M3UPlaylistFile(
+        m3u_path=m3u_path,
+        folder_path=folder_path or "",
+        playlist_name=os.path.splitext(os.path.basename(m3u_path))[0],
+        mtime=mtime,
+        entries=entries
+    )
+
+    with _parsed_file_cache_lock:
+        _parsed_file_cache[m3u_path] = parsed
+
+    return parsed
+
+
+def _tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens for the title index."""
+    return re.findall(r'\w+', text.lower())
+
+
+def _get_index_cache_path(m3u_root: str) -> str:
+    """Get the file used to persist the parsed M3U files of a root directory."""
+    cache_dir = os.getenv('M3U_INDEX_CACHE_DIR') or str(project_root / "data" / "m3u_index")
+    root_key = hashlib.md5(os.path.normcase(os.path.abspath(m3u_root)).encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, f"{root_key}.json")
+
+
+def _load_persisted_files(m3u_root: str) -> int:
+    """
+    Load persisted parsed M3U files for a root into the in-memory cache.
+    Stale entries are harmless: parse_m3u_file re-parses anything whose mtime changed.
+
+    Returns:
+        Number of files loaded
+    """
+    cache_path = _get_index_cache_path(m3u_root)
+    if not os.path.exists(cache_path):
+        return 0
+
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except Exception as e:
+        m3u_index_logger.warning(f"Could not load M3U index cache {cache_path}: {e}")
+        return 0
+
+    if data.get('version') != INDEX_CACHE_VERSION:
+        return 0
+
+    loaded = 0
+    with _parsed_file_cache_lock:
+        for m3u_path, file_data in data.get('files', {}).items():
+            if m3u_path in _parsed_file_cache:
+                continue
+            _parsed_file_cache[m3u_path] = M3UPlaylistFile(
+                m3u_path=m3u_path,
+                folder_path=file_data['folder_path'],
+                playlist_name=file_data['playlist_name'],
+                mtime=file_data['mtime'],
+                entries=[
+                    M3UEntry(
+                        file_path=file_path,
+                        normalized_path=os.path.normpath(file_path) if file_path else "",
+                        duration=duration,
+                        track_info=track_info,
+                        has_extinf=bool(has_extinf),
+                        line_number=line_number
+                    )
+                    for file_path, duration, track_info, has_extinf, line_number in file_data['entries']
+                ]
+            )
+            loaded += 1
+
+    return loaded
+
+
+def _persist_files(m3u_root: str, playlist_files: List['M3UPlaylistFile']) -> None:
+    """Persist parsed M3U files so later processes only re-parse files whose mtime changed."""
+    cache_path = _get_index_cache_path(m3u_root)
+    data = {
+        'version': INDEX_CACHE_VERSION,
+        'root': m3u_root,
+        'files': {
+            playlist_file.m3u_path: {
+                'folder_path': playlist_file.folder_path,
+                'playlist_name': playlist_file.playlist_name,
+                'mtime': playlist_file.mtime,
+                'entries': [
+                    [e.file_path, e.duration, e.track_info, int(e.has_extinf), e.line_number]
+                    for e in playlist_file.entries
+                ]
+            }
+            for playlist_file in playlist_files
+        }
+    }
+
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        # Refreshes run on request threads; each writer needs its own temp file
+        temp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp_path, cache_path)
+    except Exception as e:
+        m3u_index_logger.warning(f"Could not save M3U index cache {cache_path}: {e}")
+
+
+class M3UIndex:
+    """
+    Index over every M3U file below a root directory.
+    Each file is parsed once and re-parsed only when its mtime changes.
+
+    Also keeps inverted indexes that are updated incrementally on refresh:
+    normalized file path -> M3U files, and title token -> (M3U file, entry index).
+    """
+
+    def __init__(self, m3u_root: str, persist: bool = True):
+        """
+        Initialize a new M3UIndex.
+
+        Args:
+            m3u_root: Root directory containing M3U files
+            persist: Whether to save parsed files to disk after a refresh that changed something
+        """
+        self.m3u_root = m3u_root
+        self.persist = persist
+        self.playlists: Dict[str, M3UPlaylistFile] = {}
+        self.folders: List[str] = []
+        self._path_postings: Dict[str, Dict[str, None]] = {}
+        self._token_postings: Dict[str, Set[Tuple[str, int]]] = {}
+        self._lock = threading.RLock()
+
+    def refresh(self) -> 'M3UIndex':
+        """
+        Re-scan the root directory, parsing and re-indexing only new or modified M3U files.
+
+        Returns:
+            self, for chaining
+        """
+        playlists = {}
+        folders = []
+
+        if os.path.isdir(self.m3u_root):
+            for root, dirs, files in os.walk(self.m3u_root):
+                rel_path = os.path.relpath(root, self.m3u_root)
+                if rel_path == '.':
+                    rel_path = ''
+                else:
+                    folders.append(rel_path)
+
+                for file in files:
+                    if not file.lower().endswith('.m3u'):
+                        continue
+                    m3u_path = os.path.join(root, file)
+                    parsed = parse_m3u_file(m3u_path, rel_path)
+                    if parsed is not None:
+                        playlists[m3u_path] = parsed
+
+        with self._lock:
+            removed_paths = set(self.playlists) - set(playlists)
+            changed_files = [
+                parsed for m3u_path, parsed in playlists.items()
+                if self.playlists.get(m3u_path) is not parsed
+            ]
+
+            for m3u_path in removed_paths:
+                self._remove_postings(self.playlists[m3u_path])
+            for parsed in changed_files:
+                previous = self.playlists.get(parsed.m3u_path)
+                if previous is not None:
+                    self._remove_postings(previous)
+                self._add_postings(parsed)
+
+            self.playlists = playlists
+            self.folders = folders
+
+        if removed_paths:
+            with _parsed_file_cache_lock:
+                for m3u_path in removed_paths:
+                    _parsed_file_cache.pop(m3u_path, None)
+
+        if self.persist and (removed_paths or changed_files):
+            _persist_files(self.m3u_root, list(playlists.values()))
+
+        m3u_index_logger.info(f"Indexed {len(playlists)} M3U files under {self.m3u_root} "
+                              f"({len(changed_files)} re-indexed, {len(removed_paths)} removed)")
+        return self
+
+    def _add_postings(self, playlist_file: M3UPlaylistFile) -> None:
+        """Add a parsed M3U file to the inverted indexes."""
+        m3u_path = playlist_file.m3u_path
+        for entry_index, entry in enumerate(playlist_file.entries):
+            if entry.file_path:
+                self._path_postings.setdefault(entry.normalized_path.lower(), {})[m3u_path] = None
+            if entry.has_extinf and entry.track_info:
+                for token in set(_tokenize(entry.track_info)):
+                    self._token_postings.setdefault(token, set()).add((m3u_path, entry_index))
+
+    def _remove_postings(self, playlist_file: M3UPlaylistFile) -> None:
+        """Remove a parsed M3U file from the inverted indexes."""
+        m3u_path = playlist_file.m3u_path
+        for entry_index, entry in enumerate(playlist_file.entries):
+            if entry.file_path:
+                key = entry.normalized_path.lower()
+                postings = self._path_postings.get(key)
+                if postings is not None:
+                    postings.pop(m3u_path, None)
+                    if not postings:
+                        del self._path_postings[key]
+            if entry.has_extinf and entry.track_info:
+                for token in set(_tokenize(entry.track_info)):
+                    postings = self._token_postings.get(token)
+                    if postings is not None:
+                        postings.discard((m3u_path, entry_index))
+                        if not postings:
+                            del self._token_postings[token]
+
+    def get_playlist_files(self) -> List[M3UPlaylistFile]:
+        """Get all indexed M3U files in directory walk order."""
+        with self._lock:
+            return list(self.playlists.values())
+
+    def get_by_path(self, m3u_path: str) -> Optional[M3UPlaylistFile]:
+        """
+        Look up a parsed M3U file by its path.
+
+        Args:
+            m3u_path: Path to the M3U file
+
+        Returns:
+            M3UPlaylistFile, or None if the file isn't indexed
+        """
+        with self._lock:
+            playlist_file = self.playlists.get(m3u_path)
+            if playlist_file is None:
+                playlist_file = self.playlists.get(os.path.join(self.m3u_root, m3u_path))
+        return playlist_file
+
+    def get_by_playlist(self, playlist_name: str) -> Optional[M3UPlaylistFile]:
+        """
+        Look up a parsed M3U file by playlist name (the file name without extension).
+        If several folders contain the same name, the last one found wins.
+
+        Args:
+            playlist_name: Playlist name to look up
+
+        Returns:
+            M3UPlaylistFile, or None if no M3U file has that name
+        """
+        return self.get_playlists_by_name().get(playlist_name)
+
+    def get_playlists_by_name(self) -> Dict[str, M3UPlaylistFile]:
+        """Get all indexed M3U files keyed by playlist name."""
+        return {playlist_file.playlist_name: playlist_file for playlist_file in self.get_playlist_files()}
+
+    def get_playlist_names(self) -> List[str]:
+        """Get the names of all indexed playlists."""
+        return [playlist_file.playlist_name for playlist_file in self.get_playlist_files()]
+
+    def find_playlists_containing_files(self, track_paths: List[str]) -> Dict[str, List[str]]:
+        """
+        Look up which M3U files reference each of the given track paths.
+        Paths are compared normalized and case-insensitively.
+
+        Args:
+            track_paths: List of track file paths
+
+        Returns:
+            Dictionary mapping each track path to a list of relative M3U paths
+        """
+        results = {}
+        with self._lock:
+            for track_path in track_paths:
+                m3u_paths = self._path_postings.get(os.path.normpath(track_path).lower(), {})
+                results[track_path] = [self.playlists[m3u_path].relative_path for m3u_path in m3u_paths]
+        return results
+
+    def _get_title_candidates(self, title: str) -> Optional[Set[Tuple[str, int]]]:
+        """
+        Get the (m3u_path, entry_index) pairs that might contain the title as a substring.
+        Every word of the title must be a substring of some token of the entry.
+
+        Returns:
+            Set of candidates, or None if the title has no word characters (scan everything)
+        """
+        tokens = set(_tokenize(title))
+        if not tokens:
+            return None
+
+        candidates = None
+        for token in tokens:
+            token_candidates = set()
+            for indexed_token, postings in self._token_postings.items():
+                if token in indexed_token:
+                    token_candidates |= postings
+            candidates = token_candidates if candidates is None else candidates & token_candidates
+            if not candidates:
+                break
+
+        return candidates
+
+    def find_by_title(self, titles: List[str], case_sensitive: bool = False) -> Dict[str, List[Dict[str, str]]]:
+        """
+        Look up EXTINF entries whose track info contains each of the given titles.
+
+        Args:
+            titles: Titles (or any substring of "Artist - Title") to search for
+            case_sensitive: Whether to match case-sensitively
+
+        Returns:
+            Dictionary mapping each title to a list of matches with M3U file info
+        """
+        results = {title: [] for title in titles}
+
+        with self._lock:
+            playlist_order = {m3u_path: position for position, m3u_path in enumerate(self.playlists)}
+
+            for title in titles:
+                search_term = title if case_sensitive else title.lower().strip()
+                candidates = self._get_title_candidates(search_term)
+                if candidates is None:
+                    candidates = {
+                        (m3u_path, entry_index)
+                        for m3u_path, playlist_file in self.playlists.items()
+                        for entry_index in range(len(playlist_file.entries))
+                    }
+
+                for m3u_path, entry_index in sorted(candidates, key=lambda c: (playlist_order[c[0]], c[1])):
+                    playlist_file = self.playlists[m3u_path]
+                    entry = playlist_file.entries[entry_index]
+                    if not entry.has_extinf or not entry.track_info:
+                        continue
+
+                    track_info = entry.track_info if case_sensitive else entry.track_info.lower()
+                    if search_term in track_info:
+                        results[title].append({
+                            'playlist': playlist_file.relative_path,
+                            'track_info': entry.track_info,
+                            'file_path': entry.file_path,
+                            'playlist_full_path': playlist_file.m3u_path,
+                            'line_number': entry.line_number
+                        })
+
+        return results
+
+
+def get_m3u_index(m3u_root: str, refresh: bool = True) -> M3UIndex:
+    """
+    Get the shared M3UIndex for a root directory.
+
+    Args:
+        m3u_root: Root directory containing M3U files
+        refresh: Whether to re-scan the directory for new or modified files
+
+    Returns:
+        The M3UIndex for the directory
+    """
+    key = os.path.normcase(os.path.abspath(m3u_root))
+    with _index_registry_lock:
+        index = _index_registry.get(key)
+        if index is None:
+            _load_persisted_files(m3u_root)
+            index = M3UIndex(m3u_root)
+            _index_registry[key] = index
+            refresh = True
+
+    if refresh:
+        index.refresh()
+    return index
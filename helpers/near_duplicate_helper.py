@@ -0,0 +1,274 @@
+"""
+Candidate generation for near-duplicate track detection.
+
+Comparing every track with every other one does not scale past a few thousand tracks,
+so duplicate detection first gathers candidate pairs from cheap blocks and only those
+pairs get the expensive similarity check. A pair becomes a candidate when the two tracks
+share any of these blocks:
+
+- the same core title (no remix/version suffixes) and the same sorted artist tokens
+- the same sorted artist tokens and a similar duration
+- the same core title and a similar duration
+- a MinHash LSH band over character shingles of the core title and artists, which
+  catches typos, reordered artists and punctuation differences the exact keys miss
+
+Blocks larger than ``max_block_size`` say little about similarity (a very common title
+with a common duration) and are skipped, which keeps the pair count close to linear.
+"""
+import hashlib
+import re
+import unicodedata
+from collections import defaultdict
+from operator import itemgetter
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Set, Tuple
+
+from utils.logger import setup_logger
+
+near_duplicate_logger = setup_logger('near_duplicates', 'sql', 'near_duplicates.log')
+
+# Added per bin of distance when an empty bin borrows a neighbour's minimum, so borrowed
+# values never collide with genuine ones (bin values stay below 2**64)
+_DENSIFY_OFFSET = 1 << 64
+
+_BRACKETED_RE = re.compile(r'[\(\[].*?[\)\]]')
+_VERSION_SUFFIX_RE = re.compile(
+    r'\s+-\s+.*\b(remix|mix|edit|version|remaster(ed)?|live|mono|stereo|instrumental|extended|radio)\b.*$'
+)
+_FEATURING_RE = re.compile(r'\s+(feat\.?|ft\.?|featuring)\s+.*$')
+_ARTIST_SEPARATOR_RE = re.compile(r'\s*(?:,|&|;|/|\bx\b|\band\b|\bfeat\.?|\bft\.?|\bfeaturing\b)\s*')
+_NON_WORD_RE = re.compile(r'[^\w\s]')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+TrackRecord = Tuple[str, str, Optional[int]]
+
+
+def _fold(text: str) -> str:
+    """Lowercase and strip accents so 'Beyoncé' and 'beyonce' compare equal."""
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def core_title(title: str) -> str:
+    """
+    Reduce a title to its core words for blocking.
+
+    Bracketed content, ' - ... Remix/Edit/Version' suffixes, featured artists and
+    punctuation are removed.
+
+    Args:
+        title: Track title as stored
+
+    Returns:
+        Normalized core title (may be empty)
+    """
+    if not title:
+        return ""
+    normalized = _fold(title)
+    normalized = _BRACKETED_RE.sub(' ', normalized)
+    normalized = _VERSION_SUFFIX_RE.sub('', normalized)
+    normalized = _FEATURING_RE.sub('', normalized)
+    normalized = _NON_WORD_RE.sub(' ', normalized)
+    return _WHITESPACE_RE.sub(' ', normalized).strip()
+
+
+def artist_tokens(artists: str) -> str:
+    """
+    Reduce an artist string to its sorted, de-duplicated word tokens for blocking.
+
+    Args:
+        artists: Comma separated artist names as stored
+
+    Returns:
+        Space separated sorted tokens (may be empty)
+    """
+    if not artists:
+        return ""
+    tokens = set()
+    for name in _ARTIST_SEPARATOR_RE.split(_fold(artists)):
+        tokens.update(_NON_WORD_RE.sub(' ', name).split())
+    return ' '.join(sorted(tokens))
+
+
+def _shingles(text: str, size: int = 3) -> Set[str]:
+    padded = f" {text} "
+    return {padded[i:i + size] for i in range(max(1, len(padded) - size + 1))}
+
+
+class NearDuplicateBlocker:
+    """
+    Generates candidate duplicate pairs from blocking keys and MinHash LSH.
+
+    Signatures use one-permutation hashing: every distinct shingle is hashed once per
+    blocker and each track needs a single pass over its shingles, instead of one pass
+    per permutation.
+    """
+
+    def __init__(self, num_perm: int = 32, bands: int = 8, max_block_size: int = 100,
+                 duration_tolerance_ms: int = 1500, seed: int = 1):
+        """
+        Args:
+            num_perm: Number of MinHash values per signature (must be divisible by bands)
+            bands: Number of LSH bands; more bands raise recall and the candidate count
+            max_block_size: Blocks with more tracks than this are skipped
+            duration_tolerance_ms: Durations closer than this always share a duration block
+            seed: Key for the shingle hash, so results are reproducible between runs
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_block_size = max_block_size
+        self.duration_tolerance_ms = duration_tolerance_ms
+
+        self._hash_key = seed.to_bytes(8, 'big')
+        self._shingle_slots: Dict[str, Tuple[int, int]] = {}
+
+        self.stats: Dict[str, int] = {}
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        """
+        One-permutation MinHash signature of the character 3-gram shingles of a text.
+
+        Each shingle is hashed once and lands in one of ``num_perm`` bins that keep their
+        minimum; empty bins borrow the value of the next filled bin (rotation
+        densification), so short texts still get a full signature.
+        """
+        num_bins = self.num_perm
+        cached_slot = self._shingle_slots.get
+        slots = [cached_slot(shingle) or self._hash_shingle(shingle) for shingle in _shingles(text)]
+        # Largest values first, so building the dict keeps the minimum of every bin
+        slots.sort(key=itemgetter(1), reverse=True)
+        filled = dict(slots)
+        minimums = [filled.get(index) for index in range(num_bins)]
+        if len(filled) == num_bins:
+            return tuple(minimums)
+
+        signature = list(minimums)
+        for index in range(num_bins):
+            if signature[index] is None:
+                for distance in range(1, num_bins):
+                    borrowed = minimums[(index + distance) % num_bins]
+                    if borrowed is not None:
+                        signature[index] = borrowed + distance * _DENSIFY_OFFSET
+                        break
+        return tuple(signature)
+
+    def _hash_shingle(self, shingle: str) -> Tuple[int, int]:
+        value = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8, key=self._hash_key).digest(), 'big')
+        slot = self._shingle_slots[shingle] = (value % self.num_perm, value // self.num_perm)
+        return slot
+
+    def _duration_cells(self, duration_ms: Optional[int]) -> Tuple[int, ...]:
+        # Two grids offset by half a cell: any two durations within the tolerance share
+        # a cell in at least one of them
+        if not duration_ms:
+            return ()
+        width = self.duration_tolerance_ms * 2
+        return duration_ms // width, -1 - (duration_ms + self.duration_tolerance_ms) // width
+
+    def blocking_keys(self, title: str, artists: str, duration_ms: Optional[int]) -> List[Hashable]:
+        """
+        Get every block a track belongs to.
+
+        Args:
+            title: Track title
+            artists: Comma separated artists
+            duration_ms: Duration in milliseconds, or None when unknown
+
+        Returns:
+            List of hashable block keys
+        """
+        title_key = core_title(title)
+        artist_key = artist_tokens(artists)
+        if not title_key and not artist_key:
+            return []
+
+        keys: List[Hashable] = [('exact', title_key, artist_key)]
+        for cell in self._duration_cells(duration_ms):
+            if artist_key:
+                keys.append(('artist_duration', artist_key, cell))
+            if title_key:
+                keys.append(('title_duration', title_key, cell))
+
+        signature = self.signature(f"{title_key} {artist_key}")
+        for band in range(self.bands):
+            keys.append(('lsh', band, signature[band * self.rows:(band + 1) * self.rows]))
+        return keys
+
+    def candidate_pairs(self, records: Sequence[TrackRecord]) -> Set[Tuple[int, int]]:
+        """
+        Find index pairs of records that are worth a detailed comparison.
+
+        Args:
+            records: (title, artists, duration_ms) for each track
+
+        Returns:
+            Set of (i, j) index pairs with i < j
+        """
+        blocks: Dict[Hashable, List[int]] = defaultdict(list)
+        for index, (title, artists, duration_ms) in enumerate(records):
+            for key in self.blocking_keys(title, artists, duration_ms):
+                blocks[key].append(index)
+
+        pairs: Set[Tuple[int, int]] = set()
+        skipped_blocks = 0
+        for key, members in blocks.items():
+            if len(members) < 2:
+                continue
+            # Identical core title and artists are always compared, whatever the block size
+            if len(members) > self.max_block_size and key[0] != 'exact':
+                skipped_blocks += 1
+                continue
+            pairs.update(_index_pairs(members))
+
+        self.stats = {
+            'records': len(records),
+            'blocks': len(blocks),
+            'skipped_blocks': skipped_blocks,
+            'candidate_pairs': len(pairs),
+        }
+        near_duplicate_logger.info(
+            f"Generated {len(pairs)} candidate pairs for {len(records)} tracks "
+            f"({len(blocks)} blocks, {skipped_blocks} oversized blocks skipped)"
+        )
+        return pairs
+
+
+def _index_pairs(members: List[int]) -> Iterable[Tuple[int, int]]:
+    for position, first in enumerate(members):
+        for second in members[position + 1:]:
+            yield first, second
+
+
+def connected_components(size: int, pairs: Iterable[Tuple[int, int]]) -> List[List[int]]:
+    """
+    Group indices linked by pairs, using union-find.
+
+    Args:
+        size: Number of indices
+        pairs: Linked (i, j) index pairs
+
+    Returns:
+        Components with more than one member, each sorted, in order of their first index
+    """
+    parent = list(range(size))
+
+    def find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    for first, second in pairs:
+        root_first, root_second = find(first), find(second)
+        if root_first != root_second:
+            parent[max(root_first, root_second)] = min(root_first, root_second)
+
+    components: Dict[int, List[int]] = defaultdict(list)
+    for index in range(size):
+        components[find(index)].append(index)
+    return [members for _, members in sorted(components.items()) if len(members) > 1]
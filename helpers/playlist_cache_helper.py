@@ -0,0 +1,317 @@
+"""
+Local cache of Spotify playlist contents keyed by snapshot_id.
+
+Spotify gives every version of a playlist a new snapshot_id, so the items stored for a
+(playlist_id, snapshot_id) pair never go stale: a playlist whose snapshot_id hasn't changed
+can be served entirely from this cache without fetching its items again. Every playlist
+fetcher goes through get_playlist_tracks, which consults the cache first.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from utils.logger import setup_logger
+
+playlist_cache_logger = setup_logger('playlist_cache_helper', 'drivers', 'playlist_cache.log')
+
+# Bump when the persisted entry format changes
+PLAYLIST_CACHE_VERSION = 2
+
+# Track fields stored for every playlist item; a superset of what any fetcher needs
+PLAYLIST_ITEM_FIELDS = 'items(track(id,uri,name,artists(name),album(name),is_local,duration_ms)),total'
+
+project_root = Path(__file__).resolve().parent.parent
+
+
+def _default_cache_dir() -> str:
+    return os.getenv('PLAYLIST_CACHE_DIR') or str(project_root / "data" / "playlist_cache")
+
+
+@dataclass
+class CachedPlaylist:
+    """The contents of one playlist snapshot."""
+    playlist_id: str
+    snapshot_id: str
+    # Track URIs in playlist order (tracks without a URI are left out)
+    uris: List[str]
+    # Track objects in playlist order, restricted to PLAYLIST_ITEM_FIELDS
+    items: List[dict]
+
+
+class PlaylistContentCache:
+    """
+    Playlist contents kept in a small in-memory LRU and persisted as one JSON file per playlist.
+
+    Only the latest snapshot of each playlist is kept; storing a new snapshot replaces
+    the previous one. The files are bounded by count and total size, evicting the least
+    recently used playlists first (reads refresh a file's modification time).
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: Optional[int] = None,
+                 max_bytes: Optional[int] = None, max_memory_entries: int = 64):
+        """
+        Initialize a new PlaylistContentCache.
+
+        Args:
+            cache_dir: Directory for the persisted entries (defaults to PLAYLIST_CACHE_DIR
+                or data/playlist_cache)
+            max_entries: Maximum number of persisted playlists (defaults to
+                PLAYLIST_CACHE_MAX_ENTRIES or 1000)
+            max_bytes: Maximum total size of the persisted playlists (defaults to
+                PLAYLIST_CACHE_MAX_MB or 200 MB)
+            max_memory_entries: Maximum number of playlists kept in memory
+        """
+        self.cache_dir = cache_dir or _default_cache_dir()
+        self.max_entries = max_entries or int(os.getenv('PLAYLIST_CACHE_MAX_ENTRIES', '1000'))
+        self.max_bytes = max_bytes or int(float(os.getenv('PLAYLIST_CACHE_MAX_MB', '200')) * 1024 * 1024)
+        self.max_memory_entries = max_memory_entries
+
+        self._entries: 'OrderedDict[str, CachedPlaylist]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entry_path(self, playlist_id: str) -> str:
+        return os.path.join(self.cache_dir, f"{playlist_id}.json")
+
+    def get_entry(self, playlist_id: str, snapshot_id: Optional[str]) -> Optional[CachedPlaylist]:
+        """
+        Get the cached contents of a playlist snapshot.
+
+        Args:
+            playlist_id: Spotify playlist ID
+            snapshot_id: Current snapshot_id of the playlist
+
+        Returns:
+            The cached playlist, or None when this snapshot isn't cached
+        """
+        if not snapshot_id:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(playlist_id)
+            if entry is not None and entry.snapshot_id == snapshot_id:
+                self._entries.move_to_end(playlist_id)
+                return entry
+
+        entry = self._load(playlist_id)
+        if entry is None or entry.snapshot_id != snapshot_id:
+            return None
+
+        self._remember(entry)
+        return entry
+
+    def get(self, playlist_id: str, snapshot_id: Optional[str]) -> Optional[List[dict]]:
+        """Get the cached items of a playlist snapshot in playlist order, or None."""
+        entry = self.get_entry(playlist_id, snapshot_id)
+        return entry.items if entry is not None else None
+
+    def put(self, playlist_id: str, snapshot_id: Optional[str], items: List[dict]) -> Optional[CachedPlaylist]:
+        """
+        Store the items of a playlist snapshot, replacing any older snapshot.
+
+        Args:
+            playlist_id: Spotify playlist ID
+            snapshot_id: snapshot_id the items were fetched at
+            items: Track objects in playlist order
+
+        Returns:
+            The stored entry, or None when there is no snapshot_id to key it by
+        """
+        if not snapshot_id:
+            return None
+
+        entry = CachedPlaylist(playlist_id, snapshot_id, [item['uri'] for item in items if item.get('uri')], items)
+        self._remember(entry)
+
+        data = {
+            'version': PLAYLIST_CACHE_VERSION,
+            'playlist_id': playlist_id,
+            'snapshot_id': snapshot_id,
+            'uris': entry.uris,
+            'items': items
+        }
+        cache_path = self._entry_path(playlist_id)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = f"{cache_path}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(temp_path, cache_path)
+        except Exception as e:
+            playlist_cache_logger.warning(f"Could not save playlist cache entry {cache_path}: {e}")
+            return entry
+
+        self._evict()
+        return entry
+
+    def invalidate(self, playlist_id: str) -> None:
+        """Forget a playlist, e.g. after editing it."""
+        with self._lock:
+            self._entries.pop(playlist_id, None)
+        try:
+            os.remove(self._entry_path(playlist_id))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            playlist_cache_logger.warning(f"Could not remove playlist cache entry for {playlist_id}: {e}")
+
+    def _remember(self, entry: CachedPlaylist) -> None:
+        with self._lock:
+            self._entries[entry.playlist_id] = entry
+            self._entries.move_to_end(entry.playlist_id)
+            while len(self._entries) > self.max_memory_entries:
+                self._entries.popitem(last=False)
+
+    def _load(self, playlist_id: str) -> Optional[CachedPlaylist]:
+        cache_path = self._entry_path(playlist_id)
+        if not os.path.exists(cache_path):
+            return None
+
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            # Mark as recently used for eviction
+            os.utime(cache_path)
+        except Exception as e:
+            playlist_cache_logger.warning(f"Could not load playlist cache entry {cache_path}: {e}")
+            return None
+
+        if data.get('version') != PLAYLIST_CACHE_VERSION:
+            return None
+        return CachedPlaylist(data['playlist_id'], data['snapshot_id'], data['uris'], data['items'])
+
+    def _evict(self) -> None:
+        """Delete the least recently used files until the count and size limits hold."""
+        try:
+            files = []
+            with os.scandir(self.cache_dir) as entries:
+                for dir_entry in entries:
+                    if dir_entry.name.endswith('.json') and dir_entry.is_file():
+                        stat = dir_entry.stat()
+                        files.append((stat.st_mtime, stat.st_size, dir_entry.path, dir_entry.name[:-5]))
+        except OSError as e:
+            playlist_cache_logger.warning(f"Could not scan playlist cache {self.cache_dir}: {e}")
+            return
+
+        total_bytes = sum(size for _, size, _, _ in files)
+        if len(files) <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+
+        files.sort()
+        evicted = 0
+        # Always keep the most recently used file, even if it alone is over the size limit
+        for _, size, path, playlist_id in files[:-1]:
+            if len(files) - evicted <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            with self._lock:
+                self._entries.pop(playlist_id, None)
+            total_bytes -= size
+            evicted += 1
+
+        playlist_cache_logger.info(f"Evicted {evicted} playlists from the playlist cache")
+
+
+_playlist_cache: Optional[PlaylistContentCache] = None
+_playlist_cache_lock = threading.Lock()
+
+
+def get_playlist_content_cache() -> PlaylistContentCache:
+    """Get the playlist content cache shared by this process."""
+    global _playlist_cache
+
+    with _playlist_cache_lock:
+        if _playlist_cache is None:
+            _playlist_cache = PlaylistContentCache()
+        return _playlist_cache
+
+
+def fetch_playlist_tracks(spotify_client, playlist_id: str, rate_limiter=None, max_retries: int = 3) -> List[dict]:
+    """
+    Fetch every track of a playlist from the Spotify API, in playlist order.
+
+    Args:
+        spotify_client: Authenticated Spotify client
+        playlist_id: ID of the playlist
+        rate_limiter: Optional RateLimiter every page request waits on
+        max_retries: Attempts per page before the error is raised
+
+    Returns:
+        List of track objects (empty slots are skipped)
+    """
+    tracks = []
+    offset = 0
+    limit = 100  # Spotify API limit
+
+    while True:
+        for attempt in range(1, max_retries + 1):
+            try:
+                if rate_limiter:
+                    rate_limiter.acquire()
+                results = spotify_client.playlist_items(
+                    playlist_id,
+                    offset=offset,
+                    limit=limit,
+                    fields=PLAYLIST_ITEM_FIELDS
+                )
+                break
+            except Exception as e:
+                if attempt == max_retries:
+                    raise
+                playlist_cache_logger.warning(
+                    f"Error fetching playlist {playlist_id} at offset {offset} (attempt {attempt}): {e}")
+                time.sleep(attempt)
+
+        if not results['items']:
+            break
+
+        tracks.extend([item['track'] for item in results['items'] if item['track']])
+        offset += limit
+
+        if offset >= results['total']:
+            break
+
+    return tracks
+
+
+def get_playlist_tracks(spotify_client, playlist_id: str, snapshot_id: Optional[str] = None,
+                        rate_limiter=None, cache: Optional[PlaylistContentCache] = None) -> CachedPlaylist:
+    """
+    Get the contents of a playlist, from the cache when its snapshot is already known.
+
+    Callers that already know the playlist's current snapshot_id (every playlist listing
+    includes it) should pass it: an unchanged playlist then costs no API call at all.
+    Without it, only the snapshot_id is requested before consulting the cache.
+
+    Args:
+        spotify_client: Authenticated Spotify client
+        playlist_id: ID of the playlist
+        snapshot_id: Current snapshot_id of the playlist, if known
+        rate_limiter: Optional RateLimiter every request waits on
+        cache: Playlist content cache (defaults to the shared one)
+
+    Returns:
+        The playlist contents
+    """
+    cache = cache or get_playlist_content_cache()
+
+    if not snapshot_id:
+        if rate_limiter:
+            rate_limiter.acquire()
+        snapshot_id = spotify_client.playlist(playlist_id, fields='snapshot_id')['snapshot_id']
+
+    entry = cache.get_entry(playlist_id, snapshot_id)
+    if entry is not None:
+        playlist_cache_logger.info(f"Playlist {playlist_id} served from cache (snapshot {snapshot_id})")
+        return entry
+
+    items = fetch_playlist_tracks(spotify_client, playlist_id, rate_limiter)
+    playlist_cache_logger.info(f"Fetched {len(items)} tracks for playlist {playlist_id} (snapshot {snapshot_id})")
+    return cache.put(playlist_id, snapshot_id, items)
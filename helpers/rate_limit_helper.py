@@ -0,0 +1,84 @@
+"""
+Client-side rate limiting for outgoing API calls.
+
+Work that talks to Spotify from several threads shares one limiter, so concurrent fetches
+and queued playlist edits together stay under the request rate instead of each caller
+sleeping on its own schedule.
+"""
+import os
+import threading
+import time
+from typing import Optional
+
+from utils.logger import setup_logger
+
+rate_limit_logger = setup_logger('rate_limit_helper', 'drivers', 'rate_limit.log')
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket.
+
+    Tokens refill continuously at ``rate`` per second up to ``burst``; every call takes one
+    token and blocks until one is available.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Initialize a new RateLimiter.
+
+        Args:
+            rate: Sustained number of calls allowed per second
+            burst: Number of calls that may be made back to back after an idle period
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Take one token, waiting for it if necessary.
+
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+
+                delay = (1 - self._tokens) / self.rate
+
+            time.sleep(delay)
+            waited += delay
+
+
+_spotify_rate_limiter: Optional[RateLimiter] = None
+_spotify_rate_limiter_lock = threading.Lock()
+
+
+def get_spotify_rate_limiter() -> RateLimiter:
+    """
+    Get the limiter shared by all Spotify API calls in this process.
+
+    The rate can be tuned with SPOTIFY_REQUESTS_PER_SECOND (default 10).
+    """
+    global _spotify_rate_limiter
+
+    with _spotify_rate_limiter_lock:
+        if _spotify_rate_limiter is None:
+            rate = float(os.getenv('SPOTIFY_REQUESTS_PER_SECOND', '10'))
+            _spotify_rate_limiter = RateLimiter(rate, burst=max(1, int(rate)))
+            rate_limit_logger.info(f"Spotify rate limiter: {rate} requests per second")
+        return _spotify_rate_limiter
@@ -0,0 +1,96 @@
+"""
+Batch downloads with spotDL.
+
+spotDL is started once per batch of URLs rather than once per track, so its (and
+Python's) startup cost is paid per batch. Each batch downloads into an empty staging
+directory with an output template that names every file after its Spotify track id, so
+the downloaded files are matched to their tracks by name instead of by diffing the
+contents of the download directory before and after the run.
+"""
+import os
+import re
+import subprocess
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from utils.logger import setup_logger
+
+spotdl_logger = setup_logger('spotdl_helper', 'drivers', 'spotdl.log')
+
+# Output template of staged downloads: "<track id>.mp3"
+STAGING_OUTPUT_TEMPLATE = '{track-id}.{output-ext}'
+
+# URLs passed to a single spotDL run; keeps the command line well under OS limits
+SPOTDL_BATCH_SIZE = int(os.getenv('SPOTDL_BATCH_SIZE', '50'))
+
+# Time allowed per track in a batch before the spotDL run is abandoned
+SPOTDL_TIMEOUT_PER_TRACK = int(os.getenv('SPOTDL_TIMEOUT_PER_TRACK', '300'))
+
+_INVALID_FILENAME_CHARS = re.compile(r'[\\/:*?"<>|]')
+
+
+@dataclass
+class SpotdlBatchResult:
+    """Outcome of one spotDL run."""
+    # Downloaded file path by track id
+    files: Dict[str, str] = field(default_factory=dict)
+    returncode: int = 0
+    stdout: str = ""
+    stderr: str = ""
+
+
+def track_url(track_id: str) -> str:
+    """Spotify URL of a track, as passed to spotDL."""
+    return f"https://open.spotify.com/track/{track_id}"
+
+
+def download_file_stem(artists: str, title: str) -> str:
+    """
+    File name (without extension) for a downloaded track, following spotDL's default
+    "{artists} - {title}" template with characters Windows rejects removed.
+    """
+    return _INVALID_FILENAME_CHARS.sub('', f"{artists} - {title}").strip().rstrip('.')
+
+
+def download_batch(track_ids: List[str], staging_dir: str,
+                   timeout_per_track: int = SPOTDL_TIMEOUT_PER_TRACK) -> SpotdlBatchResult:
+    """
+    Download tracks with a single spotDL run.
+
+    Args:
+        track_ids: Spotify track IDs to download
+        staging_dir: Empty directory the files are downloaded to, named "<track id>.<ext>"
+        timeout_per_track: Seconds allowed per track
+
+    Returns:
+        SpotdlBatchResult with the file downloaded for each track that succeeded
+
+    Raises:
+        subprocess.TimeoutExpired: If spotDL runs longer than the batch's time allowance
+    """
+    cmd = ["spotdl", *[track_url(track_id) for track_id in track_ids],
+           "--output", os.path.join(staging_dir, STAGING_OUTPUT_TEMPLATE)]
+    spotdl_logger.info(f"Running spotDL for {len(track_ids)} tracks")
+
+    completed = subprocess.run(
+        cmd,
+        capture_output=True,
+        text=True,
+        timeout=timeout_per_track * len(track_ids),
+        encoding='utf-8',
+        errors='replace'
+    )
+
+    result = SpotdlBatchResult(returncode=completed.returncode, stdout=completed.stdout or "",
+                               stderr=completed.stderr or "")
+    wanted = set(track_ids)
+    for name in os.listdir(staging_dir):
+        track_id, _ = os.path.splitext(name)
+        if track_id in wanted:
+            result.files[track_id] = os.path.join(staging_dir, name)
+
+    spotdl_logger.info(f"spotDL exited with {completed.returncode}: "
+                       f"downloaded {len(result.files)}/{len(track_ids)} tracks")
+    if completed.returncode != 0:
+        spotdl_logger.warning(f"spotDL stderr: {result.stderr[:2000]}")
+    return result
@@ -8,6 +8,7 @@ from drivers.spotify_client import (
     fetch_master_tracks,
     get_track_uris_for_playlist
 )
+from helpers.track_catalog_helper import get_track_catalog
 from sql.core.unit_of_work import UnitOfWork
 from sql.dto.playlist_info import PlaylistInfo
 from sql.helpers.db_helper import get_db_playlists, get_db_tracks_by_uri
@@ -675,13 +676,12 @@ def analyze_track_playlist_associations(master_playlist_id: str, force_full_refr
     """
     sync_logger.info("Analyzing track-playlist association changes")
 
-    # Get all tracks from database INDEXED BY URI
-    with UnitOfWork() as uow:
-        all_tracks_in_db = uow.track_repository.get_all()
-        # Create a lookup dictionary for tracks by URI for quick access
-        tracks_by_uri = {track.uri: track for track in all_tracks_in_db if track.uri}
-        total_tracks = len(all_tracks_in_db)
-        sync_logger.info(f"Found {total_tracks} tracks in database")
+    # Get all tracks from the shared catalog INDEXED BY URI
+    catalog = get_track_catalog()
+    all_tracks_in_db = catalog.tracks
+    tracks_by_uri = catalog.tracks_by_uri
+    total_tracks = len(all_tracks_in_db)
+    sync_logger.info(f"Found {total_tracks} tracks in database")
 
     # Get all playlists from database
     with UnitOfWork() as uow:
@@ -762,7 +762,8 @@ def analyze_track_playlist_associations(master_playlist_id: str, force_full_refr
         print(f"Processing playlist {i}/{len(changed_playlists)}: {playlist_name}")
 
         # Get track URIs for this playlist (updated to return URIs)
-        playlist_track_uris = get_track_uris_for_playlist(spotify_client, playlist_id, force_refresh=True)
+        playlist_track_uris = get_track_uris_for_playlist(spotify_client, playlist_id, force_refresh=True,
+                                                          snapshot_id=playlist.snapshot_id)
 
         # Log number of local files
         local_files = [uri for uri in playlist_track_uris if uri.startswith('spotify:local:')]
@@ -1138,7 +1139,8 @@ def sync_track_playlist_associations_to_db(master_playlist_id: str, force_full_r
         print(f"Processing playlist {i}/{len(changed_playlists)}: {playlist_name}")
 
         # Always force a fresh API call to get the most up-to-date associations
-        playlist_track_uris = get_track_uris_for_playlist(spotify_client, playlist_id, force_refresh=True)
+        playlist_track_uris = get_track_uris_for_playlist(spotify_client, playlist_id, force_refresh=True,
+                                                          snapshot_id=playlist.snapshot_id)
 
         # Log number of local files
         local_files = [uri for uri in playlist_track_uris if uri.startswith('spotify:local:')]
@@ -0,0 +1,138 @@
+"""
+Process-wide, columnar snapshot of the Tracks table.
+
+Several services need every track at once (fuzzy matching, validation, duplicate
+detection, association analysis). Instead of each of them loading and mapping the whole
+table, they share one catalog that stores the columns as parallel lists with interned
+strings and precomputed lookups. The catalog is tied to the Tracks generation counter,
+which every UnitOfWork that changed Tracks bumps once when it commits, so after a sync the
+next caller reloads it and everyone else keeps reading the cached copy with a single
+cheap query.
+"""
+import sys
+import threading
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from sql.core.unit_of_work import UnitOfWork
+from sql.models.track import Track
+from utils.logger import setup_logger
+
+catalog_logger = setup_logger('track_catalog', 'sql', 'track_catalog.log')
+
+CATALOG_COLUMNS = ("Uri", "TrackId", "TrackTitle", "Artists", "Album", "AddedToMaster", "IsLocal", "Duration")
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value else value
+
+
+class TrackCatalog:
+    """
+    Immutable column-oriented view of all tracks at one generation.
+
+    Row ``i`` of the catalog is ``uris[i]``, ``titles[i]``, ``artists[i]`` and so on.
+    Track objects are only built when ``tracks`` or ``tracks_by_uri`` is first used, and are
+    then shared by every reader, so callers must treat them as read-only.
+    """
+
+    def __init__(self, version: Tuple[str, int], rows: List[tuple]):
+        # (database path, Tracks generation) this snapshot was read at
+        self.version = version
+
+        columns = list(zip(*rows)) if rows else [()] * len(CATALOG_COLUMNS)
+        uris, track_ids, titles, artists, albums, added_dates, is_local, durations = columns
+
+        self.uris: List[str] = list(uris)
+        self.track_ids: List[Optional[str]] = list(track_ids)
+        self.titles: List[str] = [_intern(v) for v in titles]
+        self.artists: List[str] = [_intern(v) for v in artists]
+        self.albums: List[str] = [_intern(v) for v in albums]
+        self.added_dates: List[Optional[str]] = [_intern(v) for v in added_dates]
+        self.is_local = bytearray(1 if v else 0 for v in is_local)
+        # 0 marks an unknown duration, matching how Track treats a falsy duration_ms
+        self.durations = array('q', (int(v or 0) for v in durations))
+
+        self.index_by_uri: Dict[str, int] = {uri: i for i, uri in enumerate(self.uris) if uri}
+
+        self._tracks: Optional[List[Track]] = None
+        self._tracks_by_uri: Optional[Dict[str, Track]] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.uris)
+
+    def __contains__(self, uri: str) -> bool:
+        return uri in self.index_by_uri
+
+    @property
+    def tracks(self) -> List[Track]:
+        """All tracks as shared, read-only Track objects (built once per generation)."""
+        if self._tracks is None:
+            with self._lock:
+                if self._tracks is None:
+                    self._tracks = [self._build_track(i) for i in range(len(self.uris))]
+        return self._tracks
+
+    @property
+    def tracks_by_uri(self) -> Dict[str, Track]:
+        """Shared Track objects keyed by URI (tracks without a URI are left out)."""
+        if self._tracks_by_uri is None:
+            tracks = self.tracks
+            self._tracks_by_uri = {track.uri: track for track in tracks if track.uri}
+        return self._tracks_by_uri
+
+    def get_track(self, uri: str) -> Optional[Track]:
+        """Get the shared Track object for a URI, or None if it isn't in the catalog."""
+        return self.tracks_by_uri.get(uri)
+
+    def _build_track(self, i: int) -> Track:
+        return Track(
+            self.uris[i] or None,
+            self.track_ids[i],
+            self.titles[i],
+            self.artists[i],
+            self.albums[i],
+            self.added_dates[i] or None,
+            bool(self.is_local[i]),
+            self.durations[i] or None
+        )
+
+
+_catalog: Optional[TrackCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_track_catalog() -> TrackCatalog:
+    """
+    Get the shared track catalog, reloading it if the Tracks generation has moved on.
+
+    Only committed data is read, so a catalog is never built from a transaction that
+    might still roll back.
+
+    Returns:
+        The current TrackCatalog
+    """
+    global _catalog
+
+    with UnitOfWork() as uow:
+        repository = uow.track_repository
+        version = (uow.connection_provider.db_path, repository.get_generation())
+
+        catalog = _catalog
+        if catalog is not None and catalog.version == version:
+            return catalog
+
+        with _catalog_lock:
+            if _catalog is None or _catalog.version != version:
+                rows = repository.get_projection(CATALOG_COLUMNS)
+                _catalog = TrackCatalog(version, rows)
+                catalog_logger.info(f"Loaded track catalog generation {version[1]} with {len(_catalog)} tracks")
+            return _catalog
+
+
+def invalidate_track_catalog():
+    """Drop the cached catalog so the next reader reloads it."""
+    global _catalog
+    with _catalog_lock:
+        _catalog = None
@@ -1,11 +1,15 @@
 import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 
 from mutagen.id3 import ID3
 
 from api.constants.file_extensions import SUPPORTED_AUDIO_EXTENSIONS
+from helpers.library_index_helper import LibraryIndex
 from sql.core.unit_of_work import UnitOfWork
 from utils.logger import setup_logger
 
@@ -16,6 +20,16 @@ db_logger = setup_logger('db_logger', 'sql', 'db_validation_helper.log')
 current_file = Path(__file__).resolve()
 project_root = current_file.parent.parent
 
+# Files whose TrackId tags are read concurrently during validation
+DEFAULT_TAG_READ_WORKERS = int(os.getenv('VALIDATION_TAG_READ_WORKERS', '8'))
+
+# Files whose TrackId is remembered between requests
+TRACK_ID_CACHE_MAX_ENTRIES = int(os.getenv('TRACK_ID_CACHE_MAX_ENTRIES', '100000'))
+
+# Extensions tried, in order, when looking up a missing track by file name; MP3 first
+# since only MP3 files carry a TrackId
+MISSING_TRACK_EXTENSIONS = tuple(sorted(SUPPORTED_AUDIO_EXTENSIONS, key=lambda ext: (ext != '.mp3', ext)))
+
 
 def get_file_track_id(file_path: str) -> Optional[str]:
     """
@@ -36,6 +50,189 @@ def get_file_track_id(file_path: str) -> Optional[str]:
     return None
 
 
+def _read_track_id_tag(file_path: str) -> Optional[str]:
+    """Read the embedded TrackId of an MP3 file (None when it has none or can't be read)."""
+    try:
+        tags = ID3(file_path)
+    except Exception as e:
+        validation_logger.error(f"Error reading metadata for {os.path.basename(file_path)}: {e}")
+        return None
+
+    if 'TXXX:TRACKID' in tags:
+        return tags['TXXX:TRACKID'].text[0]
+    return None
+
+
+class TrackIdTagCache:
+    """
+    TrackIds read from files, kept while the file's size and modification time are unchanged.
+
+    Repeated requests for the same files only cost a stat per file; tags are parsed again
+    only for files that were modified (e.g. retagged) since they were last read.
+    """
+
+    def __init__(self, max_entries: int = TRACK_ID_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, Tuple[int, int, Optional[str]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'reads': 0}
+
+    def get_track_id(self, file_path: str) -> Optional[str]:
+        """
+        Get the TrackId of an MP3 file, reading its tags only when not cached.
+
+        Args:
+            file_path: Path to the MP3 file
+
+        Returns:
+            TrackId or None if the file has none, is missing or can't be read
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError as e:
+            validation_logger.error(f"Error reading metadata for {os.path.basename(file_path)}: {e}")
+            return None
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(file_path)
+            if entry is not None and entry[:2] == version:
+                self._entries.move_to_end(file_path)
+                self.stats['hits'] += 1
+                return entry[2]
+
+        track_id = _read_track_id_tag(file_path)
+
+        with self._lock:
+            self.stats['reads'] += 1
+            self._entries[file_path] = (*version, track_id)
+            self._entries.move_to_end(file_path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return track_id
+
+    def clear(self) -> None:
+        """Forget every cached TrackId."""
+        with self._lock:
+            self._entries.clear()
+
+
+_track_id_cache = TrackIdTagCache()
+
+
+def get_track_id_cache() -> TrackIdTagCache:
+    """Get the TrackId cache shared by this process."""
+    return _track_id_cache
+
+
+def read_track_id_tags(file_paths: List[str], max_workers: int = DEFAULT_TAG_READ_WORKERS) -> Dict[str, Optional[str]]:
+    """
+    Read the embedded TrackIds of many MP3 files in parallel.
+
+    Each distinct path is read once, through the shared TrackIdTagCache, so only files that
+    are new or were modified since they were last read have their tags parsed. Tag reads
+    are dominated by file I/O, so a thread pool overlaps them even with the GIL.
+
+    Args:
+        file_paths: Paths of MP3 files
+        max_workers: Number of files read concurrently
+
+    Returns:
+        Dictionary mapping each path to its TrackId (None when it has none or can't be read)
+    """
+    distinct_paths = list(dict.fromkeys(file_paths))
+    if not distinct_paths:
+        return {}
+
+    cache = get_track_id_cache()
+    if len(distinct_paths) == 1:
+        return {distinct_paths[0]: cache.get_track_id(distinct_paths[0])}
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(distinct_paths))) as executor:
+        return dict(zip(distinct_paths, executor.map(cache.get_track_id, distinct_paths)))
+
+
+def match_local_files(master_tracks: List[Dict[str, Any]], library_index: LibraryIndex,
+                      max_workers: int = DEFAULT_TAG_READ_WORKERS) -> Dict[str, Any]:
+    """
+    Match the files of a library index against MASTER tracks.
+
+    MP3 TrackId tags are read once, in parallel. Tracks without a tagged file are looked
+    up by their expected "Artist - Title" file name in the index, so the work grows
+    linearly with the number of files and tracks.
+
+    Args:
+        master_tracks: Tracks as returned by TrackRepository.get_all_as_dict_list
+        library_index: Index of the local music library
+        max_workers: Number of files whose tags are read concurrently
+
+    Returns:
+        Dictionary with found_track_ids, missing_downloads, unmatched_files,
+        files_without_trackid, files_by_extension and total_files
+    """
+    track_ids = {track['id'] for track in master_tracks}
+    validation_logger.info(f"Validating against {len(track_ids)} track IDs")
+
+    found_track_ids = set()
+    missing_downloads = []
+    unmatched_files = []
+    files_without_trackid = []
+
+    # Track files by extension type
+    files_by_extension = {ext: 0 for ext in SUPPORTED_AUDIO_EXTENSIONS}
+    mp3_paths = []
+    for file_path in library_index.files:
+        file_ext = os.path.splitext(file_path.lower())[1]
+        files_by_extension[file_ext] += 1
+        if file_ext == '.mp3':
+            mp3_paths.append(file_path)
+
+    # For MP3 files, check for embedded TrackId. WAV/AIFF files can't carry one; they are
+    # only counted and handled separately in the m3u playlist generation
+    file_track_ids = read_track_id_tags(mp3_paths, max_workers)
+    for file_path in mp3_paths:
+        file = os.path.basename(file_path)
+        track_id = file_track_ids[file_path]
+        if track_id is None:
+            files_without_trackid.append(file)
+        elif track_id in track_ids:
+            found_track_ids.add(track_id)
+        else:
+            unmatched_files.append({
+                'file': file,
+                'reason': 'TrackId not found in MASTER playlist',
+                'current_id': track_id
+            })
+
+    # Find missing tracks - tracks in database but not locally
+    for track in master_tracks:
+        if track['id'] in found_track_ids:
+            continue
+
+        # Try to find a file that matches the name pattern, with any supported extension
+        artist = track['artists'].split(',')[0]
+        file_path = library_index.find_by_stem(f"{artist} - {track['name']}", MISSING_TRACK_EXTENSIONS)
+
+        missing_downloads.append({
+            'track_id': track['id'],
+            'artist': artist,
+            'title': track['name'],
+            'added_at': track['added_at'],
+            'file_exists': file_path is not None,
+            # Only MP3 files carry a TrackId, and their tags were read above
+            'actual_track_id': file_track_ids.get(file_path) if file_path else None
+        })
+
+    return {
+        'found_track_ids': found_track_ids,
+        'missing_downloads': missing_downloads,
+        'unmatched_files': unmatched_files,
+        'files_without_trackid': files_without_trackid,
+        'files_by_extension': files_by_extension,
+        'total_files': len(library_index)
+    }
+
+
 def validate_master_tracks(master_tracks_dir: str) -> Dict[str, int]:
     """
     Validate local tracks against MASTER playlist data from database.
@@ -75,90 +272,16 @@ def validate_master_tracks(master_tracks_dir: str) -> Dict[str, int]:
             'mp3_files': 0
         }
 
-    # Extract track IDs from master tracks for quick lookup
-    track_ids = {track['id'] for track in master_tracks}
-    validation_logger.info(f"Validating against {len(track_ids)} track IDs")
+    # One scan of the library answers every lookup below
+    library_index = LibraryIndex(master_tracks_dir)
+    result = match_local_files(master_tracks, library_index)
 
-    # Initialize tracking
-    found_track_ids = set()
-    missing_downloads = []
-    unmatched_files = []
-    files_without_trackid = []
-
-    # Track files by extension type
-    files_by_extension = {ext: 0 for ext in SUPPORTED_AUDIO_EXTENSIONS}
-
-    # Scan local files
-    total_files = 0
-    for root, _, files in os.walk(master_tracks_dir):
-        for file in files:
-            file_ext = os.path.splitext(file.lower())[1]
-            if file_ext not in SUPPORTED_AUDIO_EXTENSIONS:
-                continue
-
-            total_files += 1
-            files_by_extension[file_ext] += 1
-            file_path = os.path.join(root, file)
-
-            # For MP3 files, check for embedded TrackId
-            if file_ext == '.mp3':
-                try:
-                    tags = ID3(file_path)
-                    if 'TXXX:TRACKID' in tags:
-                        track_id = tags['TXXX:TRACKID'].text[0]
-                        if track_id in track_ids:
-                            found_track_ids.add(track_id)
-                        else:
-                            unmatched_files.append({
-                                'file': file,
-                                'reason': 'TrackId not found in MASTER playlist',
-                                'current_id': track_id
-                            })
-                    else:
-                        files_without_trackid.append(file)
-                except Exception as e:
-                    files_without_trackid.append(file)
-                    validation_logger.error(f"Error reading metadata for {file}: {e}")
-            else:
-                # For WAV/AIFF files, we can't embed TrackId but we'll count them
-                # They're handled separately in the m3u playlist generation
-                validation_logger.info(f"Found {file_ext} file: {file}")
-                # We don't add them to files_without_trackid since that's for MP3s that should have TrackId
-
-    # Find missing tracks - tracks in database but not locally
-    missing_track_ids = track_ids - found_track_ids
-    for track in master_tracks:
-        if track['id'] in missing_track_ids:
-            # Try to find a file that matches the name pattern
-            expected_filename = f"{track['artists'].split(',')[0]} - {track['name']}"
-            file_exists = False
-            actual_track_id = None
-
-            # Look for the file with any of the supported extensions
-            for ext in SUPPORTED_AUDIO_EXTENSIONS:
-                expected_filename_with_ext = expected_filename + ext
-                for root, _, files in os.walk(master_tracks_dir):
-                    for file in files:
-                        if file.lower() == expected_filename_with_ext.lower():
-                            file_exists = True
-                            file_path = os.path.join(root, file)
-                            # Only try to extract TrackId from MP3 files
-                            if ext == '.mp3':
-                                actual_track_id = get_file_track_id(file_path)
-                            break
-                    if file_exists:
-                        break
-                if file_exists:
-                    break
-
-            missing_downloads.append({
-                'track_id': track['id'],
-                'artist': track['artists'].split(',')[0],
-                'title': track['name'],
-                'added_at': track['added_at'],
-                'file_exists': file_exists,
-                'actual_track_id': actual_track_id
-            })
+    found_track_ids = result['found_track_ids']
+    missing_downloads = result['missing_downloads']
+    unmatched_files = result['unmatched_files']
+    files_without_trackid = result['files_without_trackid']
+    files_by_extension = result['files_by_extension']
+    total_files = result['total_files']
 
     # Generate report
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -6,6 +6,7 @@ import os
 import re
 import xml.etree.ElementTree as ET
 
+from helpers.m3u_index_helper import get_m3u_index
 from sql.core.unit_of_work import UnitOfWork
 
 
@@ -31,6 +32,7 @@ class RekordboxXmlGenerator:
         # Initialize tracking variables
         self.file_to_uri_map = {}
         self.uri_to_file_map = {}
+        self.m3u_index = None
         self.m3u_files_with_paths = {}
         self.m3u_data = {}
         self.all_tracks = {}
@@ -192,48 +194,30 @@ class RekordboxXmlGenerator:
 
     def _collect_m3u_files(self):
         """
-        Collect all M3U files with their relative folder paths.
+        Collect all M3U files with their relative folder paths from the shared M3U index.
         Populates self.m3u_files_with_paths
         """
-        total_m3u_count = 0
+        self.m3u_index = get_m3u_index(self.m3u_root_folder)
 
-        # Walk through all directories and collect M3U files
-        for root, dirs, files in os.walk(self.m3u_root_folder):
-            for file in files:
-                if file.lower().endswith('.m3u'):
-                    # Calculate the relative path from the root folder
-                    rel_path = os.path.relpath(root, self.m3u_root_folder)
-                    if rel_path == '.':  # Files in the root directory
-                        rel_path = ''
+        for playlist_file in self.m3u_index.get_playlist_files():
+            # Store the full path and its location in the folder hierarchy
+            key = (playlist_file.folder_path, playlist_file.playlist_name)
+            self.m3u_files_with_paths[key] = playlist_file.m3u_path
 
-                    # Store the full path and its location in the folder hierarchy
-                    full_path = os.path.join(root, file)
-                    playlist_name = os.path.splitext(file)[0]
-
-                    self.m3u_files_with_paths[(rel_path, playlist_name)] = full_path
-                    total_m3u_count += 1
-
-        print(f"Found {total_m3u_count} M3U playlists in {len(set(p[0] for p in self.m3u_files_with_paths))} folders")
+        print(f"Found {len(self.m3u_files_with_paths)} M3U playlists in "
+              f"{len(set(p[0] for p in self.m3u_files_with_paths))} folders")
 
     def _read_m3u_content(self):
         """
-        Read content from all M3U files.
+        Get the parsed entries of all M3U files. Files are parsed once by the M3U index.
         Populates self.m3u_data
         """
-        for (folder_path, playlist_name), file_path in self.m3u_files_with_paths.items():
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    self.m3u_data[(folder_path, playlist_name)] = content
-            except UnicodeDecodeError:
-                # Try with a different encoding if UTF-8 fails
-                try:
-                    with open(file_path, 'r', encoding='latin-1') as f:
-                        content = f.read()
-                        self.m3u_data[(folder_path, playlist_name)] = content
-                except Exception as e:
-                    print(f"Error reading {file_path}: {e}")
-                    continue
+        for key, file_path in self.m3u_files_with_paths.items():
+            playlist_file = self.m3u_index.get_by_path(file_path)
+            if playlist_file is None:
+                print(f"Error reading {file_path}")
+                continue
+            self.m3u_data[key] = playlist_file.entries
 
     def _create_xml_structure(self):
         """
@@ -270,63 +254,44 @@ class RekordboxXmlGenerator:
         track_id_counter = 1
 
         # First build a complete map of all tracks across all playlists
-        for (folder_path, playlist_name), m3u_content in self.m3u_data.items():
-            lines = m3u_content.strip().split('\n')
-            i = 0
-
-            while i < len(lines):
-                line = lines[i].strip()
-
-                if line.startswith('#EXTINF:'):
-                    # Parse EXTINF line
-                    info_parts = line[8:].split(',', 1)
-                    duration = info_parts[0] if len(info_parts) > 0 else "0"
-                    try:
-                        duration = int(float(duration))
-                    except ValueError:
-                        duration = 0
-
-                    track_info = info_parts[1].strip() if len(info_parts) > 1 else ""
-
-                    # Get file path from next line
-                    i += 1
-                    if i < len(lines) and not lines[i].startswith('#'):
-                        file_path = lines[i].strip()
-
-                        # Clean up file path - ensure consistent forward slashes
-                        file_path = file_path.replace('\\', '/')
-
-                        # Ensure each track has a unique ID based on its path
-                        if file_path not in self.all_tracks:
-                            artist = "Unknown"
-                            title = os.path.basename(file_path)
-
-                            # Extract artist and title from track info
-                            if " - " in track_info:
-                                parts = track_info.split(" - ", 1)
-                                artist = parts[0].strip()
-                                title = parts[1].strip()
-
-                            # Generate a unique key for this track
-                            path_hash = hashlib.md5(file_path.encode()).hexdigest()[:8]
-                            key = f"{artist}_{title}_{path_hash}"
-
-                            # Try to get the embedded track ID if available
-                            spotify_uri = self.file_to_uri_map.get(file_path)
-
-                            self.all_tracks[file_path] = {
-                                'id': track_id_counter,
-                                'key': key,
-                                'info': track_info,
-                                'title': title,
-                                'artist': artist,
-                                'duration': duration,
-                                'path': file_path,
-                                'spotify_uri': spotify_uri
-                            }
-                            track_id_counter += 1
-
-                i += 1
+        for (folder_path, playlist_name), entries in self.m3u_data.items():
+            for entry in entries:
+                if not entry.has_extinf or not entry.file_path:
+                    continue
+
+                # Clean up file path - ensure consistent forward slashes
+                file_path = entry.file_path.replace('\\', '/')
+
+                # Ensure each track has a unique ID based on its path
+                if file_path not in self.all_tracks:
+                    track_info = entry.track_info
+                    artist = "Unknown"
+                    title = os.path.basename(file_path)
+
+                    # Extract artist and title from track info
+                    if " - " in track_info:
+                        parts = track_info.split(" - ", 1)
+                        artist = parts[0].strip()
+                        title = parts[1].strip()
+
+                    # Generate a unique key for this track
+                    path_hash = hashlib.md5(file_path.encode()).hexdigest()[:8]
+                    key = f"{artist}_{title}_{path_hash}"
+
+                    # Try to get the embedded track ID if available
+                    spotify_uri = self.file_to_uri_map.get(file_path)
+
+                    self.all_tracks[file_path] = {
+                        'id': track_id_counter,
+                        'key': key,
+                        'info': track_info,
+                        'title': title,
+                        'artist': artist,
+                        'duration': entry.duration,
+                        'path': file_path,
+                        'spotify_uri': spotify_uri
+                    }
+                    track_id_counter += 1
 
     def _add_tracks_to_collection(self):
         """
@@ -602,9 +567,9 @@ class RekordboxXmlGenerator:
                 import traceback
                 traceback.print_exc()
 
-        # Create a mapping of playlist names to their M3U content and folder
+        # Create a mapping of playlist names to their M3U entries and folder
         playlist_data = {}
-        for (folder_path, playlist_name), m3u_content in self.m3u_data.items():
+        for (folder_path, playlist_name), entries in self.m3u_data.items():
             # NORMALIZE THE PATH SEPARATORS
             normalized_folder_path = folder_path.replace('\\', '/')
 
@@ -621,7 +586,7 @@ class RekordboxXmlGenerator:
                 has_structure_order = False
 
             playlist_data[playlist_name] = {
-                'content': m3u_content,
+                'entries': entries,
                 'folder_path': folder_path,  # keep original for folder node lookup
                 'normalized_folder_path': normalized_folder_path,
                 'order_index': order_index,
@@ -655,7 +620,7 @@ class RekordboxXmlGenerator:
         for playlist_name in sorted_playlists:
             data = playlist_data[playlist_name]
             folder_path = data['folder_path']
-            m3u_content = data['content']
+            entries = data['entries']
 
             # Get the parent folder node
             normalized_folder_path = folder_path.replace('\\', '/')
@@ -671,28 +636,21 @@ class RekordboxXmlGenerator:
             # Track which files are in this playlist
             playlist_track_ids = []
 
-            # Process M3U content to get tracks
-            lines = m3u_content.strip().split('\n')
-            i = 0
-
-            while i < len(lines):
-                line = lines[i].strip()
-
-                if line.startswith('#EXTINF:'):
-                    i += 1
-                    if i < len(lines) and not lines[i].startswith('#'):
-                        file_path = lines[i].strip().replace('\\', '/')
+            # Process M3U entries to get tracks
+            for entry in entries:
+                if not entry.has_extinf or not entry.file_path:
+                    continue
 
-                        if file_path in self.all_tracks:
-                            track_id = self.all_tracks[file_path]['id']
-                            if track_id not in playlist_track_ids:
-                                playlist_track_ids.append(track_id)
+                file_path = entry.file_path.replace('\\', '/')
 
-                                # Add the track reference to the playlist
-                                track_ref = ET.SubElement(playlist, "TRACK")
-                                track_ref.set("Key", str(track_id))
+                if file_path in self.all_tracks:
+                    track_id = self.all_tracks[file_path]['id']
+                    if track_id not in playlist_track_ids:
+                        playlist_track_ids.append(track_id)
 
-                i += 1
+                        # Add the track reference to the playlist
+                        track_ref = ET.SubElement(playlist, "TRACK")
+                        track_ref.set("Key", str(track_id))
 
             # Set playlist entries count
             playlist.set("Entries", str(len(playlist_track_ids)))
@@ -2,6 +2,8 @@ import logging
 import os
 from typing import List, Tuple
 
+from helpers.playlist_cache_helper import get_playlist_tracks
+
 # Fetch tracks from a playlist
 # def fetch_playlist_tracks(spotify_client, playlist_id):
 #     logging.info(f"Fetching tracks for playlist ID {playlist_id}")
@@ -9,26 +11,18 @@ from typing import List, Tuple
 #     return [(" - ".join([track['track']['name'], ", ".join([artist['name'] for artist in track['track']['artists']])]))
 #             for track in tracks['items']]
 
-def fetch_playlist_tracks(spotify_client, playlist_id: str) -> List[Tuple[str, str, str]]:
+def fetch_playlist_tracks(spotify_client, playlist_id: str, snapshot_id: str = None) -> List[Tuple[str, str, str]]:
     logging.info(f"Fetching tracks for playlist: {playlist_id}")
 
+    # Unchanged playlists are served from the snapshot-keyed playlist cache
+    items = get_playlist_tracks(spotify_client, playlist_id, snapshot_id).items
+
     tracks = []
-    offset = 0
-    limit = 100  # Spotify API limit per request
-
-    while True:
-        response = spotify_client.playlist_tracks(playlist_id, limit=limit, offset=offset)
-        if not response['items']:
-            break
-
-        for item in response['items']:
-            track = item['track']
-            track_name = track['name']
-            artist_name = track['artists'][0]['name']
-            album_name = track['album']['name']
-            tracks.append((track_name, artist_name, album_name))
-
-        offset += limit
+    for track in items:
+        track_name = track['name']
+        artist_name = track['artists'][0]['name'] if track.get('artists') else ''
+        album_name = (track.get('album') or {}).get('name', '')
+        tracks.append((track_name, artist_name, album_name))
 
     return tracks
 
@@ -0,0 +1,109 @@
+"""
+Benchmark group_similar_tracks against the original first-member scan on large playlists.
+
+Synthetic Spotify playlist items are generated with a realistic share of alternative
+versions (radio edits, extended mixes, remasters). The bucketed implementation is timed on
+the whole playlist and compared with the original one on its first tracks, where the
+grouped output of both must be identical.
+
+Usage:
+    python scripts/benchmark_group_similar_tracks.py --tracks 10000
+"""
+import argparse
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from helpers.deduplication_helper import are_similar_tracks, group_similar_tracks
+
+VERSION_SUFFIXES = [" (Radio Edit)", " (Extended Mix)", " - Remastered", " (Original Mix)", " (Club Mix)"]
+
+
+def legacy_group_similar_tracks(tracks):
+    """The original implementation: compare each track with the first track of every group."""
+    if not tracks:
+        return []
+
+    groups = [[tracks[0]]]
+    for track in tracks[1:]:
+        for group in groups:
+            if are_similar_tracks(track, group[0]):
+                group.append(track)
+                break
+        else:
+            groups.append([track])
+    return groups
+
+
+def _word(rng):
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 8))).capitalize()
+
+
+def generate_playlist(size, artist_count, seed):
+    """Generate playlist items in the shape returned by Spotify's playlist_items."""
+    rng = random.Random(seed)
+    artists = [' '.join(_word(rng) for _ in range(rng.randint(1, 2))) for _ in range(artist_count)]
+
+    tracks = []
+    while len(tracks) < size:
+        artist = rng.choice(artists)
+        name = ' '.join(_word(rng) for _ in range(rng.randint(1, 4)))
+        for version in range(rng.choice([1, 1, 1, 2, 3])):
+            suffix = rng.choice(VERSION_SUFFIXES) if version else ""
+            tracks.append({
+                'id': f"track{len(tracks)}",
+                'name': name + suffix,
+                'artists': [{'name': artist if rng.random() > 0.1 else artist.upper()}],
+                'duration_ms': rng.randint(120_000, 480_000),
+            })
+
+    rng.shuffle(tracks)
+    return tracks[:size]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark grouping of similar playlist tracks')
+    parser.add_argument('--tracks', type=int, default=10000, help='Number of tracks in the playlist')
+    parser.add_argument('--artists', type=int, default=1500, help='Number of distinct artists')
+    parser.add_argument('--original-tracks', type=int, default=2000,
+                        help='Number of tracks to also group with the original implementation (0 to skip)')
+    parser.add_argument('--seed', type=int, default=3)
+    args = parser.parse_args()
+
+    tracks = generate_playlist(args.tracks, args.artists, args.seed)
+
+    start = time.perf_counter()
+    grouped = group_similar_tracks(tracks)
+    bucketed_elapsed = time.perf_counter() - start
+    print(f"Playlist: {len(tracks)} tracks, {len(grouped)} groups")
+    print(f"Bucketed grouping: {bucketed_elapsed:.3f}s")
+
+    # The original scan normalizes both names again for every comparison and gets slow
+    # quickly, so it only runs on the first part of the playlist
+    sample = tracks[:args.original_tracks]
+    if not sample:
+        return
+
+    start = time.perf_counter()
+    legacy = legacy_group_similar_tracks(sample)
+    legacy_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    grouped = group_similar_tracks(sample)
+    sample_elapsed = time.perf_counter() - start
+
+    identical = [[t['id'] for t in group] for group in grouped] == [[t['id'] for t in group] for group in legacy]
+    print(f"First {len(sample)} tracks: original {legacy_elapsed:.3f}s, bucketed {sample_elapsed:.3f}s, "
+          f"identical output: {identical}")
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark recall and speed of near-duplicate track detection on a synthetic library.
+
+A library of random tracks is generated and a share of them get a near-duplicate copy
+(case and punctuation changes, a single-character typo, reordered artists, a
+'(Remastered)' tag, a slightly different duration). Recall is measured against every
+injected pair the detailed comparison accepts, and optionally against a brute-force
+all-pairs comparison on a smaller library.
+
+Usage:
+    python scripts/benchmark_near_duplicates.py --tracks 50000 --brute-force-tracks 2000
+"""
+import argparse
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from api.services.duplicate_track_service import DuplicateTrackDetector
+from sql.models.track import Track
+
+
+def _word(rng):
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9))).capitalize()
+
+
+def _typo(rng, text):
+    position = rng.randrange(len(text))
+    return text[:position] + rng.choice(string.ascii_lowercase) + text[position:]
+
+
+def _variant(rng, title, artists):
+    kind = rng.choice(['case', 'punctuation', 'typo', 'artist_order', 'remastered', 'duration'])
+    if kind == 'case':
+        return title.upper(), artists.lower()
+    if kind == 'punctuation':
+        return title.replace(' ', ' - ', 1) if ' ' in title else f"{title}!", artists
+    if kind == 'typo':
+        return _typo(rng, title), artists
+    if kind == 'artist_order':
+        return title, ', '.join(reversed(artists.split(', ')))
+    if kind == 'remastered':
+        return f"{title} (Remastered)", artists
+    return title, artists
+
+
+def generate_library(size, duplicate_share, seed):
+    """Generate tracks plus the (original, copy) index pairs that were injected."""
+    rng = random.Random(seed)
+    artist_pool = [' '.join(_word(rng) for _ in range(rng.randint(1, 3))) for _ in range(max(10, size // 20))]
+
+    tracks, injected = [], []
+    while len(tracks) < size:
+        title = ' '.join(_word(rng) for _ in range(rng.randint(1, 5)))
+        artists = ', '.join(rng.sample(artist_pool, rng.randint(1, 2)))
+        duration = rng.randint(90_000, 480_000)
+        index = len(tracks)
+        tracks.append(Track(f"spotify:track:{index}", str(index), title, artists, duration_ms=duration))
+
+        if rng.random() < duplicate_share and len(tracks) < size:
+            copy_title, copy_artists = _variant(rng, title, artists)
+            copy_index = len(tracks)
+            tracks.append(Track(f"spotify:track:{copy_index}", str(copy_index), copy_title, copy_artists,
+                                duration_ms=duration + rng.randint(-1000, 1000)))
+            injected.append((index, copy_index))
+
+    return tracks, injected
+
+
+def grouped_pairs(groups):
+    """All unordered URI pairs that ended up in the same duplicate group."""
+    pairs = set()
+    for group in groups:
+        uris = sorted(track.uri for track in group.tracks)
+        pairs.update((a, b) for i, a in enumerate(uris) for b in uris[i + 1:])
+    return pairs
+
+
+def run(size, duplicate_share, seed, brute_force_size):
+    detector = DuplicateTrackDetector()
+
+    tracks, injected = generate_library(size, duplicate_share, seed)
+    expected = {tuple(sorted((tracks[i].uri, tracks[j].uri))) for i, j in injected
+                if detector._are_duplicates_detailed(tracks[i], tracks[j])}
+
+    start = time.perf_counter()
+    groups = detector._find_near_duplicates(tracks, {})
+    elapsed = time.perf_counter() - start
+
+    found = grouped_pairs(groups)
+    recall = len(expected & found) / len(expected) if expected else 1.0
+    print(f"Library: {len(tracks)} tracks, {len(injected)} injected copies, "
+          f"{len(expected)} pass the detailed comparison")
+    print(f"Near-duplicate detection: {elapsed:.2f}s, {len(groups)} groups, recall {recall:.2%}")
+
+    if brute_force_size:
+        small_tracks, _ = generate_library(brute_force_size, duplicate_share, seed + 1)
+
+        start = time.perf_counter()
+        keys = [detector._comparison_key(track) for track in small_tracks]
+        brute_force = {
+            tuple(sorted((small_tracks[i].uri, small_tracks[j].uri)))
+            for i in range(len(small_tracks)) for j in range(i + 1, len(small_tracks))
+            if detector._keys_match(keys[i], keys[j])
+        }
+        brute_force_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        small_found = grouped_pairs(detector._find_near_duplicates(small_tracks, {}))
+        small_elapsed = time.perf_counter() - start
+
+        small_recall = len(brute_force & small_found) / len(brute_force) if brute_force else 1.0
+        print(f"Brute force on {len(small_tracks)} tracks: {brute_force_elapsed:.2f}s, "
+              f"{len(brute_force)} duplicate pairs")
+        print(f"Near-duplicate detection on the same tracks: {small_elapsed:.2f}s, recall {small_recall:.2%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark near-duplicate track detection')
+    parser.add_argument('--tracks', type=int, default=50000, help='Size of the synthetic library')
+    parser.add_argument('--duplicate-share', type=float, default=0.05,
+                        help='Share of tracks that get a near-duplicate copy')
+    parser.add_argument('--brute-force-tracks', type=int, default=2000,
+                        help='Library size for the all-pairs comparison (0 to skip)')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    run(args.tracks, args.duplicate_share, args.seed, args.brute_force_tracks)
+
+
+if __name__ == '__main__':
+    main()
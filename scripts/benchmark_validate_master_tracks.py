@@ -0,0 +1,126 @@
+"""
+Benchmark master track validation on synthetic music libraries.
+
+A library of tagged MP3s, untagged MP3s and WAV files is generated in a temporary
+directory, together with MASTER tracks of which a share is missing (some of them still
+present under their "Artist - Title" file name). Validation is timed at several library
+sizes to show that it scales linearly, and the original per-missing-track os.walk lookup
+is timed on the smallest library for comparison.
+
+Usage:
+    python scripts/benchmark_validate_master_tracks.py --sizes 5000 10000 20000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from mutagen.id3 import ID3, TXXX
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from api.constants.file_extensions import SUPPORTED_AUDIO_EXTENSIONS
+from helpers.library_index_helper import LibraryIndex
+from helpers.validation_helper import match_local_files
+
+
+def generate_library(root, size, seed):
+    """
+    Write ``size`` audio files under ``root`` and return matching MASTER tracks.
+
+    About 10% of the tracks are missing; half of those still exist as untagged files.
+    """
+    rng = random.Random(seed)
+    tracks = []
+
+    for i in range(size):
+        folder = os.path.join(root, f"genre{i % 25}", f"year{i % 7}")
+        os.makedirs(folder, exist_ok=True)
+        artist, title = f"Artist {i % 3000}", f"Title {i}"
+        track = {'id': f"id{i:07d}", 'artists': f"{artist}, Guest", 'name': title,
+                 'added_at': '2024-01-01T00:00:00Z'}
+        tracks.append(track)
+
+        path = os.path.join(folder, f"{artist} - {title}")
+        roll = rng.random()
+        if roll < 0.85:
+            tags = ID3()
+            tags.add(TXXX(encoding=3, desc='TRACKID', text=[track['id']]))
+            tags.save(path + '.mp3')
+        elif roll < 0.90:
+            open(path + '.wav', 'wb').close()
+        else:
+            # Missing: either no file at all or an untagged file under the expected name
+            if rng.random() < 0.5:
+                open(path + '.mp3', 'wb').close()
+            tracks[-1] = dict(track, id=f"missing{i:07d}")
+
+    return tracks
+
+
+def legacy_find_missing(master_tracks_dir, missing_tracks):
+    """The original lookup: one full os.walk per missing track and extension."""
+    found = 0
+    for track in missing_tracks:
+        expected_filename = f"{track['artists'].split(',')[0]} - {track['name']}"
+        file_exists = False
+        for ext in SUPPORTED_AUDIO_EXTENSIONS:
+            expected_filename_with_ext = expected_filename + ext
+            for root, _, files in os.walk(master_tracks_dir):
+                for file in files:
+                    if file.lower() == expected_filename_with_ext.lower():
+                        file_exists = True
+                        break
+                if file_exists:
+                    break
+            if file_exists:
+                break
+        found += file_exists
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark master track validation')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5000, 10000, 20000],
+                        help='Library sizes (number of files) to validate')
+    parser.add_argument('--legacy-missing', type=int, default=100,
+                        help='Missing tracks to also look up with the original os.walk scan (0 to skip)')
+    parser.add_argument('--workers', type=int, default=8, help='Threads reading TrackId tags')
+    parser.add_argument('--seed', type=int, default=5)
+    args = parser.parse_args()
+
+    for position, size in enumerate(sorted(args.sizes)):
+        with tempfile.TemporaryDirectory() as root:
+            tracks = generate_library(root, size, args.seed)
+
+            start = time.perf_counter()
+            index = LibraryIndex(root)
+            index_elapsed = time.perf_counter() - start
+
+            start = time.perf_counter()
+            result = match_local_files(tracks, index, args.workers)
+            match_elapsed = time.perf_counter() - start
+
+            total = index_elapsed + match_elapsed
+            missing = result['missing_downloads']
+            print(f"{size} files: index {index_elapsed:.2f}s, match {match_elapsed:.2f}s, "
+                  f"total {total:.2f}s ({total / size * 1e6:.0f} us/file); "
+                  f"{len(result['found_track_ids'])} tagged, {len(missing)} missing "
+                  f"({sum(t['file_exists'] for t in missing)} found by name)")
+
+            if position == 0 and args.legacy_missing:
+                sample = [t for t in tracks if t['id'].startswith('missing')][:args.legacy_missing]
+                start = time.perf_counter()
+                legacy_find_missing(root, sample)
+                legacy_elapsed = time.perf_counter() - start
+                print(f"  original lookup of {len(sample)} missing tracks: {legacy_elapsed:.2f}s "
+                      f"(~{legacy_elapsed / max(1, len(sample)) * len(missing):.0f}s for all {len(missing)})")
+
+
+if __name__ == '__main__':
+    main()
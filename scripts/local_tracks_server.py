@@ -1,13 +1,15 @@
+import gzip
+import hashlib
 import json
 import os
-import time
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import threading
-from pathlib import Path
+from collections import deque
+from dataclasses import dataclass, field
 from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
 import argparse
 from dotenv import load_dotenv
-import sys
 
 # Load environment variables
 load_dotenv()
@@ -16,62 +18,215 @@ load_dotenv()
 DEFAULT_PORT = 8765
 DEFAULT_CACHE_PATH = os.getenv("LOCAL_TRACKS_CACHE_DIRECTORY", "")
 
+# How often the background poller checks the cache file for changes
+DEFAULT_POLL_INTERVAL = float(os.getenv("LOCAL_TRACKS_POLL_SECONDS", "2"))
 
-class LocalTracksRequestHandler(BaseHTTPRequestHandler):
-    cache_path = ""
-    last_modified_time = 0
-    cache_data = None
+LATEST_CACHE_FILE = "local_tracks_cache.json"
 
-    def do_OPTIONS(self):
-        """Handle OPTIONS requests for CORS preflight"""
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.send_header('Access-Control-Max-Age', '86400')  # 24 hours
-        self.end_headers()
+# Changelog bounds: versions kept, and changed entries kept across those versions
+DEFAULT_HISTORY_VERSIONS = int(os.getenv("LOCAL_TRACKS_HISTORY_VERSIONS", "50"))
+DEFAULT_HISTORY_ENTRIES = int(os.getenv("LOCAL_TRACKS_HISTORY_ENTRIES", "100000"))
 
-    def do_GET(self):
-        """Handle GET requests"""
-        if self.path == '/':
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
+# Entry fields tried, in order, to identify a track across cache file versions
+TRACK_KEY_FIELDS = ('uri', 'path', 'file_path', 'filePath', 'id')
 
-            # Check if we need to reload the cache
-            self.reload_cache_if_needed()
 
-            # Return the cache data
-            self.wfile.write(json.dumps(self.cache_data).encode())
+@dataclass(frozen=True)
+class EncodedPayload:
+    """A cache file's contents, encoded once and shared by every request until the file changes."""
+    body: bytes
+    gzip_body: bytes
+    etag: str
+    cache_file: str
+    tracks_count: int
+    version: int = 0
 
-        elif self.path == '/status':
-            # Status endpoint for checking if server is running
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
 
-            status = {
-                "status": "running",
-                "time": datetime.now().isoformat(),
-                "cache_path": self.cache_path,
-                "cache_file": self.get_latest_cache_file(),
-                "tracks_count": len(self.cache_data.get("tracks", [])) if self.cache_data else 0
-            }
-            self.wfile.write(json.dumps(status).encode())
+def encode_payload(data, cache_file=None, version=0) -> EncodedPayload:
+    """Serialize the cache data to compact JSON and gzip it."""
+    body = json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return EncodedPayload(
+        body=body,
+        gzip_body=gzip.compress(body, compresslevel=6, mtime=0),
+        etag=f'"{hashlib.sha1(body).hexdigest()}"',
+        cache_file=cache_file,
+        tracks_count=len(data.get("tracks", [])) if isinstance(data, dict) else 0,
+        version=version
+    )
+
+
+@dataclass
+class TracksDelta:
+    """Changes between two consecutive cache file versions."""
+    version: int
+    # Entries by key
+    added: dict = field(default_factory=dict)
+    modified: dict = field(default_factory=dict)
+    removed: set = field(default_factory=set)
+
+    @property
+    def size(self):
+        return len(self.added) + len(self.modified) + len(self.removed)
+
+
+def find_key_field(tracks):
+    """The first of TRACK_KEY_FIELDS that every track entry has, or None."""
+    for key_field in TRACK_KEY_FIELDS:
+        if all(isinstance(track, dict) and track.get(key_field) is not None for track in tracks):
+            return key_field
+    return None
+
+
+def index_tracks(tracks, key_field):
+    """
+    Map track entries by key: the key field's value, or the entry's canonical JSON when
+    no field identifies the tracks (modifications then show up as removal plus addition).
+    """
+    if key_field:
+        return {str(track[key_field]): track for track in tracks}
+    return {json.dumps(track, sort_keys=True): track for track in tracks}
+
 
+def diff_tracks(previous, current, version) -> TracksDelta:
+    """Compare two indexes built by index_tracks."""
+    delta = TracksDelta(version)
+    for key, track in current.items():
+        if key not in previous:
+            delta.added[key] = track
+        elif previous[key] != track:
+            delta.modified[key] = track
+    delta.removed = {key for key in previous if key not in current}
+    return delta
+
+
+class LocalTracksCache:
+    """
+    The latest local tracks cache file, held in memory in encoded form.
+
+    Requests only read the current payload; checking the file for changes is left to
+    a background poller (see start_polling), which re-reads and re-encodes the file
+    only when its modification time or size changes.
+    """
+
+    def __init__(self, cache_path, max_history_versions=DEFAULT_HISTORY_VERSIONS,
+                 max_history_entries=DEFAULT_HISTORY_ENTRIES):
+        self.cache_path = cache_path
+        self.max_history_versions = max_history_versions
+        self.max_history_entries = max_history_entries
+        self._file_state = None
+        self._payload = encode_payload({"error": "No cache file found", "tracks": []})
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+        # Every rebuild of the payload is a new version; the changelog holds the deltas
+        # leading to the most recent versions
+        self._version = 0
+        self._key_field = None
+        self._index = {}
+        self._history = deque()
+        self._history_entries = 0
+        self._delta_payloads = {}
+
+    @property
+    def payload(self) -> EncodedPayload:
+        return self._payload
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def payload_since(self, since) -> EncodedPayload:
+        """
+        Get what a client holding version ``since`` needs to catch up.
+
+        Returns:
+            A delta payload ({"delta": true, "cache_version", "since", "key", "added",
+            "modified", "removed"}) when the changelog reaches back to ``since`` and the
+            delta is smaller than the full payload; otherwise the full payload
+        """
+        with self._lock:
+            if since is None:
+                return self._payload
+
+            cached = self._delta_payloads.get(since)
+            if cached is not None:
+                return cached
+
+            oldest = self._history[0].version - 1 if self._history else self._version
+            if since < oldest or since > self._version:
+                return self._payload
+
+            payload = self._encode_delta(since, [delta for delta in self._history if delta.version > since])
+            self._delta_payloads[since] = payload
+            return payload
+
+    def _encode_delta(self, since, deltas) -> EncodedPayload:
+        # Fold consecutive deltas into the net change since the client's version
+        added, modified, removed = {}, {}, set()
+        for delta in deltas:
+            for key, track in delta.added.items():
+                if key in removed:
+                    removed.discard(key)
+                    modified[key] = track
+                else:
+                    added[key] = track
+            for key, track in delta.modified.items():
+                if key in added:
+                    added[key] = track
+                else:
+                    modified[key] = track
+            for key in delta.removed:
+                if added.pop(key, None) is None:
+                    modified.pop(key, None)
+                    removed.add(key)
+
+        if len(added) + len(modified) + len(removed) > len(self._index) // 2 > 0:
+            # Cheaper to send everything
+            return self._payload
+
+        removed_keys = sorted(removed)
+        if not self._key_field:
+            removed_keys = [json.loads(key) for key in removed_keys]
+        return encode_payload({
+            "delta": True,
+            "cache_version": self._version,
+            "since": since,
+            "key": self._key_field,
+            "added": list(added.values()),
+            "modified": list(modified.values()),
+            "removed": removed_keys
+        }, self._payload.cache_file, self._version)
+
+    def _set_tracks(self, data, cache_file):
+        """Make ``data`` the current version, recording its changes in the changelog."""
+        tracks = data.get("tracks", []) if isinstance(data, dict) else []
+        if not isinstance(tracks, list):
+            tracks = []
+        key_field = find_key_field(tracks)
+        index = index_tracks(tracks, key_field)
+
+        self._version += 1
+        if key_field != self._key_field:
+            # Keys aren't comparable across versions: older clients get the full payload
+            self._history.clear()
+            self._history_entries = 0
         else:
-            self.send_response(404)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps({"error": "Not found"}).encode())
+            delta = diff_tracks(self._index, index, self._version)
+            self._history.append(delta)
+            self._history_entries += delta.size
+            while self._history and (len(self._history) > self.max_history_versions or
+                                     self._history_entries > self.max_history_entries):
+                self._history_entries -= self._history.popleft().size
+
+        self._key_field = key_field
+        self._index = index
+        self._delta_payloads = {}
+        full = dict(data, cache_version=self._version) if isinstance(data, dict) else data
+        self._payload = encode_payload(full, cache_file, self._version)
 
-    @classmethod
-    def get_latest_cache_file(cls):
+    def get_latest_cache_file(self):
         """Find the latest cache file in the cache directory"""
-        latest_file = os.path.join(cls.cache_path, "local_tracks_cache.json")
+        latest_file = os.path.join(self.cache_path, LATEST_CACHE_FILE)
 
         # First check if the "latest" file exists
         if os.path.exists(latest_file):
@@ -79,44 +234,201 @@ class LocalTracksRequestHandler(BaseHTTPRequestHandler):
 
         # Otherwise look for the most recent dated file
         cache_files = []
-        for file in os.listdir(cls.cache_path):
+        for file in os.listdir(self.cache_path):
             if file.startswith("local_tracks_cache_") and file.endswith(".json"):
-                file_path = os.path.join(cls.cache_path, file)
+                file_path = os.path.join(self.cache_path, file)
                 cache_files.append((file_path, os.path.getmtime(file_path)))
 
         # Sort by modification time (newest first)
         cache_files.sort(key=lambda x: x[1], reverse=True)
         return cache_files[0][0] if cache_files else None
 
-    @classmethod
-    def reload_cache_if_needed(cls):
-        """Check if cache file has changed and reload if necessary"""
-        cache_file = cls.get_latest_cache_file()
+    def refresh(self) -> bool:
+        """
+        Reload the cache file if it changed since the last load.
 
-        if not cache_file:
-            cls.cache_data = {"error": "No cache file found", "tracks": []}
-            return
+        Returns:
+            True if the payload was rebuilt
+        """
+        with self._lock:
+            try:
+                cache_file = self.get_latest_cache_file()
+            except OSError as e:
+                print(f"Error listing cache directory: {e}")
+                cache_file = None
+
+            if not cache_file:
+                if self._file_state is None and self._payload.cache_file is None:
+                    return False
+                self._file_state = None
+                self._set_tracks({"error": "No cache file found", "tracks": []}, None)
+                return True
 
-        current_mtime = os.path.getmtime(cache_file)
+            try:
+                stat = os.stat(cache_file)
+            except OSError:
+                return False
+            file_state = (cache_file, stat.st_mtime_ns, stat.st_size)
+            if file_state == self._file_state:
+                return False
 
-        # Reload if file has changed or we haven't loaded it yet
-        if current_mtime > cls.last_modified_time or cls.cache_data is None:
             print(f"Loading cache file: {cache_file}")
             try:
                 with open(cache_file, 'r', encoding='utf-8') as f:
-                    cls.cache_data = json.load(f)
-                cls.last_modified_time = current_mtime
-                print(f"Loaded {len(cls.cache_data.get('tracks', []))} tracks from cache")
+                    data = json.load(f)
             except Exception as e:
+                # Possibly caught mid-write: keep serving the previous payload and retry next poll
                 print(f"Error loading cache file: {e}")
-                cls.cache_data = {"error": str(e), "tracks": []}
+                if self._file_state is None:
+                    self._payload = encode_payload({"error": str(e), "tracks": []}, cache_file)
+                return False
 
+            self._set_tracks(data, cache_file)
+            self._file_state = file_state
+            print(f"Loaded {self._payload.tracks_count} tracks from cache as version {self._version} "
+                  f"({len(self._payload.body)} bytes, {len(self._payload.gzip_body)} gzipped)")
+            return True
 
-def run_server(port, cache_path):
-    """Run the HTTP server"""
-    # Set up the request handler with the cache path
-    LocalTracksRequestHandler.cache_path = cache_path
+    def start_polling(self, interval=DEFAULT_POLL_INTERVAL) -> threading.Thread:
+        """Check the cache file for changes every ``interval`` seconds in a daemon thread."""
+        def poll():
+            while not self._stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"Error polling cache file: {e}")
+
+        thread = threading.Thread(target=poll, name="local-tracks-cache-poller", daemon=True)
+        thread.start()
+        return thread
+
+    def stop_polling(self):
+        self._stop.set()
+
+
+def accepts_gzip(accept_encoding):
+    """Whether an Accept-Encoding header allows a gzip response."""
+    for coding in (accept_encoding or "").split(','):
+        name, _, params = coding.strip().partition(';')
+        if name.strip().lower() in ('gzip', '*'):
+            q = params.strip()
+            try:
+                return not (q.startswith('q=') and float(q[2:]) == 0)
+            except ValueError:
+                return False
+    return False
+
+
+def etag_matches(if_none_match, etag):
+    """Whether an If-None-Match header lists ``etag`` (weak comparison, as for GET)."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in candidates or any(tag.removeprefix('W/') == etag for tag in candidates)
+
+
+class LocalTracksRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    cache: LocalTracksCache = None
+
+    def do_OPTIONS(self):
+        """Handle OPTIONS requests for CORS preflight"""
+        self.send_response(200)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, If-None-Match')
+        self.send_header('Access-Control-Max-Age', '86400')  # 24 hours
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        """Handle GET requests"""
+        url = urlsplit(self.path)
+        path = url.path
+
+        if path == '/':
+            # ?since=<version> asks only for the changes after the version the client holds
+            since = parse_qs(url.query).get('since', [None])[0]
+            if since is None:
+                self.send_payload(self.cache.payload)
+            else:
+                try:
+                    since = int(since)
+                except ValueError:
+                    since = None
+                self.send_payload(self.cache.payload_since(since))
+
+        elif path == '/status':
+            # Status endpoint for checking if server is running
+            payload = self.cache.payload
+            self.send_json(200, {
+                "status": "running",
+                "time": datetime.now().isoformat(),
+                "cache_path": self.cache.cache_path,
+                "cache_file": payload.cache_file,
+                "tracks_count": payload.tracks_count,
+                "cache_version": payload.version,
+                "etag": payload.etag
+            })
+
+        else:
+            self.send_json(404, {"error": "Not found"})
+
+    def send_payload(self, payload: EncodedPayload):
+        """Send the pre-encoded tracks, or 304 when the client already has this version."""
+        if etag_matches(self.headers.get('If-None-Match'), payload.etag):
+            self.send_response(304)
+            self.send_header('ETag', payload.etag)
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        use_gzip = accepts_gzip(self.headers.get('Accept-Encoding'))
+        body = payload.gzip_body if use_gzip else payload.body
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Expose-Headers', 'ETag, X-Cache-Version')
+        self.send_header('ETag', payload.etag)
+        self.send_header('X-Cache-Version', str(payload.version))
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Vary', 'Accept-Encoding')
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Spicetify polls constantly; don't print a line per request
+        pass
 
+
+def create_server(port, cache_path, host='localhost'):
+    """Create the HTTP server and load the cache; the caller starts serving."""
+    cache = LocalTracksCache(cache_path)
+    cache.refresh()
+
+    handler = type('BoundLocalTracksRequestHandler', (LocalTracksRequestHandler,), {'cache': cache})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.cache = cache
+    return server
+
+
+def run_server(port, cache_path, poll_interval=DEFAULT_POLL_INTERVAL):
+    """Run the HTTP server"""
     # Validate the cache path
     if not os.path.isdir(cache_path):
         print(f"Error: Cache directory {cache_path} does not exist.")
@@ -127,13 +439,11 @@ def run_server(port, cache_path):
             print(f"Failed to create directory: {e}")
             return
 
-    # Load initial cache
-    LocalTracksRequestHandler.reload_cache_if_needed()
-
-    # Create and start the server
-    server = HTTPServer(('localhost', port), LocalTracksRequestHandler)
+    # Load initial cache and create the server
+    server = create_server(port, cache_path)
+    server.cache.start_polling(poll_interval)
     print(f"Local tracks server running at http://localhost:{port}")
-    print(f"Using cache directory: {cache_path}")
+    print(f"Using cache directory: {cache_path} (checked every {poll_interval}s)")
     print(f"Press Ctrl+C to stop the server")
 
     try:
@@ -141,6 +451,7 @@ def run_server(port, cache_path):
     except KeyboardInterrupt:
         print("Server stopped by user")
     finally:
+        server.cache.stop_polling()
         server.server_close()
 
 
@@ -150,10 +461,12 @@ if __name__ == "__main__":
                         help=f"Port to run the server on (default: {DEFAULT_PORT})")
     parser.add_argument("--cache-path", type=str, default=DEFAULT_CACHE_PATH,
                         help=f"Path to the directory containing cache files (default: {DEFAULT_CACHE_PATH})")
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL,
+                        help=f"Seconds between checks of the cache file (default: {DEFAULT_POLL_INTERVAL})")
 
     args = parser.parse_args()
 
     print("=== Tagify Local Tracks Server ===")
     print(f"Starting server on port {args.port}")
 
-    run_server(args.port, args.cache_path)
+    run_server(args.port, args.cache_path, args.poll_interval)
@@ -8,6 +8,7 @@ project_root = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(project_root))
 
 from helpers.m3u_helper import search_tracks_in_m3u_files, search_tracks_by_title_in_m3u_files
+from helpers.m3u_index_helper import get_m3u_index
 
 
 def search_by_title(m3u_directory, search_term, case_sensitive=False):
@@ -19,51 +20,15 @@ def search_by_title(m3u_directory, search_term, case_sensitive=False):
     print(f"Case sensitive: {case_sensitive}")
     print("=" * 60)
 
-    # Find all M3U files and search through them
-    matches_found = 0
+    # Search the shared M3U index (each file is parsed once)
+    results = get_m3u_index(m3u_directory).find_by_title([search_term], case_sensitive=case_sensitive)
 
-    for root, dirs, files in os.walk(m3u_directory):
-        for filename in files:
-            if not filename.lower().endswith('.m3u'):
-                continue
-
-            m3u_path = os.path.join(root, filename)
-            relative_m3u_path = os.path.relpath(m3u_path, m3u_directory)
-
-            try:
-                with open(m3u_path, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-
-                    for i, line in enumerate(lines):
-                        # Look for EXTINF lines which contain track info
-                        if line.startswith('#EXTINF:'):
-                            try:
-                                info_part = line[8:].split(',', 1)
-                                if len(info_part) > 1:
-                                    track_info = info_part[1].strip()
-
-                                    # Get the file path from the next line
-                                    file_path = ""
-                                    if i + 1 < len(lines) and not lines[i + 1].startswith('#'):
-                                        file_path = lines[i + 1].strip()
-
-                                    # Check if search term is in track info
-                                    search_in = track_info if case_sensitive else track_info.lower()
-                                    term_to_find = search_term if case_sensitive else search_term.lower()
-
-                                    if term_to_find in search_in:
-                                        matches_found += 1
-                                        print(f"\n[{matches_found}] Found in: {relative_m3u_path}")
-                                        print(f"    Track: {track_info}")
-                                        print(f"    File:  {file_path}")
-
-                            except Exception as e:
-                                print(f"Error parsing line in {relative_m3u_path}: {e}")
-                                continue
-
-            except Exception as e:
-                print(f"Error reading M3U file {relative_m3u_path}: {e}")
-                continue
+    matches_found = 0
+    for match in results[search_term]:
+        matches_found += 1
+        print(f"\n[{matches_found}] Found in: {match['playlist']}")
+        print(f"    Track: {match['track_info']}")
+        print(f"    File:  {match['file_path']}")
 
     print("=" * 60)
     print(f"Search complete. Found {matches_found} matches.")
@@ -96,6 +61,31 @@ def search_by_exact_titles(m3u_directory, titles):
     print(f"Search complete. Found {total_matches} total matches.")
 
 
+def search_by_file_paths(m3u_directory, file_paths):
+    """
+    Find which playlists contain each of the given track files
+    """
+    print(f"Searching for playlists containing: {file_paths}")
+    print(f"M3U Directory: {m3u_directory}")
+    print("=" * 60)
+
+    results = search_tracks_in_m3u_files(m3u_directory, file_paths)
+
+    total_matches = 0
+    for file_path, playlists in results.items():
+        print(f"\nFile: '{file_path}'")
+        if playlists:
+            print(f"Found in {len(playlists)} playlist(s):")
+            for i, playlist in enumerate(playlists, 1):
+                total_matches += 1
+                print(f"  [{i}] {playlist}")
+        else:
+            print("  Not found in any playlist")
+
+    print("=" * 60)
+    print(f"Search complete. Found {total_matches} total matches.")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Search for tracks in M3U playlists',
@@ -107,6 +97,7 @@ Examples:
   python scripts/search_m3u_tracks.py --exact "Sundaland (Extended Mix)"
   python scripts/search_m3u_tracks.py --exact "Track 1" "Track 2" "Track 3"
   python scripts/search_m3u_tracks.py "artist name" --dir "D:\\my_playlists"
+  python scripts/search_m3u_tracks.py --files "D:\\tracks\\Artist - Title.mp3"
         '''
     )
 
@@ -131,6 +122,12 @@ Examples:
         help='Search for exact title matches instead of partial matches'
     )
 
+    parser.add_argument(
+        '--files',
+        action='store_true',
+        help='Treat the arguments as track file paths and list the playlists containing them'
+    )
+
     parser.add_argument(
         '--case-sensitive',
         action='store_true',
@@ -145,7 +142,9 @@ Examples:
         return 1
 
     # Perform the search based on mode
-    if args.exact:
+    if args.files:
+        search_by_file_paths(args.dir, args.search_terms)
+    elif args.exact:
         # Exact title matching for multiple titles
         search_by_exact_titles(args.dir, args.search_terms)
     else:
@@ -6,6 +6,7 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 
+from sql.core.migrations import apply_migrations, is_schema_current
 from utils.logger import setup_logger
 
 
@@ -55,9 +56,14 @@ class DatabaseConnection:
         return str(db_dir / "tagify.db")
 
     def _initialize_database(self):
-        """Initialize database schema if it doesn't exist."""
+        """Initialize the database schema unless it is already at the latest version."""
         connection = self._create_new_connection()
         try:
+            # Fast path: the header says the schema is current, so there is nothing to create
+            if is_schema_current(connection):
+                self.db_logger.info("Database schema is current, skipping schema initialization")
+                return
+
             self._create_schema(connection)
             self.db_logger.info("Database schema initialized successfully")
         except Exception as e:
@@ -66,7 +72,8 @@ class DatabaseConnection:
         finally:
             connection.close()
 
-    def _create_schema(self, connection: sqlite3.Connection):
+    @staticmethod
+    def _create_schema(connection: sqlite3.Connection):
         """Create database tables if they don't exist."""
         cursor = connection.cursor()
 
@@ -121,13 +128,14 @@ class DatabaseConnection:
 
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_tracks_trackid ON Tracks(TrackId)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_tracks_islocal ON Tracks(IsLocal)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_trackplaylists_playlistid ON TrackPlaylists(PlaylistId)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_filemappings_filepath ON FileTrackMappings(FilePath)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_filemappings_uri ON FileTrackMappings(Uri)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_filemappings_active ON FileTrackMappings(IsActive)")
 
             connection.commit()
 
+            # Everything after the base tables is versioned; see sql/core/migrations.py
+            apply_migrations(connection)
+
         except Exception as e:
             connection.rollback()
             raise
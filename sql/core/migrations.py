@@ -0,0 +1,223 @@
+import sqlite3
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from utils.logger import setup_logger
+
+migration_logger = setup_logger('db_migrations', 'sql', 'db_migrations.log')
+
+
+@dataclass(frozen=True)
+class Migration:
+    """A numbered schema change, applied once and recorded in SchemaMigrations."""
+    version: int
+    description: str
+    statements: Tuple[str, ...]
+
+
+# Append new migrations to the end with the next version number; never edit an applied one.
+MIGRATIONS: List[Migration] = [
+    Migration(
+        version=1,
+        description="Partial and covering indexes for active mapping and playlist lookups",
+        statements=(
+            # IsActive on its own has two values and only misleads the planner
+            "DROP INDEX IF EXISTS idx_filemappings_active",
+            "DROP INDEX IF EXISTS idx_filemappings_active_uri_path",
+            # URI -> path lookups, duplicate grouping and stale cleanup scans over active rows.
+            # IsActive is repeated as a key column so SQLite can answer from the index alone
+            "CREATE INDEX IF NOT EXISTS idx_filemappings_active_uri_path "
+            "ON FileTrackMappings(Uri, FilePath, IsActive) WHERE IsActive = 1",
+            # Path -> URI lookups over active rows
+            "CREATE INDEX IF NOT EXISTS idx_filemappings_active_path_uri "
+            "ON FileTrackMappings(FilePath, Uri, IsActive) WHERE IsActive = 1",
+            # Playlist -> URIs without touching the table; URI -> playlists is already
+            # covered by the (Uri, PlaylistId) primary key index
+            "DROP INDEX IF EXISTS idx_trackplaylists_playlistid",
+            "CREATE INDEX IF NOT EXISTS idx_trackplaylists_playlist_uri ON TrackPlaylists(PlaylistId, Uri)",
+        )
+    ),
+    Migration(
+        version=2,
+        description="Generation counters bumped by triggers when Tracks change",
+        statements=(
+            """
+            CREATE TABLE IF NOT EXISTS DataGenerations (
+                TableName TEXT PRIMARY KEY,
+                Generation INTEGER NOT NULL DEFAULT 0
+            )
+            """,
+            "INSERT OR IGNORE INTO DataGenerations (TableName, Generation) VALUES ('Tracks', 0)",
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_tracks_generation_insert AFTER INSERT ON Tracks
+            BEGIN
+                UPDATE DataGenerations SET Generation = Generation + 1 WHERE TableName = 'Tracks';
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_tracks_generation_update AFTER UPDATE ON Tracks
+            BEGIN
+                UPDATE DataGenerations SET Generation = Generation + 1 WHERE TableName = 'Tracks';
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_tracks_generation_delete AFTER DELETE ON Tracks
+            BEGIN
+                UPDATE DataGenerations SET Generation = Generation + 1 WHERE TableName = 'Tracks';
+            END
+            """,
+        )
+    ),
+    Migration(
+        version=3,
+        description="Persisted Liked Songs and key/value sync state for incremental syncs",
+        statements=(
+            # AddedAt is stored as 'YYYY-MM-DD HH:MM:SS' (UTC) so text comparison orders by time
+            """
+            CREATE TABLE IF NOT EXISTS LikedSongs (
+                TrackId TEXT PRIMARY KEY,
+                TrackName TEXT NOT NULL,
+                Artists TEXT NOT NULL,
+                AddedAt TEXT NOT NULL
+            )
+            """,
+            # High-water mark lookups and newest-first listing
+            "CREATE INDEX IF NOT EXISTS idx_likedsongs_addedat ON LikedSongs(AddedAt)",
+            """
+            CREATE TABLE IF NOT EXISTS SyncState (
+                Name TEXT PRIMARY KEY,
+                Value TEXT,
+                UpdatedAt DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+        )
+    ),
+    Migration(
+        version=4,
+        description="Generation counters for Playlists and TrackPlaylists",
+        statements=(
+            "INSERT OR IGNORE INTO DataGenerations (TableName, Generation) VALUES ('Playlists', 0)",
+            "INSERT OR IGNORE INTO DataGenerations (TableName, Generation) VALUES ('TrackPlaylists', 0)",
+        ) + tuple(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table.lower()}_generation_{event.lower()} AFTER {event} ON {table}
+            BEGIN
+                UPDATE DataGenerations SET Generation = Generation + 1 WHERE TableName = '{table}';
+            END
+            """
+            for table in ('Playlists', 'TrackPlaylists')
+            for event in ('INSERT', 'UPDATE', 'DELETE')
+        )
+    ),
+    Migration(
+        version=5,
+        description="Drop the per-row Tracks generation triggers; UnitOfWork bumps it once per commit",
+        statements=(
+            # Each trigger ran an extra UPDATE per written row and disabled SQLite's
+            # truncate optimization for DELETE FROM Tracks
+            "DROP TRIGGER IF EXISTS trg_tracks_generation_insert",
+            "DROP TRIGGER IF EXISTS trg_tracks_generation_update",
+            "DROP TRIGGER IF EXISTS trg_tracks_generation_delete",
+        )
+    ),
+    Migration(
+        version=6,
+        description="Drop the per-row Playlists and TrackPlaylists generation triggers",
+        statements=tuple(
+            f"DROP TRIGGER IF EXISTS trg_{table}_generation_{event}"
+            for table in ('playlists', 'trackplaylists')
+            for event in ('insert', 'update', 'delete')
+        )
+    ),
+]
+
+
+LATEST_SCHEMA_VERSION = max(m.version for m in MIGRATIONS)
+
+
+def get_schema_version(connection: sqlite3.Connection) -> int:
+    """Get the schema version stored in the database header (PRAGMA user_version)."""
+    return connection.execute("PRAGMA user_version").fetchone()[0]
+
+
+def is_schema_current(connection: sqlite3.Connection) -> bool:
+    """
+    Check whether the database is already at the latest schema version.
+
+    This only reads the database header, so callers can skip all schema work on startup.
+    """
+    return get_schema_version(connection) >= LATEST_SCHEMA_VERSION
+
+
+def get_applied_versions(connection: sqlite3.Connection) -> List[int]:
+    """
+    Get the migration versions already applied to a database.
+
+    Args:
+        connection: Open database connection
+
+    Returns:
+        Sorted list of applied version numbers
+    """
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS SchemaMigrations (
+            Version INTEGER PRIMARY KEY,
+            Description TEXT NOT NULL,
+            AppliedAt DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    return [row[0] for row in connection.execute("SELECT Version FROM SchemaMigrations ORDER BY Version")]
+
+
+def apply_migrations(connection: sqlite3.Connection) -> List[int]:
+    """
+    Apply every pending migration in version order.
+
+    Each migration runs its statements and records its version (in SchemaMigrations and
+    in PRAGMA user_version) in its own transaction, so a failure leaves the database at
+    the previous version. When anything was applied, statistics are refreshed with
+    ANALYZE and PRAGMA optimize so the planner picks up the new indexes.
+
+    Args:
+        connection: Open database connection with the base schema created
+
+    Returns:
+        List of versions applied by this call
+    """
+    applied = set(get_applied_versions(connection))
+    if connection.in_transaction:
+        connection.commit()
+
+    newly_applied = []
+    for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+        if migration.version in applied:
+            continue
+
+        connection.execute("BEGIN")
+        try:
+            for statement in migration.statements:
+                connection.execute(statement)
+            connection.execute(
+                "INSERT INTO SchemaMigrations (Version, Description) VALUES (?, ?)",
+                (migration.version, migration.description)
+            )
+            connection.execute(f"PRAGMA user_version = {int(migration.version)}")
+            connection.commit()
+        except Exception as e:
+            connection.rollback()
+            migration_logger.error(f"Migration {migration.version} failed: {e}")
+            raise
+
+        newly_applied.append(migration.version)
+        migration_logger.info(f"Applied migration {migration.version}: {migration.description}")
+
+    # Databases migrated before user_version was tracked only have SchemaMigrations rows
+    if applied and get_schema_version(connection) < max(applied | set(newly_applied)):
+        connection.execute(f"PRAGMA user_version = {int(max(applied | set(newly_applied)))}")
+
+    if newly_applied:
+        connection.execute("ANALYZE")
+        connection.execute("PRAGMA optimize")
+        connection.commit()
+
+    return newly_applied
@@ -1,8 +1,16 @@
 from typing import Optional
 
 from sql.core.connection import DatabaseConnection
+from sql.repositories.file_track_mapping_repository import FileTrackMappingRepository
+from sql.repositories.liked_song_repository import LikedSongRepository
+from sql.repositories.playlist_repository import PlaylistRepository
+from sql.repositories.sync_state_repository import SyncStateRepository
+from sql.repositories.track_playlist_repository import TrackPlaylistRepository
+from sql.repositories.track_repository import TrackRepository
 from utils.logger import setup_logger
 
+uow_logger = setup_logger('unit_of_work', 'sql', 'unit_of_work.log')
+
 
 class UnitOfWork:
     """
@@ -23,7 +31,9 @@ class UnitOfWork:
         self.playlist_repository = None
         self.track_playlist_repository = None
         self.file_track_mapping_repository = None
-        self.db_logger = setup_logger('unit_of_work', 'sql', 'unit_of_work.log')
+        self.liked_song_repository = None
+        self.sync_state_repository = None
+        self.db_logger = uow_logger
         self._repositories_initialized = False
         self._transaction_started = False
 
@@ -87,6 +97,7 @@ class UnitOfWork:
 
         try:
             if self._transaction_started:
+                self._bump_generations()
                 self.connection.commit()
                 self._transaction_started = False
                 self.db_logger.info("Transaction committed")
@@ -105,11 +116,39 @@ class UnitOfWork:
             if self._transaction_started:
                 self.connection.rollback()
                 self._transaction_started = False
+                self._clear_writes()
                 self.db_logger.info("Transaction rolled back")
         except Exception as e:
             self.db_logger.error(f"Error rolling back transaction: {e}")
             raise
 
+    def _generation_repositories(self):
+        """Repositories whose table has a generation counter."""
+        if not self._repositories_initialized:
+            return []
+        return [repository for repository in (self.track_repository, self.playlist_repository,
+                                              self.track_playlist_repository)
+                if repository.generation_table]
+
+    def _bump_generations(self):
+        """
+        Bump the generation counter of every table written in this transaction, once.
+
+        This runs inside the transaction being committed, so readers never see new rows
+        with an old generation.
+        """
+        written = [(repository.generation_table,) for repository in self._generation_repositories()
+                   if repository.has_writes]
+        if written:
+            self.connection.executemany(
+                "UPDATE DataGenerations SET Generation = Generation + 1 WHERE TableName = ?", written
+            )
+        self._clear_writes()
+
+    def _clear_writes(self):
+        for repository in self._generation_repositories():
+            repository.has_writes = False
+
     def _release_connection(self):
         """Release the database connection back to the pool."""
         if self.connection is not None:
@@ -131,16 +170,12 @@ class UnitOfWork:
         if self._repositories_initialized:
             return
 
-        # Import repositories here to avoid circular imports
-        from sql.repositories.track_repository import TrackRepository
-        from sql.repositories.playlist_repository import PlaylistRepository
-        from sql.repositories.track_playlist_repository import TrackPlaylistRepository
-        from sql.repositories.file_track_mapping_repository import FileTrackMappingRepository
-
         self.track_repository = TrackRepository(self.connection)
         self.playlist_repository = PlaylistRepository(self.connection)
         self.track_playlist_repository = TrackPlaylistRepository(self.connection)
         self.file_track_mapping_repository = FileTrackMappingRepository(self.connection)
+        self.liked_song_repository = LikedSongRepository(self.connection)
+        self.sync_state_repository = SyncStateRepository(self.connection)
 
         self._repositories_initialized = True
         self.db_logger.debug("Repositories initialized")
@@ -43,8 +43,8 @@ def fetch_master_tracks_db():
     print('Fetching all tracks from Tracks table')
 
     with UnitOfWork() as uow:
-        tracks = uow.track_repository.get_all()
-        return [(track.title, track.artists, track.album) for track in tracks]
+        rows = uow.track_repository.iter_query("SELECT TrackTitle, Artists, Album FROM Tracks")
+        return [(row['TrackTitle'], row['Artists'], row['Album']) for row in rows]
 
 
 # Get the date a track was added to MASTER playlist
@@ -8,6 +8,8 @@ class FileTrackMapping:
     """
     Domain model representing the mapping between local files and Spotify tracks.
     """
+    __slots__ = ('mapping_id', 'file_path', 'uri', 'file_hash', 'file_size', 'last_modified', 'created_at',
+                 'is_active')
 
     def __init__(self, mapping_id: int = None, file_path: str = "", spotify_uri: str = "",
                  file_hash: str = None, file_size: int = None,
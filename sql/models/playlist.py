@@ -6,6 +6,7 @@ class Playlist:
     Domain model representing a playlist in the music library.
     Contains business logic and relationships related to playlists.
     """
+    __slots__ = ('playlist_id', 'name', 'master_sync_snapshot_id', 'associations_snapshot_id', '_tracks')
 
     def __init__(self, playlist_id: str, name: str, master_sync_snapshot_id: str = None, associations_snapshot_id: str = None):
         """
@@ -21,7 +22,18 @@ class Playlist:
         self.name = name
         self.master_sync_snapshot_id = master_sync_snapshot_id or ""
         self.associations_snapshot_id = associations_snapshot_id or ""
-        self.tracks = []
+        self._tracks = None
+
+    @property
+    def tracks(self) -> list:
+        """Tracks added to this playlist in memory (allocated on first use)."""
+        if self._tracks is None:
+            self._tracks = []
+        return self._tracks
+
+    @tracks.setter
+    def tracks(self, value: list) -> None:
+        self._tracks = value
 
     def add_track(self, track) -> None:
         """
@@ -3,6 +3,11 @@ from typing import List, Optional
 
 
 class Track:
+    # Slots keep the 30k+ tracks loaded by some services small; the playlists list is
+    # only allocated for the few tracks that actually get playlist relationships
+    __slots__ = ('uri', 'track_id', 'title', 'artists', 'album', 'added_to_master', 'is_local', 'duration_ms',
+                 '_playlists')
+
     def __init__(self, uri: str = None, track_id: str = None, title: str = "", artists: str = "", album: str = "",
                  added_to_master: Optional[datetime] = None, is_local: bool = False, duration_ms: int = None):
         """
@@ -26,7 +31,18 @@ class Track:
         self.added_to_master = added_to_master
         self.is_local = is_local
         self.duration_ms = duration_ms
-        self.playlists = []
+        self._playlists = None
+
+    @property
+    def playlists(self) -> list:
+        """Playlists this track has been added to in memory (allocated on first use)."""
+        if self._playlists is None:
+            self._playlists = []
+        return self._playlists
+
+    @playlists.setter
+    def playlists(self, value: list) -> None:
+        self._playlists = value
 
     def get_duration_formatted(self) -> str:
         """Get duration formatted as MM:SS"""
@@ -77,8 +93,8 @@ class Track:
         Returns:
             bool: True if the track was removed, False if it wasn't in the playlist
         """
-        if playlist in self.playlists:
-            self.playlists.remove(playlist)
+        if self._playlists and playlist in self._playlists:
+            self._playlists.remove(playlist)
             return True
         return False
 
@@ -110,7 +126,7 @@ class Track:
         Returns:
             bool: True if track is in the playlist, False otherwise
         """
-        return playlist in self.playlists
+        return bool(self._playlists) and playlist in self._playlists
 
     def __str__(self) -> str:
         """String representation of the track."""
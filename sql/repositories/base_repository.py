@@ -1,11 +1,27 @@
 import sqlite3
-from typing import Any, List, Optional, Tuple, TypeVar, Generic
+from collections import namedtuple
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Sequence, Tuple, TypeVar, Generic
 
 from utils.logger import setup_logger
 
 # Generic type for models
 T = TypeVar('T')
 
+repository_logger = setup_logger('repository', 'sql', 'repository.log')
+
+# Rows pulled from SQLite per fetchmany() call by the streaming APIs
+DEFAULT_BATCH_SIZE = 1000
+
+# Column names per table, read once per process for projection validation
+_table_columns: Dict[str, FrozenSet[str]] = {}
+
+
+@lru_cache(maxsize=None)
+def _projection_type(table_name: str, columns: Tuple[str, ...]):
+    """Get the (cached) named tuple type used for a projection of a table."""
+    return namedtuple(f"{table_name}Projection", columns)
+
 
 class BaseRepository(Generic[T]):
     """
@@ -22,7 +38,11 @@ class BaseRepository(Generic[T]):
         self.connection = connection
         self.table_name = ""  # Override in subclasses
         self.id_column = ""  # Override in subclasses
-        self.db_logger = setup_logger('repository', 'sql', 'repository.log')
+        # DataGenerations row bumped when a UnitOfWork commits writes to this table
+        self.generation_table: Optional[str] = None
+        # Whether rows were changed since the last commit or rollback
+        self.has_writes = False
+        self.db_logger = repository_logger
 
     def execute_query(self, query: str, params: Optional[Tuple] = None) -> sqlite3.Cursor:
         """
@@ -68,6 +88,8 @@ class BaseRepository(Generic[T]):
         cursor = self.execute_query(query, params)
         try:
             row_count = cursor.rowcount
+            if row_count > 0:
+                self.has_writes = True
             return row_count
         finally:
             cursor.close()
@@ -108,6 +130,55 @@ class BaseRepository(Generic[T]):
         finally:
             cursor.close()
 
+    def iter_query(self, query: str, params: Optional[Tuple] = None,
+                   batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[sqlite3.Row]:
+        """
+        Execute a query and stream its results in batches.
+
+        Only ``batch_size`` rows are held at a time, so memory stays flat however large the
+        table grows. The generator must be consumed while the connection is still open
+        (i.e. inside the UnitOfWork); the cursor is closed when it is exhausted or closed.
+
+        Args:
+            query: SQL query to execute
+            params: Parameters for the query
+            batch_size: Number of rows fetched per round trip
+
+        Yields:
+            Result rows
+        """
+        cursor = self.execute_query(query, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+
+    def iter_all(self, where: str = "", params: Optional[Tuple] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[T]:
+        """
+        Stream entities from the table, mapping each row to a model as it is read.
+
+        Args:
+            where: Optional SQL condition (without the WHERE keyword), using ? placeholders
+            params: Parameters for the condition
+            batch_size: Number of rows fetched per round trip
+
+        Yields:
+            Entities, one at a time
+        """
+        if not self.table_name:
+            raise NotImplementedError("table_name must be set in subclass")
+
+        query = f"SELECT * FROM {self.table_name}"
+        if where:
+            query += f" WHERE {where}"
+
+        return map(self._map_to_model, self.iter_query(query, params, batch_size))
+
     def get_by_id(self, id_value: Any) -> Optional[T]:
         """
         Get an entity by its ID.
@@ -143,6 +214,54 @@ class BaseRepository(Generic[T]):
 
         return [self._map_to_model(row) for row in results]
 
+    def get_projection(self, columns: Sequence[str], where: str = "", params: Optional[Tuple] = None,
+                       order_by: str = "") -> List[Tuple]:
+        """
+        Fetch only the given columns as lightweight named tuples.
+
+        Use this instead of ``get_all`` when a caller needs a few fields from every row: no
+        model objects are built and unused columns are never read from the database.
+
+        Args:
+            columns: Column names to select, e.g. ("Uri", "FilePath")
+            where: Optional SQL condition (without the WHERE keyword), using ? placeholders
+            params: Parameters for the condition
+            order_by: Optional ORDER BY clause (without the keywords)
+
+        Returns:
+            List of named tuples with one field per requested column
+        """
+        if not self.table_name:
+            raise NotImplementedError("table_name must be set in subclass")
+
+        columns = tuple(columns)
+        unknown = set(columns) - self._get_table_columns()
+        if not columns or unknown:
+            raise ValueError(f"Unknown columns for {self.table_name}: {sorted(unknown) or 'none requested'}")
+
+        query = f"SELECT {', '.join(columns)} FROM {self.table_name}"
+        if where:
+            query += f" WHERE {where}"
+        if order_by:
+            query += f" ORDER BY {order_by}"
+
+        cursor = self.execute_query(query, params)
+        try:
+            # Plain tuples skip sqlite3.Row construction; the named tuple wraps them directly
+            cursor.row_factory = None
+            projection_type = _projection_type(self.table_name, columns)
+            return list(map(projection_type._make, cursor.fetchall()))
+        finally:
+            cursor.close()
+
+    def _get_table_columns(self) -> FrozenSet[str]:
+        """Get the column names of this repository's table."""
+        columns = _table_columns.get(self.table_name)
+        if not columns:
+            rows = self.fetch_all(f"PRAGMA table_info({self.table_name})")
+            columns = _table_columns[self.table_name] = frozenset(row['name'] for row in rows)
+        return columns
+
     def delete_all(self) -> int:
         """
         Delete all records from the table.
@@ -4,9 +4,13 @@ import sqlite3
 from datetime import datetime
 from typing import Optional, Dict, Set, Any, List
 
+from helpers.file_existence_helper import batch_check_file_existence
 from sql.models.file_track_mapping import FileTrackMapping
 from sql.repositories.base_repository import BaseRepository
 
+# Paths bound per statement by the batch lookups (SQLite allows 999 parameters in older builds)
+PATH_LOOKUP_CHUNK_SIZE = 500
+
 
 class FileTrackMappingRepository(BaseRepository[FileTrackMapping]):
     def __init__(self, connection: sqlite3.Connection):
@@ -65,7 +69,12 @@ class FileTrackMappingRepository(BaseRepository[FileTrackMapping]):
         return {row['Uri']: row['FilePath'] for row in results}
 
     def cleanup_stale_mappings(self) -> Dict[str, int]:
-        """Clean up mappings that point to files that no longer exist."""
+        """
+        Clean up mappings that point to files that no longer exist.
+
+        Stale mapping ids are staged in a temp table and soft-deleted with a single
+        set-based UPDATE, so the statement size doesn't grow with the number of stale rows.
+        """
         query = """
             SELECT MappingId, FilePath, Uri 
             FROM FileTrackMappings 
@@ -73,24 +82,34 @@ class FileTrackMappingRepository(BaseRepository[FileTrackMapping]):
         """
 
         results = self.fetch_all(query)
+        # Re-stat every directory so files deleted moments ago are still caught
+        existing_paths = batch_check_file_existence((row['FilePath'] for row in results), max_age=0)
         stale_mappings = []
         cleaned_paths = []
 
         for row in results:
-            if not os.path.exists(row['FilePath']):
-                stale_mappings.append(row['MappingId'])
+            if row['FilePath'] not in existing_paths:
+                stale_mappings.append((row['MappingId'],))
                 cleaned_paths.append(row['FilePath'])
 
         # Soft delete stale mappings
         cleaned_count = 0
         if stale_mappings:
-            placeholders = ','.join(['?' for _ in stale_mappings])
-            cleanup_query = f"""
-                UPDATE FileTrackMappings 
-                SET IsActive = 0 
-                WHERE MappingId IN ({placeholders})
-            """
-            cleaned_count = self.execute_non_query(cleanup_query, stale_mappings)
+            cursor = self.connection.cursor()
+            try:
+                cursor.execute("CREATE TEMP TABLE IF NOT EXISTS StaleMappings (MappingId INTEGER PRIMARY KEY)")
+                cursor.execute("DELETE FROM temp.StaleMappings")
+                cursor.executemany("INSERT OR IGNORE INTO temp.StaleMappings (MappingId) VALUES (?)", stale_mappings)
+                cursor.execute("""
+                    UPDATE FileTrackMappings 
+                    SET IsActive = 0 
+                    WHERE IsActive = 1 
+                      AND MappingId IN (SELECT MappingId FROM temp.StaleMappings)
+                """)
+                cleaned_count = cursor.rowcount
+                cursor.execute("DROP TABLE temp.StaleMappings")
+            finally:
+                cursor.close()
 
         return {
             'checked_count': len(results),
@@ -154,27 +173,35 @@ class FileTrackMappingRepository(BaseRepository[FileTrackMapping]):
         Returns:
             Dictionary mapping URI to list of file paths
         """
+        duplicates = {}
+        for row in self.get_duplicate_mapping_rows():
+            duplicates.setdefault(row['Uri'], []).append(row['FilePath'])
+
+        return duplicates
+
+    def get_duplicate_mapping_rows(self) -> List[sqlite3.Row]:
+        """
+        Get every active mapping whose URI is mapped to more than one file.
+
+        Groups are found with a window count over the (IsActive, Uri, FilePath) index, and
+        the track title and artists are joined in so callers don't need to load all tracks.
+
+        Returns:
+            Rows with Uri, FilePath, FileCount, TrackTitle and Artists, ordered by Uri and FilePath
+        """
         query = """
-            SELECT Uri, FilePath
-            FROM FileTrackMappings 
-            WHERE IsActive = 1 AND Uri IN (
-                SELECT Uri 
+            SELECT d.Uri, d.FilePath, d.FileCount, t.TrackTitle, t.Artists
+            FROM (
+                SELECT Uri, FilePath, COUNT(*) OVER (PARTITION BY Uri) AS FileCount
                 FROM FileTrackMappings 
                 WHERE IsActive = 1 AND Uri IS NOT NULL
-                GROUP BY Uri 
-                HAVING COUNT(*) > 1
-            )
-            ORDER BY Uri, FilePath
+            ) d
+            LEFT JOIN Tracks t ON t.Uri = d.Uri
+            WHERE d.FileCount > 1
+            ORDER BY d.Uri, d.FilePath
         """
 
-        results = self.fetch_all(query)
-        duplicates = {}
-        for row in results:
-            if row['Uri'] not in duplicates:
-                duplicates[row['Uri']] = []
-            duplicates[row['Uri']].append(row['FilePath'])
-
-        return duplicates
+        return self.fetch_all(query)
 
     def check_mapping_exists(self, file_path: str, spotify_uri: str) -> bool:
         """
@@ -368,30 +395,37 @@ class FileTrackMappingRepository(BaseRepository[FileTrackMapping]):
 
     def get_uri_mappings_batch(self, file_paths: List[str]) -> Dict[str, str]:
         """
-        OPTIMIZED: Get URI mappings for multiple file paths in one query.
+        OPTIMIZED: Get URI mappings for multiple file paths with one query per chunk.
+
+        Paths are de-duplicated and looked up ``PATH_LOOKUP_CHUNK_SIZE`` at a time, which
+        keeps each statement under SQLite's bound-parameter limit however many are passed.
 
         Args:
             file_paths: List of file paths to check
 
         Returns:
-            Dictionary mapping file_path to uri for existing mappings
+            Dictionary mapping normalized file_path to uri for existing mappings
         """
         if not file_paths:
             return {}
 
         # Normalize all paths
-        normalized_paths = [os.path.normpath(path) for path in file_paths]
-
-        # Use parameterized query
-        placeholders = ','.join(['?' for _ in normalized_paths])
-        query = f"""
-            SELECT FilePath, Uri 
-            FROM FileTrackMappings 
-            WHERE FilePath IN ({placeholders}) AND IsActive = 1
-        """
+        normalized_paths = list(dict.fromkeys(os.path.normpath(path) for path in file_paths))
+
+        mappings = {}
+        for start in range(0, len(normalized_paths), PATH_LOOKUP_CHUNK_SIZE):
+            chunk = normalized_paths[start:start + PATH_LOOKUP_CHUNK_SIZE]
+            # Use parameterized query
+            placeholders = ','.join(['?' for _ in chunk])
+            query = f"""
+                SELECT FilePath, Uri 
+                FROM FileTrackMappings 
+                WHERE FilePath IN ({placeholders}) AND IsActive = 1
+            """
 
-        results = self.fetch_all(query, normalized_paths)
-        return {row['FilePath']: row['Uri'] for row in results}
+            for row in self.fetch_all(query, chunk):
+                mappings[row['FilePath']] = row['Uri']
+        return mappings
 
     def _map_to_model(self, row: sqlite3.Row) -> FileTrackMapping:
         """
@@ -403,22 +437,15 @@ class FileTrackMappingRepository(BaseRepository[FileTrackMapping]):
         Returns:
             FileTrackMapping object with properties set from the row
         """
-        mapping_id = row['MappingId'] if row['MappingId'] else None
-        file_path = row['FilePath'] if row['FilePath'] else ""
-        spotify_uri = row['Uri'] if row['Uri'] else ""
-        file_hash = row['FileHash'] if row['FileHash'] else None
-        file_size = row['FileSize'] if row['FileSize'] else None
-        last_modified = row['LastModified'] if row['LastModified'] else None
-        created_at = row['CreatedAt'] if row['CreatedAt'] else None
-        is_active = bool(row['IsActive']) if row['IsActive'] else True
+        is_active = row['IsActive']
 
         return FileTrackMapping(
-            mapping_id=mapping_id,
-            file_path=file_path,
-            spotify_uri=spotify_uri,
-            file_hash=file_hash,
-            file_size=file_size,
-            last_modified=last_modified,
-            created_at=created_at,
-            is_active=is_active
+            mapping_id=row['MappingId'] or None,
+            file_path=row['FilePath'] or "",
+            spotify_uri=row['Uri'] or "",
+            file_hash=row['FileHash'] or None,
+            file_size=row['FileSize'] or None,
+            last_modified=row['LastModified'] or None,
+            created_at=row['CreatedAt'] or None,
+            is_active=bool(is_active) if is_active is not None else True
         )
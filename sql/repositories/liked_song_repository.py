@@ -0,0 +1,189 @@
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sql.repositories.base_repository import BaseRepository
+
+# Storage format of LikedSongs.AddedAt; sorts lexicographically in time order
+ADDED_AT_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class LikedSongRepository(BaseRepository[Dict]):
+    """
+    Repository for the persisted copy of the user's Liked Songs.
+
+    Songs are handled as the dicts returned by get_liked_songs_with_dates
+    ({'id', 'name', 'artists', 'added_at'}), so cached and freshly fetched songs are interchangeable.
+    """
+
+    def __init__(self, connection: sqlite3.Connection):
+        """
+        Initialize a new LikedSongRepository.
+
+        Args:
+            connection: Active database connection
+        """
+        super().__init__(connection)
+        self.table_name = "LikedSongs"
+        self.id_column = "TrackId"
+
+    def get_high_water_mark(self) -> Optional[datetime]:
+        """
+        Get the added_at date of the most recently liked song stored.
+
+        Returns:
+            The latest added_at, or None when no songs are stored
+        """
+        result = self.fetch_one("SELECT MAX(AddedAt) AS AddedAt FROM LikedSongs")
+        if not result or not result['AddedAt']:
+            return None
+        return datetime.strptime(result['AddedAt'], ADDED_AT_FORMAT)
+
+    def get_songs(self, since_date: Optional[datetime] = None) -> List[Dict]:
+        """
+        Get the stored Liked Songs, most recently added first.
+
+        Args:
+            since_date: Only return songs added on or after this date
+
+        Returns:
+            List of song dicts
+        """
+        if since_date:
+            results = self.fetch_all(
+                "SELECT * FROM LikedSongs WHERE AddedAt >= ? ORDER BY AddedAt DESC",
+                (since_date.strftime(ADDED_AT_FORMAT),)
+            )
+        else:
+            results = self.fetch_all("SELECT * FROM LikedSongs ORDER BY AddedAt DESC")
+        return [self._map_to_model(row) for row in results]
+
+    def upsert_many(self, songs: Iterable[Dict]) -> int:
+        """
+        Insert songs, or update them when they were liked again.
+
+        Args:
+            songs: Song dicts
+
+        Returns:
+            Number of songs written
+        """
+        rows = [(song['id'], song['name'], song['artists'], song['added_at'].strftime(ADDED_AT_FORMAT))
+                for song in songs if song.get('id')]
+        if not rows:
+            return 0
+
+        cursor = self.connection.cursor()
+        try:
+            cursor.executemany("""
+                INSERT INTO LikedSongs (TrackId, TrackName, Artists, AddedAt)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(TrackId) DO UPDATE SET
+                    TrackName = excluded.TrackName,
+                    Artists = excluded.Artists,
+                    AddedAt = excluded.AddedAt
+            """, rows)
+        finally:
+            cursor.close()
+
+        self.db_logger.info(f"Upserted {len(rows)} Liked Songs")
+        return len(rows)
+
+    def replace_all(self, songs: Iterable[Dict]) -> int:
+        """
+        Replace the stored songs with a complete listing, dropping songs no longer liked.
+
+        Args:
+            songs: Every currently liked song (back to the sync cut-off date)
+
+        Returns:
+            Number of songs stored
+        """
+        self.delete_all()
+        count = self.upsert_many(songs)
+        self.db_logger.info(f"Replaced Liked Songs with {count} songs")
+        return count
+
+    def get_unsorted_changes(self, unsorted_playlist_id: str, synced_playlist_ids: Iterable[str],
+                             fetched_playlist_uris: Dict[str, List[str]],
+                             since_date: Optional[datetime] = None) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Work out how the UNSORTED playlist has to change, with set operations in SQL.
+
+        The contents of every playlist are staged in a temp table: playlists whose stored
+        associations are current are copied from TrackPlaylists, the others come from
+        ``fetched_playlist_uris``. Liked Songs missing from all of them are found with an
+        anti-join, and UNSORTED tracks that also sit in another playlist with a semi-join.
+
+        Args:
+            unsorted_playlist_id: ID of the UNSORTED playlist
+            synced_playlist_ids: Playlists whose TrackPlaylists rows match their current snapshot
+            fetched_playlist_uris: Track URIs of the remaining playlists, by playlist ID
+            since_date: Only consider Liked Songs added on or after this date
+
+        Returns:
+            Tuple of (Liked Songs in no playlist, most recent first; UNSORTED tracks to remove,
+            as dicts with 'id', 'uri', 'name' and 'artists' taken from the Tracks table)
+        """
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute("DROP TABLE IF EXISTS temp.SyncedPlaylists")
+            cursor.execute("DROP TABLE IF EXISTS temp.PlaylistContents")
+            cursor.execute("CREATE TEMP TABLE SyncedPlaylists (PlaylistId TEXT PRIMARY KEY)")
+            cursor.execute("CREATE TEMP TABLE PlaylistContents (Uri TEXT NOT NULL, PlaylistId TEXT NOT NULL)")
+
+            cursor.executemany("INSERT OR IGNORE INTO temp.SyncedPlaylists (PlaylistId) VALUES (?)",
+                               [(playlist_id,) for playlist_id in synced_playlist_ids])
+            cursor.execute("""
+                INSERT INTO temp.PlaylistContents (Uri, PlaylistId)
+                SELECT Uri, PlaylistId FROM TrackPlaylists
+                WHERE PlaylistId IN (SELECT PlaylistId FROM temp.SyncedPlaylists)
+            """)
+            cursor.executemany("INSERT INTO temp.PlaylistContents (Uri, PlaylistId) VALUES (?, ?)",
+                               [(uri, playlist_id) for playlist_id, uris in fetched_playlist_uris.items()
+                                for uri in uris])
+            cursor.execute("CREATE INDEX temp.idx_playlistcontents_uri ON PlaylistContents(Uri, PlaylistId)")
+
+            cursor.execute("""
+                SELECT l.* FROM LikedSongs l
+                WHERE l.AddedAt >= ?
+                  AND NOT EXISTS (
+                      SELECT 1 FROM temp.PlaylistContents p WHERE p.Uri = 'spotify:track:' || l.TrackId
+                  )
+                ORDER BY l.AddedAt DESC
+            """, (since_date.strftime(ADDED_AT_FORMAT) if since_date else '',))
+            unplaylisted = [self._map_to_model(row) for row in cursor.fetchall()]
+
+            cursor.execute("""
+                SELECT DISTINCT u.Uri, t.TrackTitle, t.Artists
+                FROM temp.PlaylistContents u
+                LEFT JOIN Tracks t ON t.Uri = u.Uri
+                WHERE u.PlaylistId = ?
+                  AND u.Uri LIKE 'spotify:track:%'
+                  AND EXISTS (
+                      SELECT 1 FROM temp.PlaylistContents p WHERE p.Uri = u.Uri AND p.PlaylistId != u.PlaylistId
+                  )
+            """, (unsorted_playlist_id,))
+            to_remove = [{
+                'id': row['Uri'].split(':')[2],
+                'uri': row['Uri'],
+                'name': row['TrackTitle'] or row['Uri'],
+                'artists': row['Artists'] or ''
+            } for row in cursor.fetchall()]
+
+            cursor.execute("DROP TABLE temp.PlaylistContents")
+            cursor.execute("DROP TABLE temp.SyncedPlaylists")
+        finally:
+            cursor.close()
+
+        self.db_logger.info(f"Found {len(unplaylisted)} unplaylisted Liked Songs and "
+                            f"{len(to_remove)} UNSORTED tracks to remove")
+        return unplaylisted, to_remove
+
+    def _map_to_model(self, row: sqlite3.Row) -> Dict:
+        return {
+            'id': row['TrackId'],
+            'name': row['TrackName'],
+            'artists': row['Artists'],
+            'added_at': datetime.strptime(row['AddedAt'], ADDED_AT_FORMAT)
+        }
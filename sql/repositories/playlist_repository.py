@@ -11,6 +11,7 @@ class PlaylistRepository(BaseRepository[Playlist]):
         super().__init__(connection)
         self.table_name = "Playlists"
         self.id_column = "PlaylistId"
+        self.generation_table = "Playlists"
 
     def insert(self, playlist: Playlist) -> None:
         query = """
@@ -183,9 +184,11 @@ class PlaylistRepository(BaseRepository[Playlist]):
         Returns:
             Playlist object with properties set from the row
         """
-        playlist_id = row['PlaylistId']
-        name = row['PlaylistName'].strip() if row['PlaylistName'] else ""
-        master_sync_snapshot_id = row['MasterSyncSnapshotId'] if row['MasterSyncSnapshotId'] else ""
-        associations_snapshot_id = row['AssociationsSnapshotId'] if row['AssociationsSnapshotId'] else ""
-
-        return Playlist(playlist_id, name, master_sync_snapshot_id, associations_snapshot_id)
+        name = row['PlaylistName']
+
+        return Playlist(
+            row['PlaylistId'],
+            name.strip() if name else "",
+            row['MasterSyncSnapshotId'] or "",
+            row['AssociationsSnapshotId'] or ""
+        )
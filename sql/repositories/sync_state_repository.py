@@ -0,0 +1,65 @@
+import sqlite3
+from typing import Dict, Optional
+
+from sql.repositories.base_repository import BaseRepository
+
+
+class SyncStateRepository(BaseRepository):
+    """
+    Repository for small named values that incremental syncs keep between runs
+    (e.g. when Liked Songs were last fully reconciled).
+    """
+
+    def __init__(self, connection: sqlite3.Connection):
+        """
+        Initialize a new SyncStateRepository.
+
+        Args:
+            connection: Active database connection
+        """
+        super().__init__(connection)
+        self.table_name = "SyncState"
+        self.id_column = "Name"
+
+    def get_value(self, name: str) -> Optional[str]:
+        """
+        Get a stored value.
+
+        Args:
+            name: Name of the value
+
+        Returns:
+            The value, or None if it was never set
+        """
+        result = self.fetch_one("SELECT Value FROM SyncState WHERE Name = ?", (name,))
+        return result['Value'] if result else None
+
+    def set_value(self, name: str, value: Optional[str]) -> None:
+        """
+        Store a value, replacing any previous one.
+
+        Args:
+            name: Name of the value
+            value: Value to store
+        """
+        self.execute_non_query("""
+            INSERT INTO SyncState (Name, Value, UpdatedAt)
+            VALUES (?, ?, datetime('now'))
+            ON CONFLICT(Name) DO UPDATE SET
+                Value = excluded.Value,
+                UpdatedAt = excluded.UpdatedAt
+        """, (name, value))
+        self.db_logger.debug(f"Set sync state {name} = {value}")
+
+    def get_generations(self) -> Dict[str, int]:
+        """
+        Get the generation counters of the tables that have one.
+
+        Every UnitOfWork that commits changes to a table bumps its counter once, so equal
+        counters mean nothing in those tables changed in between.
+
+        Returns:
+            Dictionary of table name -> generation
+        """
+        rows = self.fetch_all("SELECT TableName, Generation FROM DataGenerations ORDER BY TableName")
+        return {row['TableName']: row['Generation'] for row in rows}
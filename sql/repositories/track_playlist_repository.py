@@ -19,6 +19,7 @@ class TrackPlaylistRepository(BaseRepository):
         """
         super().__init__(connection)
         self.table_name = "TrackPlaylists"
+        self.generation_table = "TrackPlaylists"
 
     def insert(self, track_id: str, playlist_id: str, uri: str) -> None:
         """
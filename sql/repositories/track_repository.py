@@ -22,6 +22,7 @@ class TrackRepository(BaseRepository[Track]):
         super().__init__(connection)
         self.table_name = "Tracks"
         self.id_column = "TrackId"
+        self.generation_table = "Tracks"
 
     def insert(self, track: Track) -> None:
         query = """
@@ -73,7 +74,7 @@ class TrackRepository(BaseRepository[Track]):
     def delete_by_track_id(self, track_id: str) -> None:
         """Delete a track by its ID"""
         query = "DELETE FROM Tracks WHERE TrackId = ?"
-        self.connection.execute(query, (track_id,))
+        self.execute_non_query(query, (track_id,))
         self.connection.commit()
 
     def get_by_uri(self, uri: str) -> Optional[Track]:
@@ -326,16 +327,28 @@ class TrackRepository(BaseRepository[Track]):
         self.db_logger.info(f"Retrieved {len(track_data)} tracks as dictionaries")
         return track_data
 
+    def get_generation(self) -> int:
+        """
+        Get the Tracks generation counter.
+
+        Every UnitOfWork that commits changes to Tracks bumps it once, so an unchanged
+        value means a cached copy of the table is still current.
+
+        Returns:
+            Current generation number
+        """
+        result = self.fetch_one("SELECT Generation FROM DataGenerations WHERE TableName = 'Tracks'")
+        return result['Generation'] if result else 0
+
     def _map_to_model(self, row: sqlite3.Row) -> Track:
-        # Extract values from the row
-        uri = row['Uri'] if row['Uri'] else None
-        track_id = row['TrackId']
-        title = row['TrackTitle']
-        artists = row['Artists']
-        album = row['Album']
-        added_to_master = row['AddedToMaster'] if row['AddedToMaster'] else None
-        is_local = bool(row['IsLocal']) if row['IsLocal'] else False
-        duration_ms = row['Duration'] if row['Duration'] else None
-
-        # Create and return a Track object
-        return Track(uri, track_id, title, artists, album, added_to_master, is_local, duration_ms)
+        # Each column is read once; empty values are normalized the same way as before
+        return Track(
+            row['Uri'] or None,
+            row['TrackId'],
+            row['TrackTitle'],
+            row['Artists'],
+            row['Album'],
+            row['AddedToMaster'] or None,
+            bool(row['IsLocal']),
+            row['Duration'] or None
+        )
@@ -1,4 +1,5 @@
 import os
+import sqlite3
 import tempfile
 from unittest.mock import patch, MagicMock
 
@@ -61,6 +62,50 @@ def clean_database_after_test():
         print(f"Warning: Could not clean database after test: {e}")
 
 
+class FileConnectionProvider:
+    """Minimal stand-in for DatabaseConnection backed by a temporary database file."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+    def get_connection(self):
+        connection = sqlite3.connect(self.db_path)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def release_connection(self, connection):
+        connection.close()
+
+
+@pytest.fixture
+def temp_database(tmp_path):
+    """
+    A FileConnectionProvider for a fresh database with the full schema.
+
+    Tests patch the ``UnitOfWork`` name of the module under test with
+    ``lambda: UnitOfWork(temp_database)`` to run it against this database.
+    """
+    from sql.core.connection import DatabaseConnection
+
+    provider = FileConnectionProvider(str(tmp_path / "test.db"))
+    connection = provider.get_connection()
+    DatabaseConnection._create_schema(connection)
+    connection.close()
+    return provider
+
+
+@pytest.fixture
+def connection():
+    """In-memory database connection with the full schema."""
+    from sql.core.connection import DatabaseConnection
+
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    DatabaseConnection._create_schema(conn)
+    yield conn
+    conn.close()
+
+
 @pytest.fixture
 def mock_unit_of_work():
     with patch('tagify_integration.UnitOfWork') as mock:
@@ -0,0 +1,71 @@
+import gzip
+import json
+
+from api.services import validation_service
+from api.utils import pagination
+from api.utils.pagination import ResultStore
+
+
+def playlist_report(count):
+    return {
+        "summary": {"total_playlists": count, "playlists_needing_update": count, "missing_m3u_files": 0},
+        "playlist_analysis": [{"name": f"Playlist {i}", "needs_update": True, "tracks_missing_from_m3u": ["x"] * 5}
+                              for i in range(count)]
+    }
+
+
+def test_large_responses_are_compact_and_compressed(client, monkeypatch):
+    monkeypatch.setattr(validation_service, 'validate_playlists_m3u', lambda *args: playlist_report(300))
+
+    plain = client.get('/api/validation/playlists?playlistsDir=/m3u')
+    compressed = client.get('/api/validation/playlists?playlistsDir=/m3u', headers={'Accept-Encoding': 'gzip'})
+
+    assert plain.headers.get('Content-Encoding') is None
+    assert b'\n ' not in plain.data and b'": ' not in plain.data
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+    assert json.loads(gzip.decompress(compressed.data)) == json.loads(plain.data)
+    assert len(compressed.data) * 5 < len(plain.data)
+
+    # Small responses are left alone
+    assert client.get('/status', headers={'Accept-Encoding': 'gzip'}).headers.get('Content-Encoding') is None
+
+
+def test_large_results_are_paged_from_the_stored_result(client, monkeypatch):
+    calls = []
+
+    def report(*args):
+        calls.append(args)
+        return playlist_report(250)
+
+    monkeypatch.setattr(validation_service, 'validate_playlists_m3u', report)
+    monkeypatch.setattr(pagination, '_result_store', ResultStore(max_results=2))
+
+    first = client.get('/api/validation/playlists?playlistsDir=/m3u&pageSize=100').get_json()
+    assert [p['name'] for p in first['playlist_analysis']][-1] == 'Playlist 99'
+    assert first['summary']['total_playlists'] == 250
+    paging = first['pagination']['fields']['playlist_analysis']
+    assert paging == {'total': 250, 'next_cursor': '100'}
+
+    names = [p['name'] for p in first['playlist_analysis']]
+    cursor = paging['next_cursor']
+    while cursor:
+        page = client.get(f"/api/results/{first['pagination']['result_id']}/playlist_analysis"
+                          f"?cursor={cursor}&limit=100").get_json()
+        names.extend(p['name'] for p in page['items'])
+        cursor = page['next_cursor']
+
+    assert names == [f"Playlist {i}" for i in range(250)]
+    assert len(calls) == 1
+
+    # Evicted results ask the client to run the request again
+    client.get('/api/validation/playlists?playlistsDir=/m3u&pageSize=100')
+    client.get('/api/validation/playlists?playlistsDir=/m3u&pageSize=100')
+    response = client.get(f"/api/results/{first['pagination']['result_id']}/playlist_analysis?cursor=100")
+    assert response.status_code == 404
+
+
+def test_dict_collections_page_in_insertion_order():
+    page, cursor = pagination.slice_items({f"k{i}": i for i in range(5)}, 2, 2)
+    assert (page, cursor) == ({'k2': 2, 'k3': 3}, '4')
+    assert pagination.slice_items([1, 2, 3], 2, 5) == ([3], None)
@@ -0,0 +1,115 @@
+import json
+import os
+
+from helpers.deduplication_helper import DeduplicationSession, are_similar_tracks, group_similar_tracks
+from helpers.playlist_cache_helper import PlaylistContentCache
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures', 'spotify_responses')
+
+
+def playlist_item(track_id, name, artist, duration_ms=200000):
+    return {'id': track_id, 'name': name, 'artists': [{'name': artist}], 'duration_ms': duration_ms}
+
+
+def first_member_grouping(tracks):
+    """Reference grouping: compare each track with the first track of every group."""
+    groups = []
+    for track in tracks:
+        for group in groups:
+            if are_similar_tracks(track, group[0]):
+                group.append(track)
+                break
+        else:
+            groups.append([track])
+    return groups
+
+
+def fixture_playlist():
+    with open(os.path.join(FIXTURES_DIR, 'master_playlist_api_response.json')) as f:
+        api_tracks = json.load(f)['api_tracks']
+
+    items = []
+    for track in api_tracks:
+        items.append(playlist_item(track['uri'], track['title'], track['artists']))
+        items.append(playlist_item(track['uri'] + ':extended', track['title'] + ' (Extended Mix)', track['artists']))
+        items.append(playlist_item(track['uri'] + ':case', track['title'].upper(), track['artists'].lower()))
+        items.append(playlist_item(track['uri'] + ':other', track['title'], 'Another Artist'))
+    return items
+
+
+def test_bucketed_grouping_matches_first_member_grouping():
+    tracks = fixture_playlist() + [
+        playlist_item('a', 'Strobe', 'deadmau5'),
+        playlist_item('b', 'Strobe - Radio Edit', 'deadmau5'),
+        playlist_item('c', 'Strobes', 'deadmau5'),
+        playlist_item('d', 'Ghosts n Stuff', 'deadmau5'),
+        playlist_item('e', 'Strobe', 'Someone Else'),
+        {'id': 'f', 'name': 'No Artists'},
+    ]
+
+    groups = group_similar_tracks(tracks)
+
+    assert [[t['id'] for t in g] for g in groups] == [[t['id'] for t in g] for g in first_member_grouping(tracks)]
+    assert [t['id'] for t in groups[0]] == ['spotify:track:track_stays_unchanged',
+                                            'spotify:track:track_stays_unchanged:case']
+    assert ['a', 'c'] in [[t['id'] for t in g] for g in groups]
+    assert group_similar_tracks([]) == []
+
+
+class FakeSpotify:
+    """Serves playlist items from memory and records every API call."""
+
+    def __init__(self, playlists):
+        self.playlists = playlists
+        self.calls = []
+
+    def playlist_items(self, playlist_id, offset=0, limit=100, fields=None):
+        self.calls.append(('playlist_items', playlist_id, offset))
+        tracks = self.playlists[playlist_id]
+        return {'items': [{'track': t} for t in tracks[offset:offset + limit]], 'total': len(tracks)}
+
+    def playlist_remove_all_occurrences_of_items(self, playlist_id, items):
+        self.calls.append(('remove', playlist_id, len(items)))
+        return {'snapshot_id': 'new'}
+
+
+class CountingLimiter:
+    def __init__(self):
+        self.acquired = 0
+
+    def acquire(self):
+        self.acquired += 1
+        return 0.0
+
+
+def test_session_fetches_each_snapshot_once_and_plans_all_playlists(tmp_path):
+    strobe = [playlist_item('s1', 'Strobe', 'deadmau5', 600000), playlist_item('s2', 'Strobe', 'deadmau5', 200000)]
+    many = [playlist_item(f'x{i}', f'Track {i}', f'Artist {i}') for i in range(150)]
+    spotify = FakeSpotify({'p1': strobe, 'p2': many + many[:120]})
+    playlists = [{'id': 'p1', 'name': 'UNCHARTIFY: deadmau5', 'snapshot_id': 'a'},
+                 {'id': 'p2', 'name': 'UNCHARTIFY: Many', 'snapshot_id': 'b'}]
+    cache = PlaylistContentCache(str(tmp_path))
+    limiter = CountingLimiter()
+
+    session = DeduplicationSession(spotify, cache=cache, rate_limiter=limiter)
+    session.load_playlists(playlists)
+    plans = session.plan_removals()
+
+    assert sorted(call[1:] for call in spotify.calls) == [('p1', 0), ('p2', 0), ('p2', 100), ('p2', 200)]
+    assert limiter.acquired == 4
+    assert [(keep['id'], [t['id'] for t in remove]) for keep, remove in plans['p1'].duplicate_groups] == \
+           [('s1', ['s2'])]
+    assert len(plans['p2'].tracks_to_remove) == 120
+
+    # Same snapshots in a new session (and process): nothing is fetched again
+    spotify.calls.clear()
+    second = DeduplicationSession(spotify, cache=PlaylistContentCache(str(tmp_path)), rate_limiter=limiter)
+    assert second.load_playlists(playlists)['p1'] == strobe
+    assert spotify.calls == []
+
+    # Removal batches go through the limiter and the edited playlist is refetched next time
+    assert second.remove_tracks('p2', plans['p2'].tracks_to_remove)
+    assert spotify.calls == [('remove', 'p2', 100), ('remove', 'p2', 20)]
+    assert limiter.acquired == 6
+    assert second.cache.get('p2', 'b') is None
+    assert PlaylistContentCache(str(tmp_path)).get('p2', 'b') is None
@@ -0,0 +1,167 @@
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from helpers import discogs_helper
+from helpers.discogs_helper import DiscogsClient, DiscogsRateLimiter, DiscogsResponseCache
+
+RELEASES = {
+    1: {'title': 'Daft Punk - One More Time', 'year': 2000, 'uri': 'https://www.discogs.com/release/1',
+        'tracklist': [{'title': 'One More Time', 'duration': '10:16'},
+                      {'title': 'Aerodynamic', 'duration': '3:27'}]},
+    2: {'title': 'Daft Punk - Discovery', 'year': 2001, 'uri': 'https://www.discogs.com/release/2',
+        'tracklist': [{'title': 'One More Time', 'duration': '5:20'}]},
+}
+
+
+class StubDiscogsHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append((self.path.split('?')[0], self.client_address[1]))
+
+        if server.rate_limited:
+            server.rate_limited -= 1
+            self._send(429, {'message': 'You are making requests too quickly.'}, {'Retry-After': '0'})
+            return
+
+        release = re.match(r'/releases/(\d+)$', self.path)
+        if self.path.startswith('/database/search'):
+            body = {'results': [{'id': 1, 'title': 'Daft Punk - One More Time'},
+                                {'id': 2, 'title': 'Daft Punk - Discovery (One More Time)'},
+                                {'id': 3, 'title': 'Someone Else - Elsewhere'}]}
+        elif release and int(release.group(1)) in RELEASES:
+            body = RELEASES[int(release.group(1))]
+        else:
+            self._send(404, {'message': 'Release not found.'})
+            return
+        self._send(200, body)
+
+    def _send(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('X-Discogs-Ratelimit', '60')
+        self.send_header('X-Discogs-Ratelimit-Remaining', str(self.server.remaining))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubDiscogsHandler)
+    server.requests = []
+    server.remaining = 59
+    server.rate_limited = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(discogs_helper.time, 'sleep', recorded.append)
+    return recorded
+
+
+def make_client(server, cache, session=None, rate_limiter=None):
+    return DiscogsClient(api_token='token', base_url=f"http://127.0.0.1:{server.server_address[1]}",
+                         session=session or requests.Session(), rate_limiter=rate_limiter or DiscogsRateLimiter(),
+                         cache=cache)
+
+
+def test_repeated_searches_are_served_from_the_cache_over_one_connection(stub_server, tmp_path, sleeps):
+    cache_path = str(tmp_path / 'discogs.db')
+    client = make_client(stub_server, DiscogsResponseCache(cache_path))
+
+    versions = client.search_releases('Daft Punk', 'One More Time (Radio Edit)')
+
+    assert sorted((v['title'], v['duration_seconds']) for v in versions) == [
+        ('One More Time', 320), ('One More Time', 616)]
+    assert [path for path, _ in stub_server.requests] == ['/database/search', '/releases/1', '/releases/2']
+    # Every request reused the pooled connection and nobody slept with plenty of requests left
+    assert len({port for _, port in stub_server.requests}) == 1
+    assert sleeps == []
+
+    # A new client (e.g. the next HTTP request to the API) reads the persisted responses
+    stub_server.requests.clear()
+    again = make_client(stub_server, DiscogsResponseCache(cache_path)).search_releases('Daft Punk', 'One More Time')
+    assert again == versions
+    assert stub_server.requests == []
+
+
+def test_requests_are_spaced_out_when_discogs_reports_few_remaining(stub_server, tmp_path, sleeps):
+    stub_server.remaining = 2
+    limiter = DiscogsRateLimiter(requests_per_minute=60, reserve=5)
+    client = make_client(stub_server, DiscogsResponseCache(str(tmp_path / 'discogs.db')), rate_limiter=limiter)
+
+    client.search_releases('Daft Punk', 'One More Time')
+
+    assert limiter.remaining == 2
+    # The first request went out at once; the two release lookups waited for window slots
+    assert len(sleeps) == 2 and all(0 < delay <= 2.0 for delay in sleeps)
+
+
+def test_rate_limited_requests_back_off_and_retry(stub_server, tmp_path, sleeps):
+    stub_server.rate_limited = 1
+    client = make_client(stub_server, DiscogsResponseCache(str(tmp_path / 'discogs.db')))
+
+    assert len(client.search_releases('Daft Punk', 'One More Time')) == 2
+    assert [path for path, _ in stub_server.requests][:2] == ['/database/search', '/database/search']
+
+    stub_server.requests.clear()
+    stub_server.rate_limited = discogs_helper.MAX_RATE_LIMIT_RETRIES + 1
+    assert client.search_releases('Someone Else', 'Elsewhere') == []
+    assert len(stub_server.requests) == discogs_helper.MAX_RATE_LIMIT_RETRIES + 1
+
+
+def test_cached_responses_expire(tmp_path, monkeypatch):
+    cache = DiscogsResponseCache(str(tmp_path / 'discogs.db'), ttl_seconds=60)
+    cache.set('release:1', RELEASES[1])
+    assert cache.get('release:1') == RELEASES[1]
+    assert cache.get('release:2') is None
+
+    now = discogs_helper.time.time()
+    monkeypatch.setattr(discogs_helper.time, 'time', lambda: now + 61)
+    assert cache.get('release:1') is None
+
+
+def test_bulk_search_fetches_each_release_once_and_streams_every_track(stub_server, tmp_path, client, monkeypatch,
+                                                                        sleeps):
+    monkeypatch.setattr(discogs_helper, 'DISCOGS_BASE_URL', f"http://127.0.0.1:{stub_server.server_address[1]}")
+    monkeypatch.setattr(discogs_helper, '_discogs_cache', DiscogsResponseCache(str(tmp_path / 'discogs.db')))
+    monkeypatch.setattr(discogs_helper, '_discogs_rate_limiter', DiscogsRateLimiter())
+    short_tracks = [{'file': f"Daft Punk - One More Time ({i}).mp3", 'track_id': f"id{i}", 'artist': 'Daft Punk',
+                     'title': title, 'duration_seconds': 200}
+                    for i, title in enumerate(['One More Time', 'One More Time (Radio Edit)', 'One More Time [Edit]'])]
+    short_tracks.append({'file': 'untitled.mp3', 'artist': 'Daft Punk', 'title': '', 'duration_seconds': 100})
+
+    response = client.post('/api/validation/search-extended-versions/bulk',
+                           json={'shortTracks': short_tracks, 'maxWorkers': 3})
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert response.mimetype == 'application/x-ndjson'
+    tracks, summary = lines[:-1], lines[-1]
+    assert sorted(t['index'] for t in tracks) == [0, 1, 2, 3]
+    assert all(t['status_type'] == 'extended_found' and t['extended_versions'][0]['duration_seconds'] == 616
+               for t in tracks if t['index'] < 3)
+    assert next(t for t in tracks if t['index'] == 3)['status_type'] == 'error'
+    assert (summary['type'], summary['extended_found'], summary['errors']) == ('summary', 3, 1)
+
+    # Three searches, but every release was fetched once
+    paths = sorted(path for path, _ in stub_server.requests)
+    assert paths.count('/releases/1') == 1 and paths.count('/releases/2') == 1
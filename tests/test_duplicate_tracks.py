@@ -0,0 +1,47 @@
+import hashlib
+
+from api.services.duplicate_track_service import DuplicateTrackDetector
+from helpers.near_duplicate_helper import NearDuplicateBlocker, artist_tokens, connected_components, core_title
+from sql.models.track import Track
+
+
+def make_track(index, title, artists, duration_ms=None):
+    return Track(f"spotify:track:{index}", str(index), title, artists, duration_ms=duration_ms)
+
+
+def test_blocking_keys_normalize_versions_and_artist_order():
+    assert core_title("Midnight City (Remastered 2011)") == "midnight city"
+    assert core_title("Midnight City - Eric Prydz Remix") == "midnight city"
+    assert artist_tokens("Daft Punk, Pharrell Williams") == artist_tokens("Pharrell Williams & Daft Punk")
+
+    blocker = NearDuplicateBlocker()
+    assert blocker.signature("midnight city m83") == blocker.signature("midnight city m83")
+    assert blocker.signature("midnight city m83") != blocker.signature("something else entirely")
+
+
+def test_near_duplicates_are_found_without_comparing_all_pairs():
+    tracks = [
+        make_track(0, "Midnight City Lights Forever", "M83", 243000),
+        # A typo changes the old fingerprint hash, but the pair is still a duplicate
+        make_track(1, "Midnight Citty Lights Forever", "M83", 243500),
+        make_track(2, "Wait", "M83", 343000),
+        make_track(3, "Reunion", "M83", 240000),
+        make_track(4, "Outro", "M83, Someone Else", 247000),
+    ] + [make_track(10 + i, hashlib.md5(f"title{i}".encode()).hexdigest()[:12],
+                    hashlib.md5(f"artist{i}".encode()).hexdigest()[:8], 200000 + i * 5000) for i in range(40)]
+
+    blocker = NearDuplicateBlocker()
+    pairs = blocker.candidate_pairs([(t.title, t.artists, t.duration_ms) for t in tracks])
+    assert (0, 1) in pairs
+    assert len(pairs) < len(tracks) * (len(tracks) - 1) // 2 // 10
+
+    groups = DuplicateTrackDetector()._find_near_duplicates(tracks, {"spotify:track:1": {"playlist"}})
+
+    assert len(groups) == 1
+    assert [t.uri for t in groups[0].tracks] == ["spotify:track:0", "spotify:track:1"]
+    assert groups[0].primary_track.uri == "spotify:track:1"
+    assert groups[0].playlists_to_merge == {"playlist"}
+
+
+def test_connected_components_groups_linked_indices():
+    assert connected_components(6, [(4, 1), (1, 3), (0, 5)]) == [[0, 5], [1, 3, 4]]
@@ -0,0 +1,45 @@
+import os
+from unittest.mock import patch
+
+from helpers.file_existence_helper import DirectoryListingCache
+
+
+def touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write("x")
+
+
+def test_existing_paths_lists_each_directory_once(tmp_path):
+    a = str(tmp_path / "a" / "one.mp3")
+    b = str(tmp_path / "a" / "two.mp3")
+    c = str(tmp_path / "b" / "three.mp3")
+    touch(a)
+    touch(c)
+    gone = str(tmp_path / "missing_dir" / "four.mp3")
+
+    cache = DirectoryListingCache(ttl=60)
+    with patch('helpers.file_existence_helper.os.path.exists') as mock_exists:
+        assert cache.existing_paths([a, b, c, gone, ""]) == {a, c}
+        mock_exists.assert_not_called()
+
+    assert cache.stats['listings_read'] == 2
+
+
+def test_cached_listing_picks_up_new_and_removed_files(tmp_path):
+    a = str(tmp_path / "one.mp3")
+    b = str(tmp_path / "two.mp3")
+    touch(a)
+
+    cache = DirectoryListingCache(ttl=60)
+    assert cache.existing_paths([a, b]) == {a}
+
+    # A file written after the listing was cached is found via the mtime re-check
+    touch(b)
+    os.utime(str(tmp_path), (os.stat(str(tmp_path)).st_atime, os.stat(str(tmp_path)).st_mtime + 5))
+    assert cache.existing_paths([a, b]) == {a, b}
+
+    # Within the TTL a removed file is still reported unless the directory is re-checked
+    os.remove(a)
+    assert cache.existing_paths([a]) == {a}
+    assert cache.existing_paths([a, b], max_age=0) == {b}
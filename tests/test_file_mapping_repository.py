@@ -0,0 +1,61 @@
+import pytest
+
+from sql.repositories.file_track_mapping_repository import FileTrackMappingRepository
+
+
+def insert_mapping(conn, file_path, uri, is_active=1):
+    conn.execute(
+        "INSERT INTO FileTrackMappings (FilePath, Uri, IsActive) VALUES (?, ?, ?)",
+        (file_path, uri, is_active)
+    )
+
+
+def test_cleanup_stale_mappings_soft_deletes_missing_files(connection, tmp_path):
+    kept = tmp_path / "kept.mp3"
+    kept.write_text("x")
+    insert_mapping(connection, str(kept), "spotify:track:kept")
+    for i in range(1500):
+        insert_mapping(connection, str(tmp_path / f"gone_{i}.mp3"), f"spotify:track:{i}")
+    insert_mapping(connection, str(tmp_path / "old.mp3"), "spotify:track:old", is_active=0)
+
+    stats = FileTrackMappingRepository(connection).cleanup_stale_mappings()
+
+    assert stats['checked_count'] == 1501
+    assert stats['cleaned_count'] == 1500
+    active = connection.execute("SELECT FilePath FROM FileTrackMappings WHERE IsActive = 1").fetchall()
+    assert [row['FilePath'] for row in active] == [str(kept)]
+
+
+def test_duplicate_mappings_come_from_window_query(connection):
+    connection.execute(
+        "INSERT INTO Tracks (Uri, TrackId, TrackTitle, Artists) VALUES ('spotify:track:a', 'a', 'Song', 'Artist')"
+    )
+    insert_mapping(connection, "/music/b.mp3", "spotify:track:a")
+    insert_mapping(connection, "/music/a.mp3", "spotify:track:a")
+    insert_mapping(connection, "/music/c.mp3", "spotify:track:a", is_active=0)
+    insert_mapping(connection, "/music/x.mp3", "spotify:track:x")
+    insert_mapping(connection, "/music/y.mp3", "spotify:track:y")
+    insert_mapping(connection, "/music/y2.mp3", "spotify:track:y")
+
+    repository = FileTrackMappingRepository(connection)
+
+    assert repository.find_duplicate_mappings() == {
+        "spotify:track:a": ["/music/a.mp3", "/music/b.mp3"],
+        "spotify:track:y": ["/music/y.mp3", "/music/y2.mp3"],
+    }
+    rows = repository.get_duplicate_mapping_rows()
+    assert (rows[0]['TrackTitle'], rows[0]['FileCount']) == ("Song", 2)
+    assert rows[-1]['TrackTitle'] is None
+
+
+def test_uri_mappings_batch_is_chunked_and_deduplicated(connection):
+    for i in range(1200):
+        insert_mapping(connection, f"/music/{i}.mp3", f"spotify:track:{i}")
+    insert_mapping(connection, "/music/inactive.mp3", "spotify:track:inactive", is_active=0)
+
+    paths = [f"/music/{i}.mp3" for i in range(0, 1300, 2)] * 2 + ["/music/inactive.mp3", "/music/./4.mp3"]
+    mappings = FileTrackMappingRepository(connection).get_uri_mappings_batch(paths)
+
+    assert len(mappings) == 600
+    assert mappings["/music/4.mp3"] == "spotify:track:4"
+    assert "/music/1202.mp3" not in mappings and "/music/inactive.mp3" not in mappings
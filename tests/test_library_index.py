@@ -0,0 +1,127 @@
+import os
+
+from mutagen.id3 import ID3, TXXX
+
+from helpers.library_index_helper import LibraryIndex
+from helpers.validation_helper import match_local_files
+
+
+def write_track(path, track_id=None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if track_id is None:
+        with open(path, 'wb') as f:
+            f.write(b'')
+        return
+    tags = ID3()
+    tags.add(TXXX(encoding=3, desc='TRACKID', text=[track_id]))
+    tags.save(path)
+
+
+def master_track(track_id, artists, name):
+    return {'id': track_id, 'artists': artists, 'name': name, 'added_at': '2024-01-01T00:00:00Z'}
+
+
+def test_library_index_finds_files_by_case_folded_name(tmp_path):
+    write_track(str(tmp_path / 'a' / 'Artist - Song.MP3'))
+    write_track(str(tmp_path / 'b' / 'artist - song.mp3'))
+    write_track(str(tmp_path / 'Other - Track.wav'))
+    (tmp_path / 'notes.txt').write_text('not audio')
+
+    index = LibraryIndex(str(tmp_path))
+
+    assert len(index) == 3
+    assert index.find_by_name('ARTIST - SONG.mp3') in {str(tmp_path / 'a' / 'Artist - Song.MP3'),
+                                                       str(tmp_path / 'b' / 'artist - song.mp3')}
+    assert index.find_by_stem('other - track', ('.mp3', '.wav')) == str(tmp_path / 'Other - Track.wav')
+    assert index.find_by_name('notes.txt') is None
+
+
+def test_match_local_files_reads_each_tag_once_and_finds_missing_tracks_by_name(tmp_path):
+    write_track(str(tmp_path / 'Found - One.mp3'), 'id1')
+    write_track(str(tmp_path / 'sub' / 'Renamed - Two.mp3'), 'stale-id')
+    write_track(str(tmp_path / 'sub' / 'Untagged - Three.mp3'))
+    write_track(str(tmp_path / 'Wave - Four.wav'))
+    tracks = [master_track('id1', 'Found', 'One'), master_track('id2', 'Renamed, Feat', 'Two'),
+              master_track('id3', 'Untagged', 'Three'), master_track('id4', 'Wave', 'Four'),
+              master_track('id5', 'Nowhere', 'Five')]
+
+    result = match_local_files(tracks, LibraryIndex(str(tmp_path)), max_workers=2)
+
+    assert result['found_track_ids'] == {'id1'}
+    assert result['total_files'] == 4
+    assert (result['files_by_extension']['.mp3'], result['files_by_extension']['.wav']) == (3, 1)
+    assert result['files_without_trackid'] == ['Untagged - Three.mp3']
+    assert result['unmatched_files'] == [{'file': 'Renamed - Two.mp3', 'reason': 'TrackId not found in MASTER playlist',
+                                          'current_id': 'stale-id'}]
+    assert [(t['track_id'], t['file_exists'], t['actual_track_id']) for t in result['missing_downloads']] == [
+        ('id2', True, 'stale-id'), ('id3', True, None), ('id4', True, None), ('id5', False, None)]
+
+
+def test_find_local_file_path_uses_exact_normalized_and_word_lookups(tmp_path, monkeypatch):
+    from helpers import m3u_helper
+    from helpers.m3u_helper import find_local_file_path, find_local_file_paths
+
+    for name in ['Daft Punk - One More Time.mp3', 'Justice_Genesis.mp3', 'Moderat  Bad Kingdom.mp3',
+                 'Bonobo - Kerala (Extended Mix).mp3', 'Burial - Archangle.mp3', 'Daft Punk - Da Funk.wav']:
+        write_track(str(tmp_path / 'lib' / name))
+    index = LibraryIndex(str(tmp_path))
+
+    def no_walk(*args):
+        raise AssertionError("the library index should be reused")
+
+    monkeypatch.setattr(m3u_helper.os, 'walk', no_walk)
+
+    def find(title, artists):
+        path = find_local_file_path(title, artists, str(tmp_path), index)
+        return os.path.basename(path) if path else None
+
+    assert find('One More Time', 'Daft Punk, Romanthony') == 'Daft Punk - One More Time.mp3'
+    assert find('Genesis', 'Justice') == 'Justice_Genesis.mp3'
+    assert find('Bad Kingdom', 'Moderat') == 'Moderat  Bad Kingdom.mp3'
+    assert find('Kerala', 'Bonobo') == 'Bonobo - Kerala (Extended Mix).mp3'
+    assert find('Archangel', 'Burial') == 'Burial - Archangle.mp3'
+    assert find('Da Funk', 'Daft Punk') is None  # Only MP3 files are considered
+    assert find('Windowlicker', 'Aphex Twin') is None
+
+    paths = find_local_file_paths([('Genesis', 'Justice'), ('Nothing', 'Nobody')], str(tmp_path), index)
+    assert [os.path.basename(p) if p else None for p in paths] == ['Justice_Genesis.mp3', None]
+
+
+def test_library_index_word_search_ranks_by_shared_words(tmp_path):
+    for name in ['Alpha - Beta Gamma.mp3', 'Alpha - Delta.mp3', 'Other - Beta.mp3', 'Alpha - Beta Gamma.flac']:
+        write_track(str(tmp_path / name))
+    index = LibraryIndex(str(tmp_path))
+
+    best = index.search_words('alpha beta gamma', ('.mp3',), limit=1)
+    assert [os.path.basename(index.files[p]) for p in best] == ['Alpha - Beta Gamma.mp3']
+    assert len(index.search_words('alpha beta gamma', ('.mp3',))) == 3
+    assert index.find_normalized('alpha beta gamma', ('.flac',)).endswith('.flac')
+
+
+def test_extract_track_ids_reads_each_unchanged_file_once(tmp_path, monkeypatch):
+    from api.services import validation_service
+    from helpers import validation_helper
+
+    tagged, untagged = str(tmp_path / 'a.mp3'), str(tmp_path / 'b.mp3')
+    write_track(tagged, 'id-a')
+    write_track(untagged)
+    wav = str(tmp_path / 'c.wav')
+    write_track(wav)
+    cache = validation_helper.TrackIdTagCache()
+    monkeypatch.setattr(validation_helper, '_track_id_cache', cache)
+
+    request = [tagged, untagged, tagged, wav, str(tmp_path / 'missing.mp3')]
+    result = validation_service.extract_track_ids(request)
+
+    assert [r['file_path'] for r in result] == request
+    assert [r['track_id'] for r in result] == ['id-a', None, 'id-a', None, None]
+    assert cache.stats == {'hits': 0, 'reads': 2}
+
+    validation_service.extract_track_ids(request)
+    assert cache.stats == {'hits': 2, 'reads': 2}
+
+    # A retagged file is read again
+    write_track(tagged, 'id-new')
+    os.utime(tagged, ns=(1, 1))
+    assert validation_service.extract_track_ids([tagged])[0]['track_id'] == 'id-new'
+    assert cache.stats == {'hits': 2, 'reads': 3}
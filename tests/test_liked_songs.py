@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from drivers import spotify_client
+from drivers.spotify_client import LIKED_SONGS_FULL_SYNC_STATE, get_liked_songs_with_dates
+from sql.core.unit_of_work import UnitOfWork
+
+
+class FakeSpotify:
+    """Serves Liked Songs (newest first) from memory and records every page request."""
+
+    def __init__(self, count):
+        start = datetime(2024, 1, 1)
+        self.songs = [(f"t{i}", start + timedelta(hours=i)) for i in range(count)][::-1]
+        self.offsets = []
+
+    def like(self, track_id, added_at):
+        self.songs = [s for s in self.songs if s[0] != track_id]
+        self.songs.insert(0, (track_id, added_at))
+
+    def current_user_saved_tracks(self, limit=20, offset=0):
+        self.offsets.append(offset)
+        items = [{'added_at': added_at.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                  'track': {'id': track_id, 'name': f"Song {track_id}", 'artists': [{'name': 'Artist'}]}}
+                 for track_id, added_at in self.songs[offset:offset + limit]]
+        return {'items': items, 'total': len(self.songs)}
+
+
+@pytest.fixture
+def provider(temp_database, monkeypatch):
+    provider = temp_database
+    monkeypatch.setattr(spotify_client, 'UnitOfWork', lambda: UnitOfWork(provider))
+    return provider
+
+
+def test_later_runs_only_fetch_songs_newer_than_the_high_water_mark(provider):
+    spotify = FakeSpotify(260)
+
+    songs = get_liked_songs_with_dates(spotify)
+    assert len(songs) == 260 and songs[0]['id'] == 't259'
+    assert spotify.offsets == [0, 50, 100, 150, 200, 250]
+
+    # Nothing new: a single page is requested
+    spotify.offsets.clear()
+    assert [s['id'] for s in get_liked_songs_with_dates(spotify)] == [s['id'] for s in songs]
+    assert spotify.offsets == [0]
+
+    # New and re-liked songs are picked up; an unliked one stays until the next full sync
+    spotify.offsets.clear()
+    spotify.like('new', datetime(2025, 1, 1))
+    spotify.like('t3', datetime(2025, 1, 2))
+    spotify.songs = [s for s in spotify.songs if s[0] != 't100']
+    songs = get_liked_songs_with_dates(spotify)
+    assert [s['id'] for s in songs[:2]] == ['t3', 'new']
+    assert len(songs) == 261
+    assert spotify.offsets == [0]
+
+    songs = get_liked_songs_with_dates(spotify, full_refresh=True)
+    assert len(songs) == 260 and 't100' not in {s['id'] for s in songs}
+
+
+def test_full_reconciliation_runs_when_due(provider, monkeypatch):
+    spotify = FakeSpotify(60)
+    get_liked_songs_with_dates(spotify, since_date=datetime(2024, 1, 2))
+
+    with UnitOfWork(provider) as uow:
+        assert len(uow.liked_song_repository.get_songs()) == 36
+        uow.sync_state_repository.set_value(LIKED_SONGS_FULL_SYNC_STATE,
+                                            (datetime.now() - timedelta(days=8)).isoformat())
+
+    spotify.offsets.clear()
+    spotify.songs = spotify.songs[1:]
+    assert len(get_liked_songs_with_dates(spotify, since_date=datetime(2024, 1, 2))) == 35
+    assert spotify.offsets == [0]
+
+    monkeypatch.setenv('LIKED_SONGS_FULL_SYNC_DAYS', '0')
+    spotify.offsets.clear()
+    get_liked_songs_with_dates(spotify)
+    assert spotify.offsets == [0, 50]
+
+
+class FakeSyncSpotify(FakeSpotify):
+    """Adds playlist reads and edits to the Liked Songs fake."""
+
+    def __init__(self, count, playlists):
+        super().__init__(count)
+        self.playlists = playlists
+        self.calls = []
+
+    def playlist_items(self, playlist_id, offset=0, limit=100, fields=None):
+        self.calls.append(('playlist_items', playlist_id))
+        uris = self.playlists[playlist_id]
+        return {'items': [{'track': {'id': uri.split(':')[-1], 'uri': uri}} for uri in uris[offset:offset + limit]],
+                'total': len(uris)}
+
+    def playlist_add_items(self, playlist_id, items, position=None):
+        self.calls.append(('add', playlist_id, tuple(items)))
+
+    def playlist_remove_all_occurrences_of_items(self, playlist_id, items):
+        self.calls.append(('remove', playlist_id, tuple(items)))
+
+
+def test_unsorted_sync_is_computed_in_the_database(provider, tmp_path, monkeypatch):
+    from helpers import playlist_cache_helper
+    from helpers.playlist_cache_helper import PlaylistContentCache
+    from sql.dto.playlist_info import PlaylistInfo
+
+    connection = provider.get_connection()
+    connection.executemany("INSERT INTO Playlists (PlaylistId, PlaylistName, AssociationsSnapshotId) VALUES (?, ?, ?)",
+                           [('p1', 'Synced', 's1'), ('unsorted', 'UNSORTED', 'u1'), ('p2', 'Changed', 'old')])
+    connection.executemany("INSERT INTO Tracks (Uri, TrackId, TrackTitle, Artists) VALUES (?, ?, ?, ?)",
+                           [(f"spotify:track:t{i}", f"t{i}", f"Song t{i}", 'Artist') for i in range(5)])
+    connection.executemany("INSERT INTO TrackPlaylists (Uri, PlaylistId) VALUES (?, ?)",
+                           [('spotify:track:t0', 'p1'), ('spotify:track:t1', 'p1'),
+                            ('spotify:track:t1', 'unsorted'), ('spotify:track:t2', 'unsorted'),
+                            ('spotify:track:t3', 'p2')])
+    connection.commit()
+    connection.close()
+
+    # p2 changed since the database sync: t3 was swapped for t4
+    spotify = FakeSyncSpotify(6, {'p2': ['spotify:track:t4']})
+    monkeypatch.setattr(spotify_client, 'fetch_playlists', lambda client: [
+        PlaylistInfo('Synced', 'p1', 's1'), PlaylistInfo('UNSORTED', 'unsorted', 'u1'),
+        PlaylistInfo('Changed', 'p2', 's2')])
+    monkeypatch.setattr(playlist_cache_helper, '_playlist_cache', PlaylistContentCache(str(tmp_path / 'cache')))
+    monkeypatch.setattr(spotify_client, 'project_root', tmp_path)
+    monkeypatch.setattr('builtins.input', lambda prompt: 'y')
+
+    added = spotify_client.sync_unplaylisted_to_unsorted(spotify, 'unsorted')
+
+    assert [song['id'] for song in added] == ['t5', 't3']
+    assert spotify.calls == [('playlist_items', 'p2'),
+                             ('remove', 'unsorted', ('t1',)),
+                             ('add', 'unsorted', ('t5', 't3'))]
+    assert 'Song t1' in next((tmp_path / 'logs' / 'unplaylisted').iterdir()).read_text(encoding='utf-8')
@@ -0,0 +1,142 @@
+import gzip
+import json
+import os
+import threading
+import urllib.request
+from urllib.error import HTTPError
+
+import pytest
+
+from scripts.local_tracks_server import accepts_gzip, create_server
+
+
+def write_cache(cache_dir, tracks, mtime_ns=None):
+    path = os.path.join(cache_dir, 'local_tracks_cache.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'tracks': tracks}, f)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return path
+
+
+@pytest.fixture
+def server(tmp_path):
+    write_cache(str(tmp_path), [{'path': f'C:/Music/Track {i}.mp3', 'title': f'Track {i}'} for i in range(500)],
+                mtime_ns=1_000_000_000)
+    server = create_server(0, str(tmp_path), host='127.0.0.1')
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get(server, path='/', headers=None):
+    request = urllib.request.Request(f"http://127.0.0.1:{server.server_address[1]}{path}", headers=headers or {})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers, response.read()
+    except HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def test_payload_is_encoded_once_and_served_gzipped_or_plain(server, monkeypatch):
+    def no_encoding(*args, **kwargs):
+        raise AssertionError("requests should reuse the encoded payload")
+
+    monkeypatch.setattr(json, 'dumps', no_encoding)
+
+    status, headers, plain = get(server)
+    assert status == 200 and headers['Content-Encoding'] is None
+    assert len(json.loads(plain)['tracks']) == 500
+
+    status, headers, compressed = get(server, headers={'Accept-Encoding': 'br, gzip'})
+    assert headers['Content-Encoding'] == 'gzip' and headers['ETag'] == server.cache.payload.etag
+    assert gzip.decompress(compressed) == plain and len(compressed) < len(plain) / 5
+
+
+def test_matching_etag_gets_304_until_the_file_changes(server, tmp_path):
+    etag = server.cache.payload.etag
+    status, headers, body = get(server, headers={'If-None-Match': etag})
+    assert (status, body) == (304, b'')
+
+    # Unchanged files are not reloaded
+    assert server.cache.refresh() is False
+
+    write_cache(str(tmp_path), [{'path': 'C:/Music/New.mp3', 'title': 'New'}], mtime_ns=2_000_000_000)
+    assert server.cache.refresh() is True
+
+    status, headers, body = get(server, headers={'If-None-Match': etag})
+    assert status == 200 and headers['ETag'] != etag
+    assert json.loads(body)['tracks'][0]['title'] == 'New'
+
+
+def test_status_reports_the_loaded_cache(server):
+    status, _, body = get(server, '/status')
+    assert status == 200 and json.loads(body)['tracks_count'] == 500
+    assert get(server, '/missing')[0] == 404
+
+
+def test_accept_encoding_parsing():
+    assert accepts_gzip('gzip, deflate, br')
+    assert accepts_gzip('*')
+    assert not accepts_gzip('gzip;q=0')
+    assert not accepts_gzip('identity')
+    assert not accepts_gzip(None)
+
+
+def test_clients_catch_up_with_deltas_between_versions(server, tmp_path):
+    tracks = [{'path': f'C:/Music/Track {i}.mp3', 'title': f'Track {i}'} for i in range(500)]
+    assert json.loads(get(server)[2])['cache_version'] == 1
+
+    # Version 2: one track retitled, one removed, one added
+    tracks[0] = dict(tracks[0], title='Retitled')
+    removed = tracks.pop(1)
+    tracks.append({'path': 'C:/Music/New.mp3', 'title': 'New'})
+    write_cache(str(tmp_path), tracks, mtime_ns=2_000_000_000)
+    server.cache.refresh()
+
+    status, headers, body = get(server, '/?since=1')
+    delta = json.loads(body)
+    assert headers['X-Cache-Version'] == '2'
+    assert (delta['delta'], delta['since'], delta['cache_version'], delta['key']) == (True, 1, 2, 'path')
+    assert delta['added'] == [{'path': 'C:/Music/New.mp3', 'title': 'New'}]
+    assert delta['modified'] == [tracks[0]]
+    assert delta['removed'] == [removed['path']]
+    assert len(body) < len(get(server)[2]) / 50
+
+    # Version 3 drops the track added in version 2: the net change since 1 no longer mentions it
+    tracks.pop()
+    write_cache(str(tmp_path), tracks, mtime_ns=3_000_000_000)
+    server.cache.refresh()
+    delta = json.loads(get(server, '/?since=1')[2])
+    assert (delta['added'], len(delta['modified']), len(delta['removed'])) == ([], 1, 1)
+    assert json.loads(get(server, '/?since=2')[2])['removed'] == ['C:/Music/New.mp3']
+    assert json.loads(get(server, '/?since=3')[2])['added'] == []
+
+    # Versions older than the changelog (or unknown) get the full payload
+    for since in ('0', '99', 'abc'):
+        full = json.loads(get(server, f'/?since={since}')[2])
+        assert 'delta' not in full and len(full['tracks']) == 499
+
+
+def test_changelog_is_bounded(tmp_path):
+    from scripts.local_tracks_server import LocalTracksCache
+
+    cache = LocalTracksCache(str(tmp_path), max_history_versions=2)
+    base = [{'uri': f'spotify:track:{i}', 'plays': 0} for i in range(10)]
+    for version in range(1, 5):
+        write_cache(str(tmp_path), base + [{'uri': f'spotify:track:v{v}'} for v in range(1, version + 1)],
+                    mtime_ns=version * 1_000_000_000)
+        cache.refresh()
+
+    assert cache.version == 4
+    delta = json.loads(cache.payload_since(2).body)
+    assert delta['delta'] is True and [t['uri'] for t in delta['added']] == ['spotify:track:v3', 'spotify:track:v4']
+    assert cache.payload_since(2) is cache.payload_since(2)
+    assert cache.payload_since(1) is cache.payload
+
+    # When most entries changed, the full payload is sent instead of a delta
+    write_cache(str(tmp_path), [dict(track, plays=1) for track in base], mtime_ns=5_000_000_000)
+    cache.refresh()
+    assert cache.payload_since(4) is cache.payload
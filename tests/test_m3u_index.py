@@ -0,0 +1,168 @@
+import os
+import time
+
+import pytest
+
+from helpers import m3u_index_helper
+from helpers.m3u_index_helper import M3UIndex, get_m3u_index, parse_m3u_file, parse_m3u_lines
+
+
+@pytest.fixture(autouse=True)
+def index_cache_dir(tmp_path_factory, monkeypatch):
+    """Keep persisted M3U indexes out of the project data directory."""
+    cache_dir = str(tmp_path_factory.mktemp("m3u_index_cache"))
+    monkeypatch.setenv('M3U_INDEX_CACHE_DIR', cache_dir)
+    yield cache_dir
+
+
+def write_m3u(path, tracks):
+    """Write an extended M3U file from (artist, title, file_path) tuples."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("#EXTM3U\n")
+        for artist, title, file_path in tracks:
+            f.write(f"#EXTINF:180,{artist} - {title}\n")
+            f.write(f"{file_path}\n")
+
+
+def test_parse_m3u_lines_handles_plain_and_extended_entries():
+    entries = parse_m3u_lines([
+        "#EXTM3U",
+        "#EXTINF:245,Artist - Title",
+        "/music/a.mp3",
+        "",
+        "/music/b.mp3",
+        "#EXTINF:100,Dangling",
+        "#EXTINF:abc,Other - Song",
+        "/music/c.mp3",
+    ])
+
+    assert [e.file_path for e in entries] == ["/music/a.mp3", "/music/b.mp3", "", "/music/c.mp3"]
+    assert entries[0].duration == 245 and entries[0].track_info == "Artist - Title"
+    assert not entries[1].has_extinf
+    assert entries[2].has_extinf and entries[2].track_info == "Dangling"
+    assert entries[3].duration == 0
+
+
+def test_parse_m3u_file_is_cached_until_mtime_changes(tmp_path):
+    m3u_path = str(tmp_path / "Test.m3u")
+    write_m3u(m3u_path, [("A", "One", "/music/one.mp3")])
+
+    first = parse_m3u_file(m3u_path)
+    assert parse_m3u_file(m3u_path) is first
+
+    write_m3u(m3u_path, [("A", "One", "/music/one.mp3"), ("B", "Two", "/music/two.mp3")])
+    os.utime(m3u_path, (time.time() + 10, time.time() + 10))
+
+    second = parse_m3u_file(m3u_path)
+    assert second is not first
+    assert second.get_file_paths() == ["/music/one.mp3", "/music/two.mp3"]
+
+
+def test_index_lookups_by_playlist_file_and_title(tmp_path):
+    root = str(tmp_path)
+    write_m3u(os.path.join(root, "Root List.m3u"), [("Artist", "Sundaland (Extended Mix)", "/music/sun.mp3")])
+    write_m3u(os.path.join(root, "House", "Deep.m3u"), [
+        ("Artist", "Sundaland (Extended Mix)", "/music/sun.mp3"),
+        ("Other", "Plommon (Original Mix)", "/music/plommon.mp3"),
+    ])
+    os.makedirs(os.path.join(root, "Empty"))
+
+    index = get_m3u_index(root)
+
+    assert sorted(index.get_playlist_names()) == ["Deep", "Root List"]
+    assert index.get_by_playlist("Deep").folder_path == "House"
+    assert sorted(index.folders) == ["Empty", "House"]
+
+    containing = index.find_playlists_containing_files(["/MUSIC/sun.mp3", "/music/missing.mp3"])
+    assert sorted(containing["/MUSIC/sun.mp3"]) == [os.path.join("House", "Deep.m3u"), "Root List.m3u"]
+    assert containing["/music/missing.mp3"] == []
+
+    by_title = index.find_by_title(["plommon"])
+    assert len(by_title["plommon"]) == 1
+    assert by_title["plommon"][0]["file_path"] == "/music/plommon.mp3"
+    assert index.find_by_title(["plommon"], case_sensitive=True)["plommon"] == []
+
+    os.remove(os.path.join(root, "Root List.m3u"))
+    assert get_m3u_index(root).get_playlist_names() == ["Deep"]
+
+
+def test_index_updates_incrementally_and_persists(tmp_path, index_cache_dir):
+    root = str(tmp_path / "playlists")
+    deep_path = os.path.join(root, "Deep.m3u")
+    write_m3u(deep_path, [("Artist", "Old Song", "/music/old.mp3")])
+
+    index = get_m3u_index(root)
+    assert index.find_by_title(["old song"])["old song"][0]["line_number"] == 2
+
+    write_m3u(deep_path, [("Artist", "New Song", "/music/new.mp3")])
+    os.utime(deep_path, (time.time() + 10, time.time() + 10))
+    index.refresh()
+
+    assert index.find_by_title(["old"])["old"] == []
+    assert index.find_by_title(["new so"])["new so"][0]["file_path"] == "/music/new.mp3"
+    assert index.find_playlists_containing_files(["/music/old.mp3"])["/music/old.mp3"] == []
+    assert os.listdir(index_cache_dir)
+
+    # A fresh process loads the persisted entries instead of re-reading unchanged files
+    m3u_index_helper._parsed_file_cache.clear()
+    assert m3u_index_helper._load_persisted_files(root) == 1
+    cached = m3u_index_helper._parsed_file_cache[deep_path]
+    fresh_index = M3UIndex(root).refresh()
+    assert fresh_index.get_by_path(deep_path) is cached
+    assert fresh_index.find_playlists_containing_files(["/music/new.mp3"])["/music/new.mp3"] == ["Deep.m3u"]
+
+
+def test_index_and_file_lookups_share_one_parse(tmp_path, monkeypatch):
+    from helpers.m3u_helper import get_m3u_track_uris_from_file
+
+    root = str(tmp_path / "playlists")
+    deep_path = os.path.join(root, "House", "Deep.m3u")
+    write_m3u(deep_path, [("Artist", "Song", "/music/song.mp3")])
+
+    reads = []
+    read_lines = m3u_index_helper._read_m3u_lines
+    monkeypatch.setattr(m3u_index_helper, '_read_m3u_lines', lambda path: reads.append(path) or read_lines(path))
+
+    # Lookups without the folder (as validation does) before and after indexing
+    uri_map = {'spotify:track:1': '/music/song.mp3'}
+    assert get_m3u_track_uris_from_file(deep_path, uri_map) == {'spotify:track:1'}
+    for _ in range(2):
+        index = M3UIndex(root, persist=False).refresh()
+        assert get_m3u_track_uris_from_file(deep_path, uri_map) == {'spotify:track:1'}
+
+    assert reads == [deep_path]
+    assert index.get_by_path(deep_path).folder_path == "House"
+    assert parse_m3u_file(deep_path) is index.get_by_path(deep_path)
+
+
+def test_concurrent_persists_write_separate_temp_files(tmp_path, index_cache_dir, monkeypatch):
+    import json
+    import threading
+
+    root = str(tmp_path / "playlists")
+    write_m3u(os.path.join(root, "Deep.m3u"), [("Artist", "Song", "/music/song.mp3")])
+    playlist_files = M3UIndex(root, persist=False).refresh().get_playlist_files()
+
+    # Both writers are inside json.dump at the same time
+    both_writing = threading.Barrier(2, timeout=5)
+    dump = json.dump
+    temp_paths = []
+
+    def dump_together(data, f, **kwargs):
+        temp_paths.append(f.name)
+        both_writing.wait()
+        dump(data, f, **kwargs)
+
+    monkeypatch.setattr(m3u_index_helper.json, 'dump', dump_together)
+    threads = [threading.Thread(target=m3u_index_helper._persist_files, args=(root, playlist_files))
+               for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(temp_paths)) == 2
+    with open(m3u_index_helper._get_index_cache_path(root), encoding='utf-8') as f:
+        assert list(json.load(f)['files']) == [os.path.join(root, "Deep.m3u")]
+    assert os.listdir(index_cache_dir) == [os.path.basename(m3u_index_helper._get_index_cache_path(root))]
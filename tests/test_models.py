@@ -0,0 +1,66 @@
+import pytest
+
+from sql.models.playlist import Playlist
+from sql.models.track import Track
+from sql.repositories.file_track_mapping_repository import FileTrackMappingRepository
+from sql.repositories.track_repository import TrackRepository
+
+
+def test_models_are_slotted_and_allocate_relationships_lazily():
+    track = Track("spotify:track:a", "a", "Song", "Artist")
+    playlist = Playlist("p1", "Deep")
+
+    assert not hasattr(track, '__dict__')
+    assert track._playlists is None and not track.is_in_playlist(playlist)
+    assert not track.remove_from_playlist(playlist)
+
+    playlist.add_track(track)
+
+    assert playlist.tracks == [track]
+    assert track.playlists == [playlist]
+    with pytest.raises(AttributeError):
+        track.unexpected = True
+
+
+def test_projection_returns_named_tuples_for_requested_columns(connection):
+    connection.executemany(
+        "INSERT INTO Tracks (Uri, TrackId, TrackTitle, Artists, IsLocal) VALUES (?, ?, ?, ?, ?)",
+        [("spotify:track:b", "b", "Two", "B", 0), ("spotify:track:a", "a", "One", "A", 1)]
+    )
+    repository = TrackRepository(connection)
+
+    rows = repository.get_projection(("Uri", "TrackTitle"), "IsLocal = ?", (0,))
+    assert rows == [("spotify:track:b", "Two")]
+    assert rows[0].TrackTitle == "Two"
+
+    ordered = repository.get_projection(("Uri",), order_by="Uri")
+    assert [row.Uri for row in ordered] == ["spotify:track:a", "spotify:track:b"]
+
+    with pytest.raises(ValueError):
+        repository.get_projection(("Uri", "Uri; DROP TABLE Tracks",))
+
+
+def test_inactive_mappings_map_to_inactive_models(connection):
+    connection.execute("INSERT INTO FileTrackMappings (FilePath, Uri, IsActive) VALUES ('/a.mp3', 'spotify:track:a', 0)")
+
+    mapping = FileTrackMappingRepository(connection).get_all()[0]
+
+    assert mapping.is_active is False
+    assert mapping.uri == "spotify:track:a"
+
+
+def test_iter_all_streams_models_in_batches(connection):
+    connection.executemany(
+        "INSERT INTO FileTrackMappings (FilePath, Uri, IsActive) VALUES (?, ?, ?)",
+        [(f"/music/{i}.mp3", f"spotify:track:{i}", i % 2) for i in range(25)]
+    )
+    repository = FileTrackMappingRepository(connection)
+
+    stream = repository.iter_all("IsActive = ?", (1,), batch_size=4)
+    first = next(stream)
+    assert first.is_active and first.file_path == "/music/1.mp3"
+    assert len([first, *stream]) == 12
+
+    rows = list(repository.iter_query("SELECT FilePath FROM FileTrackMappings ORDER BY MappingId", batch_size=7))
+    assert [row['FilePath'] for row in rows[:2]] == ["/music/0.mp3", "/music/1.mp3"]
+    assert len(rows) == 25
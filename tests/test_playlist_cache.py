@@ -0,0 +1,91 @@
+import os
+
+import pytest
+
+from drivers import spotify_client
+from helpers import playlist_cache_helper
+from helpers.playlist_cache_helper import PlaylistContentCache, get_playlist_tracks
+
+
+class FakeSpotify:
+    """Serves playlist items and snapshot ids from memory and records every API call."""
+
+    def __init__(self, playlists, snapshots):
+        self.playlists = playlists
+        self.snapshots = snapshots
+        self.calls = []
+
+    def playlist(self, playlist_id, fields=None):
+        self.calls.append(('playlist', playlist_id))
+        return {'snapshot_id': self.snapshots[playlist_id]}
+
+    def playlist_items(self, playlist_id, offset=0, limit=100, fields=None):
+        self.calls.append(('playlist_items', playlist_id, offset))
+        tracks = self.playlists[playlist_id]
+        return {'items': [{'track': t} for t in tracks[offset:offset + limit]], 'total': len(tracks)}
+
+
+def track(track_id, name, artist, is_local=False):
+    uri = f"spotify:local:{artist}::{name}:200" if is_local else f"spotify:track:{track_id}"
+    return {'id': None if is_local else track_id, 'uri': uri, 'name': name, 'artists': [{'name': artist}],
+            'album': {'name': 'Album'}, 'is_local': is_local, 'duration_ms': 200000}
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = PlaylistContentCache(str(tmp_path))
+    monkeypatch.setattr(playlist_cache_helper, '_playlist_cache', cache)
+    return cache
+
+
+def test_unchanged_snapshot_costs_no_api_call(cache, tmp_path):
+    spotify = FakeSpotify({'p1': [track('a', 'One', 'A'), track('b', 'Two', 'B')]}, {'p1': 's1'})
+
+    first = get_playlist_tracks(spotify, 'p1', 's1')
+    assert first.uris == ['spotify:track:a', 'spotify:track:b']
+    assert spotify.calls == [('playlist_items', 'p1', 0)]
+
+    spotify.calls.clear()
+    assert get_playlist_tracks(spotify, 'p1', 's1') is first
+    assert PlaylistContentCache(str(tmp_path)).get_entry('p1', 's1').items == first.items
+    assert spotify.calls == []
+
+    # Without a known snapshot only the snapshot id is requested
+    assert get_playlist_tracks(spotify, 'p1').uris == first.uris
+    assert spotify.calls == [('playlist', 'p1')]
+
+    # A new snapshot replaces the cached one
+    spotify.snapshots['p1'] = 's2'
+    spotify.playlists['p1'] = spotify.playlists['p1'][:1]
+    assert get_playlist_tracks(spotify, 'p1').uris == ['spotify:track:a']
+    assert cache.get('p1', 's1') is None
+
+
+def test_persisted_entries_are_bounded_and_evicted_least_recently_used_first(tmp_path):
+    cache = PlaylistContentCache(str(tmp_path), max_entries=2, max_memory_entries=1)
+    items = [track('a', 'One', 'A')]
+
+    cache.put('p1', 's1', items)
+    cache.put('p2', 's2', items)
+    os.utime(tmp_path / 'p1.json', (1, 1))
+    os.utime(tmp_path / 'p2.json', (2, 2))
+    cache.put('p3', 's3', items)
+
+    assert sorted(os.listdir(tmp_path)) == ['p2.json', 'p3.json']
+    assert cache.get('p1', 's1') is None and cache.get('p2', 's2') == items
+
+    size_bounded = PlaylistContentCache(str(tmp_path), max_bytes=1)
+    size_bounded.put('p4', 's4', items)
+    assert os.listdir(tmp_path) == ['p4.json']
+
+
+def test_track_fetchers_use_the_cache(cache):
+    spotify = FakeSpotify({'p1': [track('a', 'One', 'A'), track(None, 'Home Demo', 'Me', is_local=True)]},
+                          {'p1': 's1'})
+
+    uris = spotify_client.get_track_uris_for_playlist(spotify, 'p1', force_refresh=True, snapshot_id='s1')
+    track_ids = spotify_client.get_track_ids_for_playlist(spotify, 'p1', force_refresh=True, snapshot_id='s1')
+
+    assert uris == ['spotify:track:a', 'spotify:local:Me::Home Demo:200']
+    assert track_ids[0] == 'a' and track_ids[1].startswith('local_')
+    assert spotify.calls == [('playlist_items', 'p1', 0)]
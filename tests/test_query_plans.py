@@ -0,0 +1,73 @@
+import pytest
+
+from sql.core.migrations import LATEST_SCHEMA_VERSION, MIGRATIONS, apply_migrations, get_applied_versions, \
+    get_schema_version, is_schema_current
+from sql.repositories.file_track_mapping_repository import FileTrackMappingRepository
+from sql.repositories.track_playlist_repository import TrackPlaylistRepository
+
+
+def query_plans(conn, call):
+    """Run a repository call and return the query plan of every SELECT it issued."""
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        call()
+    finally:
+        conn.set_trace_callback(None)
+
+    plans = []
+    for statement in statements:
+        if statement.lstrip().upper().startswith("SELECT"):
+            plan = conn.execute("EXPLAIN QUERY PLAN " + statement).fetchall()
+            plans.append(" | ".join(row['detail'] for row in plan))
+    return plans
+
+
+def test_migrations_are_recorded_and_not_reapplied(connection):
+    assert get_applied_versions(connection) == [m.version for m in MIGRATIONS]
+    assert apply_migrations(connection) == []
+
+    index_names = {row['name'] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert "idx_filemappings_active" not in index_names
+    assert "idx_trackplaylists_playlistid" not in index_names
+
+
+def test_user_version_tracks_schema_and_is_backfilled(connection):
+    assert get_schema_version(connection) == LATEST_SCHEMA_VERSION
+    assert is_schema_current(connection)
+
+    # A database migrated before user_version was recorded only has SchemaMigrations rows
+    connection.execute("PRAGMA user_version = 0")
+    assert not is_schema_current(connection)
+    assert apply_migrations(connection) == []
+    assert is_schema_current(connection)
+
+
+@pytest.mark.parametrize("method, args, index_name", [
+    ("get_uri_by_file_path", ("/music/a.mp3",), "idx_filemappings_active_path_uri"),
+    ("get_files_by_uri", ("spotify:track:a",), "idx_filemappings_active_uri_path"),
+    ("get_all_active_uri_to_file_mappings", (), "idx_filemappings_active_uri_path"),
+    ("get_uri_mappings_batch", (["/music/a.mp3", "/music/b.mp3"],), "idx_filemappings_active_path_uri"),
+    ("check_mapping_exists", ("/music/a.mp3", "spotify:track:a"), "idx_filemappings_active_path_uri"),
+    ("get_duplicate_mapping_rows", (), "idx_filemappings_active_uri_path"),
+    ("cleanup_stale_mappings", (), "idx_filemappings_active_"),
+])
+def test_active_mapping_queries_use_covering_partial_indexes(connection, method, args, index_name):
+    repository = FileTrackMappingRepository(connection)
+
+    plans = query_plans(connection, lambda: getattr(repository, method)(*args))
+
+    assert plans
+    assert f"COVERING INDEX {index_name}" in plans[0]
+
+
+@pytest.mark.parametrize("method, args, index_name", [
+    ("get_uris_for_playlist", ("playlist",), "idx_trackplaylists_playlist_uri"),
+    ("get_playlist_ids_for_uri", ("spotify:track:a",), "sqlite_autoindex_TrackPlaylists_1"),
+])
+def test_track_playlist_lookups_use_covering_indexes(connection, method, args, index_name):
+    repository = TrackPlaylistRepository(connection)
+
+    plans = query_plans(connection, lambda: getattr(repository, method)(*args))
+
+    assert f"COVERING INDEX {index_name}" in plans[0]
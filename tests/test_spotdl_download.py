@@ -0,0 +1,85 @@
+import os
+import subprocess
+
+import pytest
+
+from api.services import track_service
+from helpers import spotdl_helper
+from sql.core.unit_of_work import UnitOfWork
+
+
+@pytest.fixture
+def provider(temp_database, monkeypatch):
+    provider = temp_database
+    connection = provider.get_connection()
+    connection.executemany("INSERT INTO Tracks (Uri, TrackId, TrackTitle, Artists) VALUES (?, ?, ?, ?)", [
+        ('spotify:track:aaa', 'aaa', 'One More Time', 'Daft Punk'),
+        ('spotify:track:bbb', 'bbb', 'Why?', 'Bonobo, Kerala'),
+        ('spotify:track:ccc', 'ccc', 'Unavailable', 'Nobody'),
+        ('spotify:track:ddd', 'ddd', 'Present', 'Already'),
+        ('spotify:local:x:y:z:1', None, 'Local', 'File'),
+    ])
+    connection.commit()
+    connection.close()
+
+    monkeypatch.setattr(track_service, 'UnitOfWork', lambda: UnitOfWork(provider))
+    return provider
+
+
+class FakeSpotdl:
+    """Records spotDL invocations and writes a file for every available track."""
+
+    def __init__(self, unavailable=()):
+        self.calls = []
+        self.unavailable = set(unavailable)
+
+    def __call__(self, cmd, **kwargs):
+        self.calls.append(cmd)
+        template = cmd[cmd.index('--output') + 1]
+        for url in cmd[1:cmd.index('--output')]:
+            track_id = url.rsplit('/', 1)[-1]
+            if track_id not in self.unavailable:
+                path = template.replace('{track-id}', track_id).replace('{output-ext}', 'mp3')
+                with open(path, 'wb') as f:
+                    f.write(b'ID3' + track_id.encode())
+        return subprocess.CompletedProcess(cmd, 0, stdout='Downloaded', stderr='')
+
+
+def test_batch_download_runs_spotdl_once_and_maps_files_by_track_id(provider, tmp_path, monkeypatch):
+    download_dir = tmp_path / 'music'
+    download_dir.mkdir()
+    (download_dir / 'Already - Present.mp3').write_bytes(b'old')
+    spotdl = FakeSpotdl(unavailable={'ccc'})
+    monkeypatch.setattr(spotdl_helper.subprocess, 'run', spotdl)
+    updates = []
+
+    result = track_service.download_all_missing_tracks(
+        ['spotify:track:aaa', 'spotify:track:bbb', 'spotify:track:ccc', 'spotify:track:ddd',
+         'spotify:local:x:y:z:1', 'spotify:track:missing'],
+        str(download_dir), updates.append)
+
+    assert len(spotdl.calls) == 1
+    assert spotdl.calls[0][1:4] == ['https://open.spotify.com/track/aaa', 'https://open.spotify.com/track/bbb',
+                                    'https://open.spotify.com/track/ccc']
+    assert [d['result']['downloaded_file'] for d in result['successful_downloads']] == [
+        str(download_dir / 'Daft Punk - One More Time.mp3'), str(download_dir / 'Bonobo, Kerala - Why.mp3')]
+    assert all(d['result']['mapping_created'] for d in result['successful_downloads'])
+    assert sorted(d['uri'] for d in result['failed_downloads']) == [
+        'spotify:local:x:y:z:1', 'spotify:track:ccc', 'spotify:track:ddd', 'spotify:track:missing']
+    assert sorted(os.listdir(download_dir)) == ['Already - Present.mp3', 'Bonobo, Kerala - Why.mp3',
+                                                'Daft Punk - One More Time.mp3']
+    assert updates[-1]['current'] == 6
+
+    with UnitOfWork(provider) as uow:
+        assert uow.file_track_mapping_repository.get_uri_by_file_path(
+            str(download_dir / 'Bonobo, Kerala - Why.mp3')) == 'spotify:track:bbb'
+
+
+def test_single_download_reports_failures(provider, tmp_path, monkeypatch):
+    monkeypatch.setattr(spotdl_helper.subprocess, 'run', FakeSpotdl(unavailable={'ccc'}))
+
+    assert track_service.download_and_map_track('spotify:track:aaa', str(tmp_path))['mapping_created']
+    with pytest.raises(RuntimeError, match='No download occurred'):
+        track_service.download_and_map_track('spotify:track:ccc', str(tmp_path))
+    with pytest.raises(ValueError):
+        track_service.download_and_map_track('spotify:track:missing', str(tmp_path))
@@ -203,7 +203,7 @@ class TestSyncDatabase:
             mock_auth.return_value = MagicMock()
 
             # Mock get_track_uris_for_playlist to return different results based on playlist
-            def mock_get_tracks_side_effect(spotify_client, playlist_id, force_refresh=False):
+            def mock_get_tracks_side_effect(spotify_client, playlist_id, force_refresh=False, snapshot_id=None):
                 return spotify_data['playlist_track_associations'].get(playlist_id, [])
 
             mock_get_tracks.side_effect = mock_get_tracks_side_effect
@@ -251,7 +251,7 @@ class TestSyncDatabase:
             mock_auth.return_value = MagicMock()
 
             # Mock get_track_uris_for_playlist to return different results based on playlist
-            def mock_get_track_uris_side_effect(spotify_client, playlist_id, force_refresh=False):
+            def mock_get_track_uris_side_effect(spotify_client, playlist_id, force_refresh=False, snapshot_id=None):
                 return spotify_data['playlist_track_associations'].get(playlist_id, [])
 
             mock_get_track_uris.side_effect = mock_get_track_uris_side_effect
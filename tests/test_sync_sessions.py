@@ -0,0 +1,132 @@
+import pytest
+
+from api.services import sync_service
+from api.utils import analysis_sessions
+from api.utils.pagination import ResultStore
+from sql.core.unit_of_work import UnitOfWork
+from sql.models.playlist import Playlist
+from sql.models.track import Track
+
+
+PLAYLIST_CHANGES = {
+    'to_add': [{'id': f'p{i}', 'name': f'Playlist {i}', 'snapshot_id': f's{i}'} for i in range(300)],
+    'to_update': [],
+    'to_delete': []
+}
+
+
+@pytest.fixture
+def provider(temp_database, monkeypatch):
+    provider = temp_database
+    monkeypatch.setattr(analysis_sessions, 'UnitOfWork', lambda: UnitOfWork(provider))
+    monkeypatch.setattr(analysis_sessions, '_session_store', ResultStore(max_results=5, ttl_seconds=60))
+    return provider
+
+
+@pytest.fixture
+def synced(monkeypatch):
+    calls = []
+
+    def sync_playlists_to_db(force_full_refresh=False, skip_confirmation=False, precomputed_changes=None,
+                             exclusion_config=None):
+        calls.append(precomputed_changes)
+        return len(precomputed_changes['items_to_add']), 0, 0, 0
+
+    monkeypatch.setattr(sync_service, 'analyze_playlists_changes',
+                        lambda **kwargs: (300, 0, 0, 0, PLAYLIST_CHANGES))
+    monkeypatch.setattr(sync_service, 'sync_playlists_to_db', sync_playlists_to_db)
+    return calls
+
+
+def analyze(client):
+    return client.post('/api/sync/database', json={'action': 'playlists', 'confirmed': False}).get_json()
+
+
+def confirm(client, token, **extra):
+    return client.post('/api/sync/database', json=dict({'action': 'playlists', 'confirmed': True,
+                                                        'session_token': token}, **extra))
+
+
+def test_confirming_with_a_session_token_uses_the_stored_analysis(client, provider, synced):
+    analysis = analyze(client)
+    assert analysis['needs_confirmation'] and analysis['session_token']
+
+    response = confirm(client, analysis['session_token'])
+    assert response.status_code == 200 and response.get_json()['stats']['added'] == 300
+    assert [p['id'] for p in synced[0]['items_to_add']] == [f'p{i}' for i in range(300)]
+
+    # A session is used once
+    response = confirm(client, analysis['session_token'])
+    assert response.status_code == 409 and response.get_json()['session_expired'] is True
+    assert len(synced) == 1
+
+
+def test_sessions_are_refused_after_the_database_changed(client, provider, synced):
+    token = analyze(client)['session_token']
+    with UnitOfWork(provider) as uow:
+        uow.track_playlist_repository.insert('t1', 'p1', 'spotify:track:t1')
+
+    response = confirm(client, token)
+    assert response.status_code == 409 and 'changed' in response.get_json()['message']
+    assert synced == []
+
+    # Unknown tokens and sessions of another sync are refused too
+    assert confirm(client, 'unknown').status_code == 409
+
+
+def test_writes_made_while_analyzing_invalidate_the_session(client, provider, synced, monkeypatch):
+    def analyze_playlists_changes(**kwargs):
+        # Another process syncs tracks while this analysis runs
+        with UnitOfWork(provider) as uow:
+            uow.track_repository.insert(Track('spotify:track:t1', 't1', 'Song', 'Artist'))
+        return 300, 0, 0, 0, PLAYLIST_CHANGES
+
+    monkeypatch.setattr(sync_service, 'analyze_playlists_changes', analyze_playlists_changes)
+
+    response = confirm(client, analyze(client)['session_token'])
+    assert response.status_code == 409 and synced == []
+
+
+def test_a_confirmation_for_another_sync_keeps_the_session(client, provider, synced):
+    token = analyze(client)['session_token']
+
+    response = confirm(client, token, action='tracks')
+    assert response.status_code == 409 and 'not tracks' in response.get_json()['message']
+    assert synced == []
+
+    assert confirm(client, token).status_code == 200
+    assert len(synced) == 1
+
+
+def test_sequential_sync_confirms_its_stage_with_the_token(client, provider, synced):
+    analysis = client.post('/api/sync/database', json={'action': 'all', 'stage': 'playlists'}).get_json()
+    response = client.post('/api/sync/database', json={'action': 'all', 'stage': 'playlists', 'confirmed': True,
+                                                       'session_token': analysis['session_token']}).get_json()
+    assert (response['stage'], response['next_stage'], response['stats']['added']) == ('sync_complete', 'tracks', 300)
+
+
+def test_association_analysis_that_records_snapshots_can_be_confirmed(client, provider, monkeypatch):
+    with UnitOfWork(provider) as uow:
+        uow.playlist_repository.insert(Playlist('p1', 'Deep', associations_snapshot_id='s1'))
+
+    def analyze_track_playlist_associations(master_playlist_id, force_full_refresh=False, exclusion_config=None):
+        # Playlists changed without association changes: the analysis marks them processed
+        with UnitOfWork(provider) as uow:
+            uow.playlist_repository.update(Playlist('p1', 'Deep', associations_snapshot_id='s2'))
+        return {'tracks_with_changes': [], 'associations_to_add': 0, 'associations_to_remove': 0,
+                'changed_playlists': [{'id': 'p1', 'name': 'Deep'}]}
+
+    synced = []
+    monkeypatch.setattr(sync_service, 'analyze_track_playlist_associations', analyze_track_playlist_associations)
+    monkeypatch.setattr(sync_service, 'sync_track_playlist_associations_to_db',
+                        lambda *args, **kwargs: synced.append(kwargs['precomputed_changes']) or
+                        {'associations_added': 0, 'associations_removed': 0})
+
+    request = {'action': 'all', 'stage': 'associations'}
+    analysis = client.post('/api/sync/database', json=request).get_json()
+    assert analysis['needs_confirmation'] is True
+
+    response = client.post('/api/sync/database',
+                           json=dict(request, confirmed=True, session_token=analysis['session_token']))
+    assert response.status_code == 200 and response.get_json()['next_stage'] == 'complete'
+    assert synced[0]['changed_playlists'] == [{'id': 'p1', 'name': 'Deep'}]
@@ -0,0 +1,63 @@
+import pytest
+
+from helpers import track_catalog_helper
+from helpers.track_catalog_helper import get_track_catalog
+from sql.core.unit_of_work import UnitOfWork
+from sql.models.track import Track
+
+
+@pytest.fixture
+def provider(temp_database, monkeypatch):
+    provider = temp_database
+    monkeypatch.setattr(track_catalog_helper, 'UnitOfWork', lambda: UnitOfWork(provider))
+    monkeypatch.setattr(track_catalog_helper, '_catalog', None)
+    return provider
+
+
+def add_track(provider, uri, title, artists, duration=None):
+    with UnitOfWork(provider) as uow:
+        uow.track_repository.insert(Track(uri, uri.split(':')[-1], title, artists, duration_ms=duration))
+
+
+def test_catalog_is_shared_until_tracks_change(provider):
+    add_track(provider, "spotify:track:a", "One", "Artist", 180000)
+    add_track(provider, "spotify:track:b", "Two", "Artist")
+
+    catalog = get_track_catalog()
+
+    assert len(catalog) == 2 and "spotify:track:a" in catalog
+    assert catalog.artists[0] is catalog.artists[1]
+    assert list(catalog.durations) == [180000, 0]
+    track = catalog.get_track("spotify:track:b")
+    assert (track.title, track.duration_ms) == ("Two", None)
+    assert get_track_catalog() is catalog
+
+    with UnitOfWork(provider) as uow:
+        uow.track_repository.update(Track("spotify:track:b", "b", "Two (Edit)", "Artist"))
+
+    refreshed = get_track_catalog()
+    assert refreshed is not catalog
+    assert refreshed.get_track("spotify:track:b").title == "Two (Edit)"
+
+
+def test_generation_is_bumped_once_per_committed_unit_of_work(provider):
+    with UnitOfWork(provider) as uow:
+        before = uow.track_repository.get_generation()
+        for i in range(100):
+            uow.track_repository.insert(Track(f"spotify:track:{i}", str(i), f"Song {i}", "Artist"))
+    with UnitOfWork(provider) as uow:
+        assert uow.track_repository.get_generation() == before + 1
+        # Rolled back and read-only units of work leave it alone
+        uow.track_repository.get_all()
+    with pytest.raises(RuntimeError):
+        with UnitOfWork(provider) as uow:
+            uow.track_repository.delete_all()
+            raise RuntimeError("abort")
+    with UnitOfWork(provider) as uow:
+        assert uow.track_repository.get_generation() == before + 1
+        assert uow.track_repository.delete_all() == 100
+    with UnitOfWork(provider) as uow:
+        assert uow.track_repository.get_generation() == before + 2
+        triggers = uow.connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger'").fetchall()
+        assert triggers == []
@@ -10,7 +10,6 @@ of each track while removing duplicates, radio edits, etc.
 import os
 import sys
 import argparse
-import time
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Tuple, Set, Optional
@@ -19,9 +18,8 @@ from dotenv import load_dotenv
 from drivers.spotify_client import authenticate_spotify
 
 from helpers.deduplication_helper import (
+    DeduplicationSession,
     is_unchartify_playlist,
-    deduplicate_playlist,
-    remove_tracks_from_playlist,
     get_track_display_info,
 )
 from utils.logger import setup_logger
@@ -62,6 +60,7 @@ def get_unchartify_playlists(spotify_client) -> List[Dict]:
                 unchartify_playlists.append({
                     'id': playlist['id'],
                     'name': playlist['name'],
+                    'snapshot_id': playlist['snapshot_id'],
                     'tracks': playlist['tracks']['total']
                 })
                 dedup_logger.info(
@@ -99,10 +98,11 @@ def deduplicate_unchartify_playlists(spotify_client, dry_run: bool = False,
             try:
                 # Clean up the playlist ID (remove URL parameters if present)
                 clean_id = playlist_id.split('?')[0]
-                playlist = spotify_client.playlist(clean_id, fields="id,name,tracks.total")
+                playlist = spotify_client.playlist(clean_id, fields="id,name,snapshot_id,tracks.total")
                 playlists.append({
                     'id': playlist['id'],
                     'name': playlist['name'],
+                    'snapshot_id': playlist['snapshot_id'],
                     'tracks': playlist['tracks']['total']
                 })
                 dedup_logger.info(
@@ -140,6 +140,7 @@ def deduplicate_unchartify_playlists(spotify_client, dry_run: bool = False,
                     playlists.append({
                         'id': playlist['id'],
                         'name': playlist['name'],
+                        'snapshot_id': playlist['snapshot_id'],
                         'tracks': playlist['tracks']['total']
                     })
                     found = True
@@ -160,6 +161,9 @@ def deduplicate_unchartify_playlists(spotify_client, dry_run: bool = False,
             print("No Unchartify playlists found in your account.")
             return {'playlists_processed': 0, 'total_tracks_removed': 0}
 
+    # A playlist matched by several IDs or names is only processed once
+    playlists = list({playlist['id']: playlist for playlist in playlists}.values())
+
     # Print summary of playlists to process
     print(f"\nFound {len(playlists)} Unchartify playlists:")
     for i, playlist in enumerate(playlists, 1):
@@ -185,6 +189,13 @@ def deduplicate_unchartify_playlists(spotify_client, dry_run: bool = False,
         report_file.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
         report_file.write(f"{'Dry run: ' if dry_run else ''}Showing changes{' only' if dry_run else ' to be made'}\n\n")
 
+        # Fetch every playlist once (concurrently, skipping unchanged cached ones) and
+        # work out all removals up front
+        print("\nLoading playlist tracks...")
+        session = DeduplicationSession(spotify_client)
+        session.load_playlists(playlists)
+        plans = session.plan_removals()
+
         # Process each playlist
         for playlist in playlists:
             playlist_id = playlist['id']
@@ -197,41 +208,19 @@ def deduplicate_unchartify_playlists(spotify_client, dry_run: bool = False,
             report_file.write(f"PLAYLIST: {playlist_name}\n")
             report_file.write(f"{'=' * 80}\n\n")
 
-            # Identify duplicates
             try:
-                tracks_to_keep, tracks_to_remove = deduplicate_playlist(spotify_client, playlist_id)
+                plan = plans.get(playlist_id)
+                if plan is None:
+                    raise RuntimeError(session.errors.get(playlist_id, "playlist tracks could not be loaded"))
+
+                tracks_to_keep = plan.tracks_to_keep
+                tracks_to_remove = plan.tracks_to_remove
 
                 # Write to report file
                 if tracks_to_remove:
                     report_file.write(f"Found {len(tracks_to_remove)} duplicate tracks to remove:\n\n")
 
-                    # Group by primary track
-                    duplicates_by_primary = {}
-                    for track in tracks_to_remove:
-                        # Find which kept track this is a duplicate of
-                        for keep_track in tracks_to_keep:
-                            # We'll use a simple check on track name/artist for the report
-                            if track.get('artists', [{}])[0].get('name') == keep_track.get('artists', [{}])[0].get(
-                                    'name'):
-                                # Check if names are similar enough (basic check)
-                                base_name_kept = keep_track.get('name', '').lower().split('[')[0].split('(')[0].strip()
-                                base_name_remove = track.get('name', '').lower().split('[')[0].split('(')[0].strip()
-
-                                if base_name_kept == base_name_remove:
-                                    keep_id = keep_track.get('id')
-                                    if keep_id not in duplicates_by_primary:
-                                        duplicates_by_primary[keep_id] = {
-                                            'keep': keep_track,
-                                            'duplicates': []
-                                        }
-                                    duplicates_by_primary[keep_id]['duplicates'].append(track)
-                                    break
-
-                    # Write grouped duplicates to report
-                    for primary_id, group in duplicates_by_primary.items():
-                        keep_track = group['keep']
-                        duplicates = group['duplicates']
-
+                    for keep_track, duplicates in plan.duplicate_groups:
                         report_file.write(f"Keeping: {get_track_display_info(keep_track)}\n")
                         report_file.write(f"Removing these duplicates:\n")
 
@@ -249,113 +238,21 @@ def deduplicate_unchartify_playlists(spotify_client, dry_run: bool = False,
 
                 # Remove tracks if not a dry run
                 if tracks_to_remove and not dry_run:
-                    # Group tracks by what they're duplicates of
-                    duplicates_by_primary = {}
-
-                    # Build mapping of track IDs to make lookups easier
-                    kept_tracks_map = {track['id']: track for track in tracks_to_keep if 'id' in track}
-
-                    # Make a copy of tracks to remove that we'll work from
-                    unmatched_tracks = list(tracks_to_remove)
-                    matched_tracks = []
-
-                    # First try to match by using our original grouping logic (which should be available from deduplicate_playlist)
-                    # Get all tracks in the playlist
-                    all_playlist_tracks = []
-                    offset = 0
-                    limit = 100  # Spotify API limit
-
-                    while True:
-                        results = spotify_client.playlist_items(
-                            playlist_id,
-                            offset=offset,
-                            limit=limit,
-                            fields='items(track(id,name,artists(name),duration_ms)),total'
-                        )
-
-                        if not results['items']:
-                            break
-
-                        all_playlist_tracks.extend([item['track'] for item in results['items'] if item['track']])
-                        offset += limit
-
-                        if offset >= results['total']:
-                            break
-
-                    # Re-run the grouping logic
-                    from helpers.deduplication_helper import group_similar_tracks, rank_track_versions
-                    track_groups = group_similar_tracks(all_playlist_tracks)
-
-                    # Use the groups to build our mapping for display
-                    for group in track_groups:
-                        if len(group) > 1:  # Only process groups with duplicates
-                            # Rank the versions
-                            ranked_tracks = rank_track_versions(group)
-                            best_track = ranked_tracks[0]
-                            other_tracks = ranked_tracks[1:]
-
-                            # Check which tracks are in our remove list
-                            remove_ids = [t['id'] for t in tracks_to_remove if 'id' in t]
-                            matches = [t for t in other_tracks if 'id' in t and t['id'] in remove_ids]
-
-                            if matches:
-                                # Add to our display mapping
-                                if best_track['id'] not in duplicates_by_primary:
-                                    duplicates_by_primary[best_track['id']] = {
-                                        'keep': best_track,
-                                        'duplicates': []
-                                    }
-
-                                for match in matches:
-                                    duplicates_by_primary[best_track['id']]['duplicates'].append(match)
-                                    # Track which ones we've matched successfully
-                                    if match in unmatched_tracks:
-                                        unmatched_tracks.remove(match)
-                                        matched_tracks.append(match)
-
-                    # If there are still unmatched tracks, something went wrong in our grouping logic
-                    # This should not happen with the current implementation, but we'll leave this check
-                    # as a safety measure and log warnings
-                    if unmatched_tracks:
-                        dedup_logger.warning(
-                            f"Found {len(unmatched_tracks)} tracks that couldn't be matched to kept tracks")
-                        for track in unmatched_tracks:
-                            dedup_logger.warning(
-                                f"Unmatched track: {track.get('name', 'Unknown')} by {track.get('artists', [{}])[0].get('name', 'Unknown')}")
-
-                        # We'll exclude these from removal
-                        tracks_to_remove = matched_tracks
-                        dedup_logger.info(
-                            f"Will only remove {len(tracks_to_remove)} matched tracks instead of original {len(tracks_to_remove) + len(unmatched_tracks)}")
-
-                    # If we have no tracks to remove after filtering, skip
-                    if not tracks_to_remove:
-                        print("No duplicate tracks to remove after validation checks.")
-                        continue
-
                     # Ask for confirmation showing the kept tracks vs removed tracks
                     print(f"\nThe following changes will be made to playlist '{playlist_name}':")
                     print("=" * 80)
 
-                    group_count = 1
                     tracks_by_group = {}
-                    for primary_id, group in duplicates_by_primary.items():
-                        keep_track = group['keep']
-                        duplicates = group['duplicates']
-
-                        if duplicates:  # Only show groups that have duplicates to remove
-                            print(f"\nGroup {group_count}: KEEPING:")
-                            print(f"  ✅ {get_track_display_info(keep_track)}")
-                            print(f"  REMOVING:")
+                    for group_count, (keep_track, duplicates) in enumerate(plan.duplicate_groups, 1):
+                        print(f"\nGroup {group_count}: KEEPING:")
+                        print(f"  ✅ {get_track_display_info(keep_track)}")
+                        print(f"  REMOVING:")
 
-                            # Store tracks in this group for possible exclusion
-                            tracks_by_group[group_count] = []
+                        # Store tracks in this group for possible exclusion
+                        tracks_by_group[group_count] = list(duplicates)
 
-                            for i, dupe in enumerate(duplicates, 1):
-                                print(f"  ❌ {i}. {get_track_display_info(dupe)}")
-                                tracks_by_group[group_count].append(dupe)
-
-                            group_count += 1
+                        for i, dupe in enumerate(duplicates, 1):
+                            print(f"  ❌ {i}. {get_track_display_info(dupe)}")
 
                     print("\n" + "=" * 80)
                     confirmation = input(
@@ -407,7 +304,7 @@ def deduplicate_unchartify_playlists(spotify_client, dry_run: bool = False,
                             continue
 
                     print(f"Removing {len(tracks_to_remove)} duplicate tracks...")
-                    success = remove_tracks_from_playlist(spotify_client, playlist_id, tracks_to_remove)
+                    success = session.remove_tracks(playlist_id, tracks_to_remove)
 
                     if success:
                         print(f"Successfully removed {len(tracks_to_remove)} duplicate tracks.")
@@ -434,9 +331,6 @@ def deduplicate_unchartify_playlists(spotify_client, dry_run: bool = False,
             # Add spacing in report
             report_file.write("\n\n")
 
-            # Slight delay to avoid API rate limits
-            time.sleep(1)
-
         # Write summary
         report_file.write(f"\n{'=' * 80}\n")
         report_file.write(f"SUMMARY\n")
@@ -5,6 +5,13 @@ LOGS_ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'l
 
 
 def setup_logger(name, *path_parts, level=logging.INFO, clear_existing=True):
+    logger = logging.getLogger(name)
+    logger.setLevel(level)
+
+    # Already configured in this process: don't truncate the live log or open another handler
+    if logger.handlers:
+        return logger
+
     log_file = build_log_path(*path_parts)
     os.makedirs(os.path.dirname(log_file), exist_ok=True)
 
@@ -15,13 +22,7 @@ def setup_logger(name, *path_parts, level=logging.INFO, clear_existing=True):
 
     handler = logging.FileHandler(log_file, encoding='utf-8')
     handler.setFormatter(formatter)
-
-    logger = logging.getLogger(name)
-    logger.setLevel(level)
-
-    # Prevent duplicate handlers
-    if not logger.handlers:
-        logger.addHandler(handler)
+    logger.addHandler(handler)
 
     return logger
 